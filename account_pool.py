@@ -0,0 +1,271 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+
+
+# Bir hesabın tek turda işleyebileceği en fazla mail - diğer hesaplar beklemesin
+DEFAULT_MAX_MESSAGES_PER_TURN = 50
+
+# Hesap metriklerinin yazdırılma aralığı (saniye)
+DEFAULT_METRICS_INTERVAL = 300
+
+# Bağlantı hatasında yeniden bağlanma beklemesi: 5 sn'den başlar, en fazla 5 dk
+RECONNECT_DELAY = 5
+RECONNECT_MAX_DELAY = 300
+
+
+class AccountMetrics:
+    """Bir hesabın kontrol turu ve işlenen mail istatistikleri"""
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Hesap adı
+        """
+        self.name = name
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.polls = 0
+        self.messages = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.total_poll_time = 0.0
+        self.max_poll_time = 0.0
+        self.last_poll = None
+
+    def record_poll(self, count, elapsed, failed=False):
+        """
+        Tamamlanan kontrol turunu kaydet
+
+        Args:
+            count (int): İşlenen mail sayısı
+            elapsed (float): Turun süresi (saniye)
+            failed (bool): Tur hatayla bittiyse True
+        """
+        with self.lock:
+            self.polls += 1
+            self.messages += count
+            self.errors += int(failed)
+            self.total_poll_time += elapsed
+            self.max_poll_time = max(self.max_poll_time, elapsed)
+            self.last_poll = datetime.now()
+
+    def record_reconnect(self):
+        with self.lock:
+            self.reconnects += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: polls, messages, errors, reconnects, avg_poll_ms, max_poll_ms,
+                  messages_per_minute, last_poll
+        """
+        with self.lock:
+            uptime = max(time.monotonic() - self.started, 1e-9)
+            return {
+                "polls": self.polls,
+                "messages": self.messages,
+                "errors": self.errors,
+                "reconnects": self.reconnects,
+                "avg_poll_ms": self.total_poll_time / self.polls * 1000 if self.polls else 0.0,
+                "max_poll_ms": self.max_poll_time * 1000,
+                "messages_per_minute": self.messages / uptime * 60,
+                "last_poll": self.last_poll.strftime("%H:%M:%S") if self.last_poll else "-"
+            }
+
+
+def print_account_metrics(metrics):
+    """Hesap metriklerini tablo olarak yazdır"""
+    print(f"\n📊 Hesap metrikleri ({len(metrics)} hesap):")
+    for item in sorted(metrics, key=lambda m: m.name):
+        stats = item.snapshot()
+        print(f"   • {item.name[:40]:<40} {stats['messages']:>6} mail "
+              f"({stats['messages_per_minute']:.1f}/dk), {stats['polls']} tur, "
+              f"ort. {stats['avg_poll_ms']:.0f} ms (en fazla {stats['max_poll_ms']:.0f}), "
+              f"{stats['errors']} hata, {stats['reconnects']} yeniden bağlanma, son: {stats['last_poll']}")
+
+
+class AccountWorkerPool:
+    """
+    Çok sayıda hesabı sınırlı sayıda thread ile sırayla kontrol eder
+
+    Her hesabın IMAP bağlantısı turlar arasında açık tutulur ve tekrar
+    kullanılır. Hesaplar bir sonraki kontrol zamanına göre sıralı bir
+    kuyrukta bekler; boşta kalan worker zamanı en önce gelen hesabı alır.
+    Bir hesap tek turda en fazla max_messages_per_turn mail işler, kalanı
+    varsa kuyruğun sonuna (şimdiki zamanla) geri girer; böylece çok mail
+    alan bir hesap diğerlerini bekletmez.
+
+    IDLE bir thread'i süresiz meşgul edeceği için havuzda kullanılmaz;
+    yüzlerce hesapta anlık bildirim için asyncio motoru tercih edilmelidir.
+    """
+
+    def __init__(self, workers=4, max_messages_per_turn=DEFAULT_MAX_MESSAGES_PER_TURN,
+                 metrics_interval=DEFAULT_METRICS_INTERVAL):
+        """
+        Args:
+            workers (int): Aynı anda kontrol yapan en fazla thread
+            max_messages_per_turn (int): Bir hesabın tek turda işleyebileceği en fazla mail
+            metrics_interval (int): Metriklerin yazdırılma aralığı (saniye, 0 ise sadece sonda)
+        """
+        self.workers = max(1, int(workers))
+        self.max_messages_per_turn = max_messages_per_turn
+        self.metrics_interval = metrics_interval
+        self.accounts = []
+        self.schedule = []  # [(sonraki kontrol zamanı, sıra, hesap)]
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def add_account(self, name, fetcher, initial_scan=None):
+        """
+        Hesap ekle
+
+        Args:
+            name (str): Hesap adı (log ve metrikler için)
+            fetcher (MailFetcher): İşleyicileri eklenmiş fetcher
+            initial_scan (callable): İlk bağlantıda kayıtlı durum yoksa çağrılır
+        """
+        account = {
+            "name": name,
+            "fetcher": fetcher,
+            "initial_scan": initial_scan,
+            "connected": False,
+            "prepared": False,
+            "reconnect_delay": RECONNECT_DELAY,
+            "metrics": AccountMetrics(name)
+        }
+        self.accounts.append(account)
+        self._push(account, time.monotonic())
+
+    def _push(self, account, due):
+        with self.condition:
+            self.sequence += 1
+            heapq.heappush(self.schedule, (due, self.sequence, account))
+            self.condition.notify()
+
+    def _take(self):
+        """Zamanı gelen ilk hesabı al (durdurulursa None)"""
+        with self.condition:
+            while not self.stopped:
+                if self.schedule:
+                    wait = self.schedule[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self.schedule)[2]
+                    self.condition.wait(min(wait, 1))
+                else:
+                    self.condition.wait(1)
+            return None
+
+    def _connect(self, account):
+        """Hesaba bağlan; ilk bağlantıda mevcut mailleri atla"""
+        fetcher = account["fetcher"]
+        if not fetcher.connect():
+            return False
+
+        if not account["prepared"]:
+            if account["initial_scan"] and not fetcher.has_saved_state():
+                account["initial_scan"]()
+            fetcher.skip_existing()
+            account["prepared"] = True
+        else:
+            account["metrics"].record_reconnect()
+
+        account["connected"] = True
+        account["reconnect_delay"] = RECONNECT_DELAY
+        return True
+
+    def _disconnect(self, account):
+        account["fetcher"].disconnect()
+        account["fetcher"].mail = None
+        account["connected"] = False
+
+    def process(self, account):
+        """
+        Hesabı bir tur kontrol et
+
+        Returns:
+            float: Bir sonraki kontrole kadar beklenecek süre (saniye)
+        """
+        fetcher = account["fetcher"]
+
+        if not account["connected"]:
+            try:
+                connected = self._connect(account)
+            except Exception as e:
+                print(f"✗ {account['name']}: bağlantı hatası ({e})")
+                connected = False
+            if not connected:
+                self._disconnect(account)
+                delay = account["reconnect_delay"]
+                account["reconnect_delay"] = min(RECONNECT_MAX_DELAY, delay * 2)
+                account["metrics"].record_poll(0, 0.0, failed=True)
+                return delay
+
+        start = time.monotonic()
+        count = fetcher.poll(self.max_messages_per_turn)
+        elapsed = time.monotonic() - start
+        account["metrics"].record_poll(count, elapsed, failed=fetcher.last_poll_failed)
+
+        if fetcher.last_poll_failed:
+            # Bağlantı kopmuş olabilir; sonraki turda yeniden bağlanılır
+            self._disconnect(account)
+            return RECONNECT_DELAY
+
+        if count:
+            print(f"✉️  {account['name']}: {count} mail işlendi ({elapsed:.1f} sn)")
+        if self.max_messages_per_turn and count >= self.max_messages_per_turn:
+            # Bekleyen mail var, sıradaki hesaplardan sonra devam et
+            return 0
+        return fetcher.check_interval
+
+    def _worker(self):
+        while True:
+            account = self._take()
+            if account is None:
+                return
+            try:
+                delay = self.process(account)
+            except Exception as e:
+                print(f"✗ {account['name']}: beklenmeyen hata ({e})")
+                delay = RECONNECT_DELAY
+            self._push(account, time.monotonic() + delay)
+
+    def run(self, stop_check=None):
+        """
+        Worker'ları başlat ve durdurulana kadar çalıştır
+
+        Args:
+            stop_check (callable): True döndürürse havuz durur
+        """
+        print(f"🧵 Hesap havuzu: {len(self.accounts)} hesap, {self.workers} worker, "
+              f"tur başına en fazla {self.max_messages_per_turn} mail")
+
+        threads = []
+        for index in range(min(self.workers, len(self.accounts)) or 1):
+            thread = threading.Thread(target=self._worker, daemon=True, name=f"Hesap-{index + 1}")
+            thread.start()
+            threads.append(thread)
+
+        next_metrics = time.monotonic() + self.metrics_interval if self.metrics_interval else None
+        try:
+            while not (stop_check and stop_check()):
+                time.sleep(1)
+                if next_metrics and time.monotonic() >= next_metrics:
+                    print_account_metrics([account["metrics"] for account in self.accounts])
+                    next_metrics = time.monotonic() + self.metrics_interval
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+            for account in self.accounts:
+                if account["connected"]:
+                    self._disconnect(account)
+            print_account_metrics([account["metrics"] for account in self.accounts])
+
+    def stop(self):
+        """Worker'ları durdur (devam eden turlar tamamlanır)"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
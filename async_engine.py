@@ -0,0 +1,453 @@
+import asyncio
+from datetime import datetime
+from email.parser import BytesHeaderParser
+
+from account_pool import (AccountMetrics, print_account_metrics, DEFAULT_METRICS_INTERVAL,
+                          RECONNECT_DELAY, RECONNECT_MAX_DELAY)
+from async_imap import AsyncImapClient, AsyncImapError
+from imap_fetch import build_message_sets, parse_fetch_response, HEADER_PREFILTER_PARTS, DEFAULT_FETCH_BATCH_SIZE
+from imap_idle import IDLE_MAX_SECONDS
+from imap_search import chunk_search_terms, build_or_query, MAX_SEARCH_COMMANDS
+from mail_fetcher import MailFetcher
+from mail_parser import LazyMail
+from uid_state import UidCheckpoint
+
+
+async def fetch_messages(client, uids, parts="(RFC822)", batch_size=DEFAULT_FETCH_BATCH_SIZE):
+    """
+    imap_fetch.fetch_messages'ın async sürümü: mailleri toplu UID FETCH ile çek
+
+    Yields:
+        tuple: (uid_bytes, veri_bytes)
+    """
+    for message_set, chunk in build_message_sets(uids, batch_size):
+        status, msg_data = await client.uid("FETCH", message_set, parts)
+        if status != "OK":
+            # İzleyici yeniden bağlanır; son UID çekilemeyen kümenin ötesine ilerlemez
+            raise AsyncImapError(f"FETCH başarısız ({message_set[:40]}): {status}")
+
+        fetched = dict(parse_fetch_response(msg_data))
+        for number in chunk:
+            key = str(number).encode()
+            if key in fetched:
+                yield key, fetched[key]
+
+
+async def fetch_with_header_prefilter(client, uids, header_filter, batch_size=DEFAULT_FETCH_BATCH_SIZE):
+    """
+    imap_fetch.fetch_with_header_prefilter'ın async sürümü: önce başlıklar,
+    sonra sadece eşleşen maillerin tamamı
+
+    Yields:
+        tuple: (uid_bytes, tam_mail_bytes veya None, header_filter sonucu)
+    """
+    parser = BytesHeaderParser()
+    for message_set, chunk in build_message_sets(uids, batch_size):
+        status, header_data = await client.uid("FETCH", message_set, HEADER_PREFILTER_PARTS)
+        if status != "OK":
+            raise AsyncImapError(f"Başlık FETCH başarısız ({message_set[:40]}): {status}")
+
+        headers_by_uid = {}
+        matches = {}
+        for uid, raw_headers in parse_fetch_response(header_data):
+            headers_by_uid[uid] = True
+            result = header_filter(parser.parsebytes(raw_headers))
+            if result:
+                matches[uid] = result
+
+        full_messages = {}
+        if matches:
+            async for uid, raw_email in fetch_messages(client, list(matches), "(RFC822)", batch_size):
+                full_messages[uid] = raw_email
+
+        for number in chunk:
+            key = str(number).encode()
+            if key in headers_by_uid:
+                yield key, full_messages.get(key), matches.get(key)
+
+
+async def search_matching_uids(client, first_uid, last_uid, terms, max_commands=MAX_SEARCH_COMMANDS):
+    """
+    imap_search.search_matching_uids'in async sürümü
+
+    Returns:
+        list: Eşleşen UID'ler (bytes) veya sunucu tarafı arama kullanılamıyorsa None
+    """
+    if terms is None:
+        return None
+    if not terms or last_uid < first_uid:
+        return []
+
+    chunks = chunk_search_terms(terms)
+    if len(chunks) > max_commands:
+        return None
+
+    found = set()
+    try:
+        for chunk in chunks:
+            status, data = await client.uid("SEARCH", f"UID {first_uid}:{last_uid} {build_or_query(chunk)}")
+            if status != "OK":
+                return None
+            found.update(int(uid) for uid in data[0].split())
+    except UnicodeError as e:
+        print(f"⚠️  Sunucu tarafı arama desteklenmiyor ({e}), başlık filtresine dönülüyor")
+        return None
+
+    return [str(uid).encode() for uid in sorted(found) if first_uid <= uid <= last_uid]
+
+
+class AsyncMailFetcher(MailFetcher):
+    """
+    MailFetcher'ın asyncio sürümü
+
+    İşleyiciler, sunucu tarafı arama, başlık ön filtresi ve UID checkpoint
+    aynıdır; sadece IMAP trafiği AsyncImapClient ile event loop'ta yapılır.
+    Mail parse etme ve işleyiciler (dosya kaydı, bildirim) loop'u
+    bekletmemek için thread havuzunda çalışır.
+    """
+
+    def __init__(self, *args, port=993, use_ssl=True, **kwargs):
+        """
+        Args:
+            port (int): IMAP portu
+            use_ssl (bool): TLS kullan
+            Diğer parametreler MailFetcher ile aynıdır.
+        """
+        super().__init__(*args, **kwargs)
+        self.port = port
+        self.use_ssl = use_ssl
+        # İlk bağlantıda kayıtlı durum yoksa çağrılır (örn: mevcut yanıtları tara)
+        self.initial_scan = None
+
+    async def connect(self):
+        """Mail sunucusuna bağlan (hata durumunda exception fırlatır)"""
+        self.mail = AsyncImapClient(self.imap_server, self.port, self.use_ssl)
+        await self.mail.connect()
+        await self.mail.login(self.email_address, self.password)
+        print(f"✓ {self.email_address} adresine başarıyla bağlanıldı (asyncio)")
+        return True
+
+    async def disconnect(self):
+        """Mail sunucusundan ayrıl"""
+        if self.mail:
+            await self.mail.logout()
+            self.mail = None
+
+    async def has_saved_state(self):
+        uidvalidity = await self.mail.select(self.folder)
+        return self.uid_state.get_last_uid(self.email_address, self.folder, uidvalidity) > 0
+
+    async def get_max_uid(self):
+        status, data = await self.mail.uid("SEARCH", "*")
+        if status != "OK" or not data or not data[0]:
+            return 0
+        return max(int(uid) for uid in data[0].split())
+
+    async def search_new_uids(self, last_uid):
+        status, data = await self.mail.uid("SEARCH", f"UID {last_uid + 1}:*")
+        if status != "OK":
+            return None
+        # "n:*" aralığı, yeni mail yoksa bile son maili döndürür; onu ele
+        return sorted((uid for uid in data[0].split() if int(uid) > last_uid), key=int)
+
+    async def skip_existing(self):
+        uidvalidity = await self.mail.select(self.folder)
+        last_uid = self.uid_state.get_last_uid(self.email_address, self.folder, uidvalidity)
+
+        if last_uid:
+            print(f"ℹ️  {self.email_address}: UID {last_uid} sonrasından devam ediliyor.")
+            return
+
+        max_uid = await self.get_max_uid()
+        self.uid_state.set_last_uid(self.email_address, self.folder, uidvalidity, max_uid)
+        print(f"ℹ️  {self.email_address}: UID {max_uid} ve öncesi mevcut mailler atlandı.")
+
+    async def search_on_server(self, last_uid, max_uid):
+        matched = {}
+        for h in self.handlers:
+            uids = await search_matching_uids(self.mail, last_uid + 1, max_uid, h["search_terms"](self.mail))
+            if uids is None:
+                return None
+            for uid in uids:
+                matched.setdefault(uid, []).append(h["name"])
+        return matched
+
+    async def parse_messages(self, items):
+        """
+        (uid, ham mail, ...) akışını FETCH grupları halinde worker süreçlerde parse et
+
+        Havuz yoksa ham mail aynen geçer; parse_and_dispatch thread'de LazyMail'e sarar.
+        """
+        if not self.parser_pool:
+            async for item in items:
+                yield item
+            return
+
+        batch = []
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= self.fetch_batch_size:
+                for parsed in await asyncio.to_thread(self.parser_pool.parse_items, batch):
+                    yield parsed
+                batch = []
+        if batch:
+            for parsed in await asyncio.to_thread(self.parser_pool.parse_items, batch):
+                yield parsed
+
+    def parse_and_dispatch(self, uid, mail, only=None):
+        """Maili (gerekirse parse edip) işleyicilere ver (thread havuzunda çalışır)"""
+        msg = LazyMail(mail) if isinstance(mail, bytes) else mail
+        self.dispatch(uid, msg, only)
+
+    async def poll(self, max_messages=None):
+        """
+        Yeni mailleri bir kez çek ve dağıt
+
+        Bağlantı hataları yukarı fırlatılır; izleyici yeniden bağlanır.
+
+        Args:
+            max_messages (int): Verilirse bu turda en fazla bu kadar mail işlenir
+
+        Returns:
+            int: İşlenen mail sayısı
+        """
+        try:
+            return await self.poll_messages(max_messages)
+        finally:
+            if self.poll_hooks:
+                await asyncio.to_thread(self.run_poll_hooks)
+
+    async def poll_messages(self, max_messages=None):
+        uidvalidity = await self.mail.select(self.folder)
+        checkpoint = UidCheckpoint(self.uid_state, self.email_address, self.folder,
+                                   uidvalidity, self.fetch_batch_size)
+        last_uid = checkpoint.last_uid
+
+        if self.can_search_on_server():
+            max_uid = await self.get_max_uid()
+            matched = await self.search_on_server(last_uid, max_uid)
+
+            if matched is not None:
+                # İşleyici sırasıyla değil geliş sırasıyla: tur sınırı en eski mailleri alır
+                uids = sorted(checkpoint.filter_new(matched), key=int)
+                # Tur sınırı aşıldıysa son UID ilerlemez, kalanlar sonraki turda işlenir
+                truncated = max_messages is not None and len(uids) > max_messages
+                if truncated:
+                    uids = uids[:max_messages]
+                if uids:
+                    print(f"🔔 {self.email_address}: {len(uids)} eşleşen yeni mail bulundu!")
+
+                count = 0
+                try:
+                    async for uid, message in self.parse_messages(
+                            fetch_messages(self.mail, uids, "(RFC822)", self.fetch_batch_size)):
+                        await asyncio.to_thread(self.parse_and_dispatch, uid, message, matched[uid])
+                        checkpoint.mark(uid, advance=False)
+                        count += 1
+                except BaseException:
+                    checkpoint.commit()
+                    raise
+
+                checkpoint.commit(None if truncated else max_uid)
+                return count
+
+        new_uids = checkpoint.filter_new(await self.search_new_uids(last_uid) or [])
+        if max_messages is not None:
+            new_uids = new_uids[:max_messages]
+        if not new_uids:
+            return 0
+
+        print(f"🔔 {self.email_address}: {len(new_uids)} yeni mail bulundu!")
+
+        count = 0
+        try:
+            if self.can_prefilter():
+                async for uid, message, matched in self.parse_messages(fetch_with_header_prefilter(
+                        self.mail, new_uids, self.match_headers, self.fetch_batch_size)):
+                    if message:
+                        await asyncio.to_thread(self.parse_and_dispatch, uid, message, matched)
+                    count += 1
+                    checkpoint.mark(uid)
+            else:
+                async for uid, message in self.parse_messages(
+                        fetch_messages(self.mail, new_uids, "(RFC822)", self.fetch_batch_size)):
+                    await asyncio.to_thread(self.parse_and_dispatch, uid, message)
+                    count += 1
+                    checkpoint.mark(uid)
+        finally:
+            checkpoint.commit()
+
+        return count
+
+    async def wait_for_new_mail(self, stop_event):
+        """IDLE ile (yoksa check_interval kadar) bekle; durdurulursa hemen döner"""
+        if self.use_idle and "IDLE" in self.mail.capabilities:
+            await self.mail.idle(IDLE_MAX_SECONDS, stop_event)
+            return
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), self.check_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, stop_event, poll=None, max_messages=None):
+        """
+        Yeni mailleri sürekli çek ve dağıt
+
+        Args:
+            stop_event (asyncio.Event): Set edilince döngü biter
+            poll (callable): Turu yapan coroutine fonksiyonu (varsayılan self.poll)
+            max_messages (int): Tur sınırı - sınıra ulaşan tur beklemeden tekrarlanır
+        """
+        poll = poll or (lambda: self.poll(max_messages))
+
+        while not stop_event.is_set():
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"\n[{timestamp}] {self.email_address}: mail kontrol ediliyor...")
+
+            count = await poll()
+            if not count:
+                print(f"📭 {self.email_address}: yeni mail yok")
+
+            if max_messages and count >= max_messages:
+                # Bekleyen mail var; sırayı diğer hesaplara bırakıp devam et
+                await asyncio.sleep(0)
+                continue
+
+            await self.wait_for_new_mail(stop_event)
+
+
+class AsyncTrackingEngine:
+    """
+    Tüm hesapları ve takip sistemlerini tek event loop'ta çalıştırır
+
+    Her hesap bir asyncio görevidir (thread değil): boşta bekleyen yüzlerce
+    IDLE bağlantısı sadece soket ve küçük bir tampon kadar bellek kullanır.
+    Bağlantısı kopan hesap artan beklemeyle yeniden bağlanır, diğerleri
+    etkilenmez. Durdurulduğunda görevler iptal edilir, yarım kalan batch'in
+    UID durumu kaydedilir ve oturumlar kapatılır.
+
+    Bağlantılar hep açık kalır ama aynı anda en fazla max_concurrent_polls
+    hesap mail çekip işler; bir hesap tek turda en fazla
+    max_messages_per_turn mail işleyip sırayı diğerlerine bırakır.
+    """
+
+    def __init__(self, reconnect_delay=RECONNECT_DELAY, reconnect_max_delay=RECONNECT_MAX_DELAY,
+                 max_concurrent_polls=None, max_messages_per_turn=None,
+                 metrics_interval=DEFAULT_METRICS_INTERVAL):
+        """
+        Args:
+            reconnect_delay (float): İlk yeniden bağlanma beklemesi (saniye)
+            reconnect_max_delay (float): En uzun yeniden bağlanma beklemesi (saniye)
+            max_concurrent_polls (int): Aynı anda mail çeken en fazla hesap (None ise sınırsız)
+            max_messages_per_turn (int): Bir hesabın tek turda işleyebileceği en fazla mail
+            metrics_interval (int): Hesap metriklerinin yazdırılma aralığı (saniye, 0 ise sadece sonda)
+        """
+        self.fetchers = []
+        self.metrics = {}
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.max_concurrent_polls = max_concurrent_polls
+        self.max_messages_per_turn = max_messages_per_turn
+        self.metrics_interval = metrics_interval
+        self.poll_slots = None
+        self.loop = None
+        self.stop_event = None
+
+    def add_fetcher(self, fetcher, name=None):
+        """
+        İzlenecek hesabı ekle
+
+        Args:
+            fetcher (AsyncMailFetcher): İşleyicileri eklenmiş fetcher
+            name (str): Metriklerde görünecek hesap adı (varsayılan e-posta adresi)
+        """
+        self.fetchers.append(fetcher)
+        self.metrics[fetcher] = AccountMetrics(name or fetcher.email_address)
+
+    async def poll_account(self, fetcher):
+        """Hesabı bir tur kontrol et (eşzamanlı tur sınırı ve metriklerle)"""
+        metrics = self.metrics[fetcher]
+        async with self.poll_slots:
+            start = self.loop.time()
+            try:
+                count = await fetcher.poll(self.max_messages_per_turn)
+            except BaseException:
+                metrics.record_poll(0, self.loop.time() - start, failed=True)
+                raise
+        metrics.record_poll(count, self.loop.time() - start)
+        return count
+
+    async def watch(self, fetcher):
+        """Tek hesabı izle; bağlantı koparsa yeniden bağlan"""
+        delay = self.reconnect_delay
+        first_connect = True
+
+        while not self.stop_event.is_set():
+            try:
+                await fetcher.connect()
+
+                if first_connect:
+                    if fetcher.initial_scan and not await fetcher.has_saved_state():
+                        await asyncio.to_thread(fetcher.initial_scan)
+                    await fetcher.skip_existing()
+                    first_connect = False
+                else:
+                    self.metrics[fetcher].record_reconnect()
+
+                delay = self.reconnect_delay
+                await fetcher.run(self.stop_event, lambda: self.poll_account(fetcher),
+                                  self.max_messages_per_turn)
+
+            except (AsyncImapError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                print(f"⚠️  {fetcher.email_address}: bağlantı hatası ({e}), {delay:.0f} saniye sonra tekrar denenecek")
+            except Exception as e:
+                print(f"✗ {fetcher.email_address}: mail kontrol hatası ({e}), {delay:.0f} saniye sonra tekrar denenecek")
+            finally:
+                await fetcher.disconnect()
+
+            if self.stop_event.is_set():
+                break
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(self.reconnect_max_delay, delay * 2)
+
+    async def report_metrics(self):
+        """Hesap metriklerini düzenli aralıklarla yazdır"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            print_account_metrics(list(self.metrics.values()))
+
+    async def run(self):
+        """Tüm hesapları izle; stop() çağrılınca veya iptal edilince biter"""
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        self.poll_slots = asyncio.Semaphore(self.max_concurrent_polls or max(1, len(self.fetchers)))
+
+        tasks = [
+            asyncio.create_task(self.watch(fetcher), name=fetcher.email_address)
+            for fetcher in self.fetchers
+        ]
+        reporter = asyncio.create_task(self.report_metrics()) if self.metrics_interval else None
+        print(f"⚡ asyncio motoru: {len(tasks)} hesap tek event loop'ta izleniyor"
+              + (f", aynı anda en fazla {self.max_concurrent_polls} tur" if self.max_concurrent_polls else ""))
+
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if reporter:
+                reporter.cancel()
+            print_account_metrics(list(self.metrics.values()))
+
+        for fetcher, result in zip(self.fetchers, results):
+            if isinstance(result, Exception):
+                print(f"✗ {fetcher.email_address} izleme hatası: {result}")
+
+    def stop(self):
+        """İzlemeyi durdur (başka bir thread'den de çağrılabilir)"""
+        if self.loop and self.stop_event:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
@@ -0,0 +1,279 @@
+import asyncio
+import re
+import ssl
+
+from imap_search import quote_imap_string
+
+
+IMAP_SSL_PORT = 993
+
+# Komut yanıtı için en fazla bekleme süresi (saniye)
+COMMAND_TIMEOUT = 120
+
+# Tek satırın en fazla uzunluğu - büyük klasörlerde SEARCH yanıtı tek satırdır
+MAX_LINE_LENGTH = 4 * 1024 * 1024
+
+_LITERAL_RE = re.compile(rb"\{(\d+)\}\r\n$")
+_UNTAGGED_STATUS_RE = re.compile(rb"\* (\d+) ([A-Z-]+)(?: (.*))?$", re.S)
+_UNTAGGED_RE = re.compile(rb"\* ([A-Z-]+)(?: (.*))?$", re.S)
+_UIDVALIDITY_RE = re.compile(rb"\[UIDVALIDITY (\d+)\]")
+
+
+class AsyncImapError(Exception):
+    """Sunucu komutu reddetti (NO/BAD) veya bağlantı koptu"""
+
+
+class AsyncImapClient:
+    """
+    asyncio üzerinde çalışan küçük IMAP4rev1 istemcisi
+
+    Takip sistemlerinin kullandığı komutları (LOGIN, CAPABILITY, SELECT,
+    UID SEARCH, UID FETCH, IDLE, LOGOUT) destekler. Her hesap için bir thread
+    yerine tek bir soket ve birkaç KB tampon kullanır; yüzlerce hesap aynı
+    event loop'ta izlenebilir.
+
+    uid() imaplib ile aynı biçimde (durum, veri) döndürür; böylece
+    parse_fetch_response gibi mevcut yardımcılar aynen kullanılır.
+    """
+
+    def __init__(self, host, port=IMAP_SSL_PORT, use_ssl=True, timeout=COMMAND_TIMEOUT):
+        """
+        Args:
+            host (str): IMAP sunucu adresi
+            port (int): Port (varsayılan 993)
+            use_ssl (bool): TLS kullan (test sunucuları için kapatılabilir)
+            timeout (float): Komut yanıtı için en fazla bekleme (saniye)
+        """
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.tag_counter = 0
+        self.capabilities = ()
+        self.uidvalidity = None
+        self.exists = 0
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        """Sunucuya bağlan ve karşılama satırını oku"""
+        context = ssl.create_default_context() if self.use_ssl else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context, limit=MAX_LINE_LENGTH),
+            self.timeout
+        )
+        greeting = await self._read_line()
+        if not greeting.startswith(b"* OK") and not greeting.startswith(b"* PREAUTH"):
+            raise AsyncImapError(f"Beklenmeyen karşılama: {greeting.strip().decode(errors='ignore')}")
+
+    async def _read_line(self, timeout=None):
+        line = await asyncio.wait_for(self.reader.readline(), timeout or self.timeout)
+        if not line:
+            raise AsyncImapError("Bağlantı kapandı")
+        return line
+
+    async def _read_response(self, timeout=None):
+        """
+        Bir yanıtı literal'leriyle birlikte oku
+
+        Returns:
+            list: imaplib biçiminde parçalar - literal içeren kısımlar
+                  (başlık, literal) tuple'ı, kalan metin bytes
+        """
+        parts = []
+        line = await self._read_line(timeout)
+        while True:
+            match = _LITERAL_RE.search(line)
+            if not match:
+                parts.append(line.rstrip(b"\r\n"))
+                return parts
+            size = int(match.group(1))
+            literal = await asyncio.wait_for(self.reader.readexactly(size), self.timeout)
+            parts.append((line.rstrip(b"\r\n"), literal))
+            line = await self._read_line(timeout)
+
+    def _next_tag(self):
+        self.tag_counter += 1
+        return f"A{self.tag_counter:04d}".encode()
+
+    async def command(self, name, *args):
+        """
+        Etiketli komut gönder ve tamamlanmasını bekle
+
+        Returns:
+            tuple: (durum, {yanıt türü: [veri, ...]}) - durum "OK", "NO" veya "BAD"
+        """
+        async with self.lock:
+            tag = self._next_tag()
+            line = b" ".join([tag, name.encode()] + [
+                arg if isinstance(arg, bytes) else str(arg).encode("ascii") for arg in args
+            ])
+            self.writer.write(line + b"\r\n")
+            await self.writer.drain()
+
+            untagged = {}
+            while True:
+                parts = await self._read_response()
+                first = parts[0][0] if isinstance(parts[0], tuple) else parts[0]
+
+                if first.startswith(tag + b" "):
+                    status = first[len(tag) + 1:].split(b" ", 1)[0].decode()
+                    return status, untagged
+
+                if not first.startswith(b"* "):
+                    continue
+
+                self._collect_untagged(parts, untagged)
+
+    def _collect_untagged(self, parts, untagged):
+        """'* ...' yanıtını türüne göre imaplib biçiminde sakla"""
+        first = parts[0][0] if isinstance(parts[0], tuple) else parts[0]
+
+        match = _UNTAGGED_STATUS_RE.match(first)
+        if match:
+            # "* 12 FETCH (UID 5 RFC822 {342}" -> b"12 (UID 5 RFC822 {342}"
+            number, kind, rest = match.groups()
+            head = number + (b" " + rest if rest else b"")
+        else:
+            match = _UNTAGGED_RE.match(first)
+            if not match:
+                return
+            kind, rest = match.groups()
+            head = rest or b""
+
+        kind = kind.decode()
+        if kind == "EXISTS":
+            self.exists = int(head)
+        uidvalidity = _UIDVALIDITY_RE.search(first)
+        if uidvalidity:
+            self.uidvalidity = int(uidvalidity.group(1))
+
+        data = untagged.setdefault(kind, [])
+        if isinstance(parts[0], tuple):
+            data.append((head, parts[0][1]))
+        else:
+            data.append(head)
+        data.extend(parts[1:])
+
+    async def login(self, user, password):
+        """Kullanıcı adı/şifre ile giriş yap ve yetenekleri öğren"""
+        status, _ = await self.command("LOGIN", quote_imap_string(user), quote_imap_string(password))
+        if status != "OK":
+            raise AsyncImapError(f"Giriş başarısız: {status}")
+
+        status, untagged = await self.command("CAPABILITY")
+        if status == "OK" and untagged.get("CAPABILITY"):
+            self.capabilities = tuple(untagged["CAPABILITY"][0].decode().upper().split())
+
+    async def select(self, folder="INBOX", readonly=False):
+        """
+        Klasörü seç
+
+        Returns:
+            int: UIDVALIDITY (sunucu göndermediyse None)
+        """
+        self.uidvalidity = None
+        status, _ = await self.command("EXAMINE" if readonly else "SELECT", quote_imap_string(folder))
+        if status != "OK":
+            raise AsyncImapError(f"{folder} seçilemedi: {status}")
+        return self.uidvalidity
+
+    async def uid(self, command, *args):
+        """
+        UID komutu gönder (SEARCH veya FETCH)
+
+        Returns:
+            tuple: (durum, veri) - imaplib.IMAP4.uid ile aynı biçimde
+        """
+        command = command.upper()
+        status, untagged = await self.command("UID", command, *[arg for arg in args if arg is not None])
+        if command == "SEARCH":
+            return status, [b" ".join(untagged.get("SEARCH", [b""]))]
+        return status, untagged.get(command, [])
+
+    async def idle(self, timeout, stop_event=None):
+        """
+        IMAP IDLE ile yeni mail bildirimi bekle (RFC 2177)
+
+        Args:
+            timeout (float): En fazla bekleme süresi (saniye)
+            stop_event (asyncio.Event): Set edilirse bekleme erken biter
+
+        Returns:
+            bool: Yeni mail bildirimi geldiyse True
+        """
+        async with self.lock:
+            tag = self._next_tag()
+            self.writer.write(tag + b" IDLE\r\n")
+            await self.writer.drain()
+
+            line = await self._read_line(30)
+            if not line.startswith(b"+"):
+                raise AsyncImapError(f"IDLE başlatılamadı: {line.strip().decode(errors='ignore')}")
+
+            has_new_mail = False
+            read_task = None
+            stop_task = asyncio.ensure_future(stop_event.wait()) if stop_event else None
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            try:
+                while not has_new_mail:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    read_task = asyncio.ensure_future(self.reader.readline())
+                    waiting = {read_task} | ({stop_task} if stop_task else set())
+                    done, _ = await asyncio.wait(waiting, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                    if read_task not in done:
+                        break
+                    line = read_task.result()
+                    read_task = None
+                    if not line:
+                        raise AsyncImapError("IDLE sırasında bağlantı kapandı")
+                    # Örnek: b"* 1234 EXISTS"
+                    if line.startswith(b"*") and (b"EXISTS" in line or b"RECENT" in line):
+                        has_new_mail = True
+            except BaseException:
+                # İptal edildi veya bağlantı koptu: oturum kapatılacak, DONE gönderilmez
+                if read_task:
+                    read_task.cancel()
+                raise
+            finally:
+                if stop_task:
+                    stop_task.cancel()
+
+            # IDLE'ı sonlandır ve etiketli yanıtı bekle (okunmakta olan satır varsa önce o)
+            self.writer.write(b"DONE\r\n")
+            await self.writer.drain()
+            while True:
+                if read_task:
+                    line = await asyncio.wait_for(read_task, 30)
+                    read_task = None
+                else:
+                    line = await self._read_line(30)
+                if not line:
+                    raise AsyncImapError("IDLE sonlandırılamadı")
+                if line.startswith(tag):
+                    break
+                if b"EXISTS" in line or b"RECENT" in line:
+                    has_new_mail = True
+
+            return has_new_mail
+
+    async def logout(self):
+        """Oturumu kapat (hata olsa da soket kapatılır)"""
+        try:
+            if self.writer and not self.writer.is_closing():
+                await asyncio.wait_for(self.command("LOGOUT"), 5)
+        except Exception:
+            pass
+        finally:
+            if self.writer:
+                self.writer.close()
+                try:
+                    await self.writer.wait_closed()
+                except Exception:
+                    pass
+            self.writer = None
+            self.reader = None
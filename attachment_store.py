@@ -0,0 +1,273 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from mail_parser import iter_attachment, ATTACHMENT_CHUNK_SIZE
+
+
+# Blob adında korunan uzantı (bildirimlerde görsel tespiti uzantıya bakar)
+_EXTENSION_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    blob TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    filename TEXT,
+    content_type TEXT,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_owner ON refs (owner);
+CREATE INDEX IF NOT EXISTS refs_blob ON refs (blob);
+"""
+
+
+def blob_extension(filename):
+    """Dosya adının küçük harfli uzantısı (geçersizse boş)"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if _EXTENSION_RE.match(extension) else ""
+
+
+def owner_key(path):
+    """
+    Ek sahibinin kalıcı anahtarı
+
+    Ortak Maildir'deki mailler istemci tarafından new/'den cur/'a taşınıp
+    adlarına :2,S gibi bayraklar eklenebilir; bu yüzden Maildir yolları
+    <maildir>/<benzersiz ad> olarak saklanır. Diğer yollar olduğu gibi kalır.
+    """
+    folder, name = os.path.split(path)
+    root, subfolder = os.path.split(folder)
+    if subfolder in ("new", "cur") and os.path.isdir(os.path.join(root, "tmp")):
+        return os.path.join(root, name.split(":", 1)[0])
+    return path
+
+
+def owner_exists(owner):
+    """Ek sahibi mail hâlâ diskte mi? (Maildir'de new/ veya cur/ altında)"""
+    if os.path.exists(owner):
+        return True
+    root, name = os.path.split(owner)
+    if not os.path.isdir(os.path.join(root, "tmp")):
+        return False
+    return (os.path.exists(os.path.join(root, "new", name))
+            or bool(glob.glob(os.path.join(glob.escape(root), "cur", glob.escape(name) + "*"))))
+
+
+class AttachmentStore:
+    """
+    Ekleri içeriklerinin özetiyle adlandırıp bir kez saklayan depo
+
+    Ekler kaydedilirken SHA-256 özeti akış halinde hesaplanır ve dosya
+    kök/ab/cd/<özet><uzantı> yoluna taşınır; aynı içerik ikinci kez
+    geldiğinde diske tekrar yazılmaz. Hangi mailin hangi eki kullandığı
+    kök klasördeki index.db'de tutulur (referans sayısı); bir mailin
+    referansları bırakılınca hiçbir mailin kullanmadığı blob'lar silinir.
+    """
+
+    def __init__(self, root="attachments", algorithm="sha256"):
+        """
+        Args:
+            root (str): Deponun kök klasörü
+            algorithm (str): hashlib özet algoritması
+        """
+        self.root = root
+        self.algorithm = algorithm
+        self.tmp_folder = os.path.join(root, "tmp")
+        Path(self.tmp_folder).mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self.migrate_owners()
+
+    def migrate_owners(self):
+        """Eski sürümün sakladığı Maildir new/ ve cur/ yollarını kalıcı anahtara çevir"""
+        owners = [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT owner FROM refs WHERE owner LIKE '%new%' OR owner LIKE '%cur%'")]
+        updates = [(owner_key(owner), owner) for owner in owners if owner_key(owner) != owner]
+        if updates:
+            with self.connection:
+                self.connection.executemany("UPDATE refs SET owner = ? WHERE owner = ?", updates)
+
+    def blob_path(self, name):
+        """Blob'un iki seviye klasörlenmiş yolu (tek klasörde yüz binlerce dosya olmaz)"""
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+    def put(self, part, owner, filename=None, chunk_size=ATTACHMENT_CHUNK_SIZE):
+        """
+        Eki depoya yaz (aynı içerik varsa sadece referans ekle)
+
+        Args:
+            part (email.message.Message): Ek parçası
+            owner (str): Eki kullanan mail (.eml veya Maildir dosyasının yolu)
+            filename (str): Ekin asıl adı
+            chunk_size (int): Tek seferde çözülecek kodlanmış karakter sayısı
+
+        Returns:
+            dict: filename, saved_as, sha256 (özet), size, duplicate
+        """
+        filename = filename or part.get_filename()
+        hasher = hashlib.new(self.algorithm)
+        size = 0
+
+        # Önce geçici dosyaya yazılır; özet ancak içerik bitince belli olur
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter_attachment(part, chunk_size):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+
+            digest = hasher.hexdigest()
+            name = digest + blob_extension(filename)
+            path = self.blob_path(name)
+            now = datetime.now().isoformat()
+
+            with self.lock:
+                duplicate = os.path.exists(path)
+                if duplicate:
+                    os.remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+
+                with self.connection:
+                    self.connection.execute(
+                        """INSERT INTO blobs (name, digest, size, refcount, created_at) VALUES (?, ?, ?, 1, ?)
+                           ON CONFLICT (name) DO UPDATE SET refcount = refcount + 1""",
+                        (name, digest, size, now)
+                    )
+                    self.connection.execute(
+                        "INSERT INTO refs (blob, owner, filename, content_type, added_at) VALUES (?, ?, ?, ?, ?)",
+                        (name, owner_key(owner), filename, part.get_content_type(), now)
+                    )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {
+            "filename": filename,
+            "saved_as": path,
+            self.algorithm: digest,
+            "size": size,
+            "duplicate": duplicate
+        }
+
+    def release(self, owner):
+        """
+        Mailin eklerine olan referansları bırak, kullanılmayan blob'ları sil
+
+        Mail silinirken çağrılır; silinmiş maillerin hepsi için prune().
+
+        Args:
+            owner (str): put() çağrısında verilen mail
+
+        Returns:
+            int: Diskten silinen byte sayısı
+        """
+        owner = owner_key(owner)
+        freed = 0
+        with self.lock:
+            with self.connection:
+                names = [row[0] for row in self.connection.execute(
+                    "SELECT blob FROM refs WHERE owner = ?", (owner,))]
+                if not names:
+                    return 0
+                self.connection.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+                self.connection.executemany(
+                    "UPDATE blobs SET refcount = refcount - 1 WHERE name = ?",
+                    [(name,) for name in names]
+                )
+                unused = self.connection.execute(
+                    "SELECT name, size FROM blobs WHERE refcount <= 0").fetchall()
+                self.connection.execute("DELETE FROM blobs WHERE refcount <= 0")
+
+            for name, size in unused:
+                try:
+                    os.remove(self.blob_path(name))
+                    freed += size
+                except FileNotFoundError:
+                    pass
+        return freed
+
+    def prune(self):
+        """
+        Diskte artık bulunmayan maillerin referanslarını bırak
+
+        Returns:
+            tuple: (bırakılan mail sayısı, diskten silinen byte sayısı)
+        """
+        with self.lock:
+            owners = [row[0] for row in self.connection.execute("SELECT DISTINCT owner FROM refs")]
+        missing = [owner for owner in owners if not owner_exists(owner)]
+        return len(missing), sum(self.release(owner) for owner in missing)
+
+    def stats(self):
+        """
+        Returns:
+            dict: blobs (dosya), references (ek), stored_bytes (diskte),
+                  saved_bytes (tekrarlar sayesinde yazılmayan)
+        """
+        with self.lock:
+            blobs, references, stored, saved = self.connection.execute(
+                "SELECT COUNT(*), IFNULL(SUM(refcount), 0), IFNULL(SUM(size), 0), "
+                "IFNULL(SUM(size * (refcount - 1)), 0) FROM blobs"
+            ).fetchone()
+        return {"blobs": blobs, "references": references, "stored_bytes": stored, "saved_bytes": saved}
+
+    def close(self):
+        """Veritabanı bağlantısını kapat"""
+        with self.lock:
+            self.connection.close()
+
+
+def main():
+    """Silinmiş maillerin eklerini depodan temizle"""
+    parser = argparse.ArgumentParser(description="Ek deposunu temizle")
+    parser.add_argument("--config", default="mail_tracking_config.json", help="Config dosyası")
+    parser.add_argument("--path", help="Depo klasörü (verilmezse config'teki attachment_store.path)")
+    args = parser.parse_args()
+
+    path = args.path
+    if not path:
+        try:
+            with open(args.config, "r", encoding="utf-8") as f:
+                path = json.load(f).get("attachment_store", {}).get("path")
+        except (OSError, ValueError):
+            pass
+    path = path or "attachments"
+    if not os.path.exists(os.path.join(path, "index.db")):
+        print(f"✗ Ek deposu bulunamadı: {path}/")
+        return
+
+    store = AttachmentStore(path)
+    try:
+        released, freed = store.prune()
+        stats = store.stats()
+        print(f"🧹 {released} silinmiş mailin referansları bırakıldı, {freed / 1024 / 1024:.1f} MB boşaltıldı")
+        print(f"📎 {stats['blobs']} dosya, {stats['references']} ek, {stats['stored_bytes'] / 1024 / 1024:.1f} MB")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
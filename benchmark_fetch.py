@@ -0,0 +1,108 @@
+"""
+Toplu FETCH benchmark'ı
+Farklı batch boyutlarında saniyede kaç mail çekilebildiğini ölçer
+
+Kullanım:
+    python benchmark_fetch.py                      # Simüle sunucu (ağ gecikmesi ile)
+    python benchmark_fetch.py --rtt 80 --count 500 # 80 ms gecikme, 500 mail
+    python benchmark_fetch.py --config mail_tracking_config.json  # Gerçek hesap
+"""
+import argparse
+import imaplib
+import json
+import time
+from imap_fetch import fetch_messages
+
+
+class SimulatedIMAP:
+    """Her komut için sabit gidiş-dönüş gecikmesi ekleyen sahte IMAP sunucusu"""
+
+    def __init__(self, count, message_size, rtt_ms, bandwidth_mbps):
+        self.rtt = rtt_ms / 1000.0
+        self.bytes_per_second = bandwidth_mbps * 1024 * 1024 / 8
+        self.message = b"Subject: test\r\n\r\n" + b"x" * message_size
+        self.uids = list(range(1, count + 1))
+
+    def uid(self, command, message_set, parts):
+        uids = []
+        for part in message_set.split(","):
+            if ":" in part:
+                start, end = part.split(":")
+                uids.extend(range(int(start), int(end) + 1))
+            else:
+                uids.append(int(part))
+
+        # Bir gidiş-dönüş + aktarım süresi
+        time.sleep(self.rtt + len(uids) * len(self.message) / self.bytes_per_second)
+
+        data = []
+        for uid in uids:
+            data.append((f"{uid} (UID {uid} RFC822 {{{len(self.message)}}}".encode(), self.message))
+            data.append(b")")
+        return "OK", data
+
+
+def connect_real(config_file):
+    """Config dosyasındaki hesaba bağlan ve INBOX'ı salt okunur seç"""
+    with open(config_file, "r", encoding="utf-8") as f:
+        settings = json.load(f)["email_settings"]
+
+    mail = imaplib.IMAP4_SSL(settings["imap_server"])
+    mail.login(settings["email_address"], settings["password"])
+    mail.select("INBOX", readonly=True)
+    return mail
+
+
+def run_benchmark(mail, uids, batch_sizes, parts):
+    """Her batch boyutu için süreyi ölç ve tabloyu yazdır"""
+    print(f"\n{'Batch':>7} | {'Mail':>6} | {'Süre (sn)':>10} | {'Mail/sn':>10} | {'İstek':>6}")
+    print("-" * 52)
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        fetched = sum(1 for _ in fetch_messages(mail, uids, parts, batch_size))
+        elapsed = time.perf_counter() - start
+        requests = -(-len(uids) // batch_size)
+        print(f"{batch_size:>7} | {fetched:>6} | {elapsed:>10.2f} | {fetched / elapsed:>10.1f} | {requests:>6}")
+
+
+def main():
+    """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description="Toplu FETCH benchmark'ı")
+    parser.add_argument("--count", type=int, default=500, help="Çekilecek mail sayısı")
+    parser.add_argument("--batch-sizes", default="1,10,50,100,250,500", help="Denenecek batch boyutları")
+    parser.add_argument("--rtt", type=float, default=50, help="Simüle gidiş-dönüş süresi (ms)")
+    parser.add_argument("--size", type=int, default=20000, help="Simüle mail boyutu (byte)")
+    parser.add_argument("--bandwidth", type=float, default=100, help="Simüle bant genişliği (Mbit/sn)")
+    parser.add_argument("--config", help="Gerçek hesap için config dosyası")
+    args = parser.parse_args()
+
+    batch_sizes = [int(x) for x in args.batch_sizes.split(",")]
+
+    print("=" * 52)
+    print("📊 TOPLU FETCH BENCHMARK")
+    print("=" * 52)
+
+    if args.config:
+        mail = connect_real(args.config)
+        status, data = mail.uid("SEARCH", None, "ALL")
+        uids = data[0].split()[-args.count:]
+        # BODY.PEEK[] mailleri okundu olarak işaretlemez
+        parts = "(BODY.PEEK[])"
+        print(f"📧 Gerçek hesap, son {len(uids)} mail")
+    else:
+        mail = SimulatedIMAP(args.count, args.size, args.rtt, args.bandwidth)
+        uids = mail.uids
+        parts = "(RFC822)"
+        print(f"🧪 Simüle sunucu: {args.count} mail, {args.size} byte, "
+              f"RTT {args.rtt} ms, {args.bandwidth} Mbit/sn")
+
+    try:
+        run_benchmark(mail, uids, batch_sizes, parts)
+    finally:
+        if args.config:
+            mail.logout()
+
+
+if __name__ == "__main__":
+    main()
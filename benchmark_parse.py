@@ -0,0 +1,105 @@
+"""
+MIME parse benchmark'ı
+Ana süreçte parse ile MailParserPool'u farklı süreç sayılarında karşılaştırır
+
+Kullanım:
+    python benchmark_parse.py                         # 0 (ana süreç), 1, 2, 4 süreç
+    python benchmark_parse.py --workers 0,2,8 --count 2000 --attachment-kb 500
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from mail_parser import MailParserPool, parse_mail
+
+
+def build_mail(rng, index, html_kb, attachment_kb):
+    """HTML + düz metin gövdeli, ekli örnek mail üret"""
+    msg = MIMEMultipart("mixed")
+    msg["From"] = f"Gönderen {index} <gonderen{index}@example.com>"
+    msg["To"] = "alici@example.com"
+    msg["Subject"] = f"Fatura ve sipariş özeti #{index}"
+    msg["Message-ID"] = f"<bench{index}@example.com>"
+
+    words = ["sipariş", "kargo", "fatura", "ödeme", "teslimat", "ürün", "müşteri", "tutar"]
+    text = " ".join(rng.choice(words) for _ in range(html_kb * 1024 // 8))
+    body = MIMEMultipart("alternative")
+    body.attach(MIMEText(text, "plain", "utf-8"))
+    body.attach(MIMEText(f"<html><body><p>{text}</p><table>{'<tr><td>x</td></tr>' * 50}</table></body></html>",
+                         "html", "utf-8"))
+    msg.attach(body)
+
+    if attachment_kb:
+        payload = rng.randbytes(attachment_kb * 1024)
+        attachment = MIMEApplication(payload, Name=f"fatura_{index}.pdf")
+        attachment["Content-Disposition"] = f'attachment; filename="fatura_{index}.pdf"'
+        msg.attach(attachment)
+
+    return msg.as_bytes()
+
+
+def measure_inline(raw_emails):
+    """Ana süreçte (havuzsuz) parse süresi"""
+    start = time.perf_counter()
+    for raw in raw_emails:
+        parse_mail(raw)
+    return time.perf_counter() - start
+
+
+def measure_pool(raw_emails, workers, batch_size):
+    """MailParserPool ile FETCH grupları halinde parse süresi (süreç başlatma hariç)"""
+    pool = MailParserPool(workers, min_batch=1)
+    try:
+        # Süreçleri önceden başlat
+        pool.parse_batch(raw_emails[:workers * 2])
+
+        start = time.perf_counter()
+        for offset in range(0, len(raw_emails), batch_size):
+            pool.parse_batch(raw_emails[offset:offset + batch_size])
+        return time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def main():
+    """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description="MIME parse benchmark'ı")
+    parser.add_argument("--workers", default="0,1,2,4", help="Denenecek süreç sayıları (0: ana süreç)")
+    parser.add_argument("--count", type=int, default=500, help="Mail sayısı")
+    parser.add_argument("--html-kb", type=int, default=60, help="Mail gövdesi boyutu (KB)")
+    parser.add_argument("--attachment-kb", type=int, default=200, help="Ek boyutu (KB, 0: eksiz)")
+    parser.add_argument("--batch-size", type=int, default=100, help="FETCH grubu boyutu")
+    parser.add_argument("--seed", type=int, default=42, help="Rastgele sayı tohumu")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    template = [build_mail(rng, index, args.html_kb, args.attachment_kb) for index in range(20)]
+    raw_emails = [template[index % len(template)] for index in range(args.count)]
+    total_mb = sum(len(raw) for raw in raw_emails) / 1024 / 1024
+
+    print("=" * 60)
+    print("📊 MIME PARSE BENCHMARK")
+    print("=" * 60)
+    print(f"🧪 {args.count} mail, toplam {total_mb:.1f} MB "
+          f"(gövde ~{args.html_kb} KB, ek {args.attachment_kb} KB), {multiprocessing.cpu_count()} çekirdek")
+
+    print(f"\n{'Süreç':>6} | {'Süre (sn)':>10} | {'Mail/sn':>10} | {'MB/sn':>8} | {'Hızlanma':>9}")
+    print("-" * 55)
+
+    baseline = None
+    for workers in [int(x) for x in args.workers.split(",")]:
+        if workers == 0:
+            elapsed = measure_inline(raw_emails)
+        else:
+            elapsed = measure_pool(raw_emails, workers, args.batch_size)
+        baseline = baseline or elapsed
+        label = "ana" if workers == 0 else str(workers)
+        print(f"{label:>6} | {elapsed:>10.2f} | {args.count / elapsed:>10.1f} | "
+              f"{total_mb / elapsed:>8.1f} | {baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import imaplib
+import re
+from email.parser import BytesHeaderParser
+
+
+# Tek FETCH komutunda istenecek varsayılan mail sayısı
+DEFAULT_FETCH_BATCH_SIZE = 100
+
+# Eşleştirme için yeterli başlıklar - PEEK mailleri okundu olarak işaretlemez
+HEADER_PREFILTER_PARTS = "(BODY.PEEK[HEADER.FIELDS (FROM IN-REPLY-TO REFERENCES MESSAGE-ID SUBJECT)])"
+
+_UID_RE = re.compile(rb"UID (\d+)")
+
+
+def build_message_sets(ids, batch_size=DEFAULT_FETCH_BATCH_SIZE):
+    """
+    ID listesini IMAP mesaj kümelerine böl
+
+    Ardışık ID'ler aralık olarak yazılır (örn: [1201, ..., 1700] -> "1201:1700"),
+    diğerleri virgülle ayrılır. Her küme en fazla batch_size mail içerir.
+
+    Args:
+        ids (list): Mail ID'leri veya UID'leri (bytes, str veya int)
+        batch_size (int): Küme başına en fazla mail sayısı
+
+    Returns:
+        list: [(küme_metni, [id, ...]), ...]
+    """
+    batch_size = max(1, int(batch_size))
+    numbers = sorted(int(i) for i in ids)
+    message_sets = []
+
+    for start in range(0, len(numbers), batch_size):
+        chunk = numbers[start:start + batch_size]
+        ranges = []
+        range_start = prev = chunk[0]
+        for number in chunk[1:]:
+            if number == prev + 1:
+                prev = number
+                continue
+            ranges.append(f"{range_start}:{prev}" if prev != range_start else str(range_start))
+            range_start = prev = number
+        ranges.append(f"{range_start}:{prev}" if prev != range_start else str(range_start))
+        message_sets.append((",".join(ranges), chunk))
+
+    return message_sets
+
+
+def parse_fetch_response(msg_data, use_uid=True):
+    """
+    FETCH yanıtından (id, veri) çiftlerini çıkar
+
+    Args:
+        msg_data (list): imaplib fetch/uid('FETCH') yanıt verisi
+        use_uid (bool): True ise UID, False ise sıra numarası döndürülür
+
+    Returns:
+        list: [(id_bytes, veri_bytes), ...]
+    """
+    results = []
+    for index, response_part in enumerate(msg_data):
+        if not isinstance(response_part, tuple):
+            continue
+        header = response_part[0]
+        if use_uid:
+            match = _UID_RE.search(header)
+            # Bazı sunucular UID'yi literal'den sonra gönderir: [(b'1 (BODY[] {12}', ...), b' UID 5)']
+            if not match and index + 1 < len(msg_data) and isinstance(msg_data[index + 1], bytes):
+                match = _UID_RE.search(msg_data[index + 1])
+            if not match:
+                continue
+            message_id = match.group(1)
+        else:
+            message_id = header.split()[0]
+        results.append((message_id, response_part[1]))
+    return results
+
+
+def fetch_messages(mail, ids, parts="(RFC822)", batch_size=DEFAULT_FETCH_BATCH_SIZE, use_uid=True):
+    """
+    Mailleri tek tek yerine toplu FETCH komutlarıyla çek
+
+    500 yeni mail için 500 ayrı istek yerine batch_size'lık kümelerle
+    birkaç istek gönderilir. Sonuçlar her küme içinde istenen sırayla döner.
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        ids (list): Çekilecek mail UID'leri (use_uid=False ise sıra numaraları)
+        parts (str): FETCH ile istenecek alanlar
+        batch_size (int): Tek komutta istenecek en fazla mail sayısı
+        use_uid (bool): UID FETCH mi, normal FETCH mi kullanılsın
+
+    Yields:
+        tuple: (id_bytes, veri_bytes)
+
+    Raises:
+        imaplib.IMAP4.error: Bir küme çekilemezse (önceki kümeler verilmiş olur)
+    """
+    for message_set, chunk in build_message_sets(ids, batch_size):
+        if use_uid:
+            status, msg_data = mail.uid('FETCH', message_set, parts)
+        else:
+            status, msg_data = mail.fetch(message_set, parts)
+
+        if status != "OK":
+            # Atlanırsa çağıran taraf son UID'yi bu maillerin ötesine ilerletir
+            raise imaplib.IMAP4.error(f"FETCH başarısız ({message_set[:40]}): {status}")
+
+        fetched = dict(parse_fetch_response(msg_data, use_uid))
+        for number in chunk:
+            key = str(number).encode()
+            if key in fetched:
+                yield key, fetched[key]
+
+
+def fetch_with_header_prefilter(mail, uids, header_filter, batch_size=DEFAULT_FETCH_BATCH_SIZE,
+                                full_parts="(RFC822)"):
+    """
+    İki aşamalı FETCH: önce sadece başlıklar, sonra sadece eşleşenlerin tamamı
+
+    Her küme için önce HEADER_PREFILTER_PARTS çekilir ve header_filter ile
+    bellekte eşleştirilir. Ekleriyle birlikte tüm mail sadece eşleşenler için
+    indirilir; eşleşmeyen mailler için birkaç yüz byte yeterli olur.
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        uids (list): Taranacak mail UID'leri
+        header_filter (callable): header_filter(headers) - eşleşme yoksa boş/None döner
+        batch_size (int): Tek komutta istenecek en fazla mail sayısı
+        full_parts (str): Eşleşen mailler için FETCH ile istenecek alanlar
+
+    Yields:
+        tuple: (uid_bytes, tam_mail_bytes veya None, header_filter sonucu)
+               Eşleşmeyen maillerde tam mail None döner; çağıran taraf yine de
+               UID'yi işlenmiş sayabilir.
+
+    Raises:
+        imaplib.IMAP4.error: Bir küme çekilemezse (önceki kümeler verilmiş olur)
+    """
+    for message_set, chunk in build_message_sets(uids, batch_size):
+        status, header_data = mail.uid('FETCH', message_set, HEADER_PREFILTER_PARTS)
+
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"Başlık FETCH başarısız ({message_set[:40]}): {status}")
+
+        parser = BytesHeaderParser()
+        headers_by_uid = {}
+        matches = {}
+        for uid, raw_headers in parse_fetch_response(header_data):
+            headers = parser.parsebytes(raw_headers)
+            headers_by_uid[uid] = headers
+            result = header_filter(headers)
+            if result:
+                matches[uid] = result
+
+        full_messages = {}
+        if matches:
+            full_messages = dict(fetch_messages(mail, list(matches), full_parts, batch_size))
+
+        for number in chunk:
+            key = str(number).encode()
+            if key in headers_by_uid:
+                yield key, full_messages.get(key), matches.get(key)
@@ -0,0 +1,129 @@
+import select
+import time
+
+
+# Sunucular IDLE oturumunu ~29 dakika sonra keser (RFC 2177), öncesinde yenile
+IDLE_MAX_SECONDS = 25 * 60
+
+
+def supports_idle(mail):
+    """Sunucu IDLE komutunu destekliyor mu?"""
+    try:
+        return "IDLE" in mail.capabilities
+    except Exception:
+        return False
+
+
+def _read_line(mail, buffer, wait):
+    """
+    Soketten bir satır oku (IDLE için imaplib'in tamponlu okuyucusu kullanılmaz)
+
+    imaplib'in dosya tamponunda bekleyen veri select() ile görülemediğinden
+    IDLE sırasında tüm okuma doğrudan soket üzerinden yapılır.
+
+    Args:
+        mail (imaplib.IMAP4): IMAP bağlantısı
+        buffer (bytearray): Okunmuş ama henüz işlenmemiş veri
+        wait (float): Veri için en fazla bekleme süresi (saniye)
+
+    Returns:
+        bytes: Okunan satır, süre dolduysa None
+    """
+    sock = mail.sock
+    while b"\r\n" not in buffer:
+        # SSL soketlerde çözülmüş ama okunmamış veri select()'te görünmez
+        if not getattr(sock, "pending", lambda: 0)():
+            readable, _, _ = select.select([sock], [], [], wait)
+            if not readable:
+                return None
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise mail.abort("IDLE sırasında bağlantı kapandı")
+        buffer.extend(chunk)
+
+    index = buffer.index(b"\r\n") + 2
+    line = bytes(buffer[:index])
+    del buffer[:index]
+    return line
+
+
+def idle_wait(mail, timeout=IDLE_MAX_SECONDS, stop_check=None):
+    """
+    IMAP IDLE ile yeni mail bildirimi bekle (RFC 2177)
+
+    Seçili klasörde EXISTS/RECENT bildirimi gelene, süre dolana ya da
+    stop_check True döndürene kadar bekler. Her durumda IDLE oturumu DONE ile
+    kapatılır, böylece bağlantı normal komutlar için tekrar kullanılabilir.
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        timeout (int): En fazla bekleme süresi (saniye)
+        stop_check (callable): True döndürürse bekleme erken biter
+
+    Returns:
+        bool: Yeni mail bildirimi geldiyse True
+    """
+    buffer = bytearray()
+    tag = mail._new_tag()
+    mail.send(tag + b" IDLE\r\n")
+
+    line = _read_line(mail, buffer, 30)
+    if line is None or not line.startswith(b"+"):
+        reason = line.strip().decode(errors='ignore') if line else "yanıt yok"
+        raise mail.abort(f"IDLE başlatılamadı: {reason}")
+
+    has_new_mail = False
+    deadline = time.monotonic() + timeout
+
+    try:
+        while time.monotonic() < deadline:
+            if stop_check and stop_check():
+                break
+
+            # 1 saniyelik dilimlerle bekle ki stop_check düzenli kontrol edilsin
+            line = _read_line(mail, buffer, 1)
+            if line is None:
+                continue
+
+            # Örnek: b"* 1234 EXISTS"
+            if line.startswith(b"*") and (b"EXISTS" in line or b"RECENT" in line):
+                has_new_mail = True
+                break
+    finally:
+        # IDLE'ı sonlandır ve etiketli yanıtı bekle
+        mail.send(b"DONE\r\n")
+        while True:
+            line = _read_line(mail, buffer, 30)
+            if line is None:
+                raise mail.abort("IDLE sonlandırılamadı")
+            if line.startswith(tag):
+                break
+            if b"EXISTS" in line or b"RECENT" in line:
+                has_new_mail = True
+
+    return has_new_mail
+
+
+def wait_for_new_mail(mail, check_interval, use_idle=True, stop_check=None):
+    """
+    Bir sonraki kontrole kadar bekle
+
+    Sunucu IDLE destekliyorsa yeni mail bildirimi gelene kadar (en fazla
+    IDLE_MAX_SECONDS) bekler; desteklemiyorsa check_interval kadar uyur.
+    Çağıran taraf her dönüşte yeni mailleri kontrol etmelidir - IDLE süresi
+    dolduğunda da döndüğü için döngü IDLE'ı otomatik olarak yeniler.
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        check_interval (int): IDLE yoksa kullanılacak bekleme süresi (saniye)
+        use_idle (bool): IDLE kullanılsın mı?
+        stop_check (callable): True döndürürse bekleme erken biter
+    """
+    if use_idle and mail is not None and supports_idle(mail):
+        try:
+            idle_wait(mail, IDLE_MAX_SECONDS, stop_check)
+            return
+        except Exception as e:
+            print(f"⚠️  IDLE hatası ({e}), {check_interval} saniye bekleniyor...")
+
+    time.sleep(check_interval)
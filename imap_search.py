@@ -0,0 +1,104 @@
+import imaplib
+
+
+# Sunucuların çoğu ~8000 byte'tan uzun komutları reddeder, payı bırak
+MAX_SEARCH_COMMAND_LENGTH = 6000
+MAX_SEARCH_TERMS = 50
+
+# Bundan fazla SEARCH komutu gerekiyorsa başlık ön filtresi daha ucuzdur
+MAX_SEARCH_COMMANDS = 20
+
+
+def supports_gmail_search(mail):
+    """Sunucu Gmail X-GM-RAW aramasını destekliyor mu?"""
+    try:
+        return "X-GM-EXT-1" in mail.capabilities
+    except Exception:
+        return False
+
+
+def quote_imap_string(value):
+    """Değeri IMAP quoted string olarak yaz (örn: <id@x> -> "<id@x>")"""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def build_or_query(terms):
+    """
+    Arama terimlerini IMAP OR ile birleştir
+
+    IMAP'te OR iki terim alır: [a, b, c] -> "OR OR a b c"
+    """
+    if len(terms) == 1:
+        return terms[0]
+    return "OR " * (len(terms) - 1) + " ".join(terms)
+
+
+def chunk_search_terms(terms, max_terms=MAX_SEARCH_TERMS, max_length=MAX_SEARCH_COMMAND_LENGTH):
+    """
+    Terimleri komut uzunluğu sınırını aşmayacak gruplara böl
+
+    Returns:
+        list: [[terim, ...], ...]
+    """
+    chunks = []
+    current = []
+    current_length = 0
+
+    for term in terms:
+        term_length = len(term) + len("OR ") + 1
+        if current and (len(current) >= max_terms or current_length + term_length > max_length):
+            chunks.append(current)
+            current = []
+            current_length = 0
+        current.append(term)
+        current_length += term_length
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def search_matching_uids(mail, first_uid, last_uid, terms, max_commands=MAX_SEARCH_COMMANDS):
+    """
+    Verilen UID aralığında terimlerden herhangi birine uyan mailleri sunucuda ara
+
+    Filtreleme sunucuda yapılır; yanıt sadece eşleşen UID'leri içerir, bu yüzden
+    maliyet araya giren ilgisiz mail sayısından bağımsızdır.
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        first_uid (int): Aralığın başı (dahil)
+        last_uid (int): Aralığın sonu (dahil)
+        terms (list): OR ile birleştirilecek IMAP arama terimleri (None ise
+            sunucu tarafı arama kullanılamaz)
+        max_commands (int): En fazla kaç SEARCH komutu gönderilebilir
+
+    Returns:
+        list: Eşleşen UID'ler (bytes, artan sırada). Sunucu aramayı reddederse
+              veya çok fazla komut gerekiyorsa None - çağıran taraf başlık ön
+              filtresine dönmelidir.
+    """
+    if terms is None:
+        return None
+    if not terms or last_uid < first_uid:
+        return []
+
+    chunks = chunk_search_terms(terms)
+    if len(chunks) > max_commands:
+        return None
+
+    found = set()
+    try:
+        for chunk in chunks:
+            query = f"UID {first_uid}:{last_uid} {build_or_query(chunk)}"
+            status, data = mail.uid('SEARCH', None, query)
+            if status != "OK":
+                return None
+            found.update(int(uid) for uid in data[0].split())
+    except (imaplib.IMAP4.error, UnicodeError) as e:
+        print(f"⚠️  Sunucu tarafı arama desteklenmiyor ({e}), başlık filtresine dönülüyor")
+        return None
+
+    return [str(uid).encode() for uid in sorted(found) if first_uid <= uid <= last_uid]
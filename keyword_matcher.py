@@ -0,0 +1,134 @@
+from collections import deque
+
+
+# Bu sayıya kadar anahtar kelimede C seviyesindeki str.find döngüsü daha hızlı
+AUTOMATON_THRESHOLD = 50
+
+
+def turkish_fold(text):
+    """
+    Metni Türkçe harfleri dikkate alarak küçük harfe çevir (uzunluk korunur)
+
+    İ/I/ı harfleri tek harfe indirgenir: "YAPI KREDİ", "Yapı Kredi" ve
+    "yapi kredi" aynı şekilde eşleşir. str.lower() "İ" harfini iki karaktere
+    çevirdiğinden önce o değiştirilir; böylece konumlar orijinal metinle örtüşür.
+    """
+    return text.replace("İ", "i").lower().replace("ı", "i")
+
+
+class KeywordMatcher:
+    """
+    Çok sayıda anahtar kelimeyi metin üzerinde tek geçişte arar (Aho-Corasick)
+
+    Otomat anahtar kelimeler ayarlandığında bir kez kurulur. Her mail için
+    tarama maliyeti metin uzunluğu + eşleşme sayısı kadardır, anahtar kelime
+    sayısından bağımsızdır. Az sayıda kelimede basit str.find döngüsü kullanılır.
+    """
+
+    def __init__(self, keywords=None):
+        """
+        Args:
+            keywords (list): Aranacak anahtar kelimeler
+        """
+        self.keywords = []
+        self.use_automaton = False
+        self.goto = [{}]      # durum -> {karakter: sonraki durum}
+        self.fail = [0]       # durum -> hata bağlantısı
+        self.output = [[]]    # durum -> [(anahtar kelime, uzunluk)]
+        self.set_keywords(keywords or [])
+
+    def set_keywords(self, keywords):
+        """Anahtar kelimeleri ayarla ve otomatı yeniden kur"""
+        # Tekrarları at, orijinal sırayı koru
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+        self.folded = [(kw, turkish_fold(kw)) for kw in self.keywords]
+        self.use_automaton = len(self.keywords) > AUTOMATON_THRESHOLD
+        if self.use_automaton:
+            self.build_automaton()
+
+    def build_automaton(self):
+        """Trie'yi ve hata bağlantılarını kur"""
+        goto = [{}]
+        output = [[]]
+
+        for keyword, folded in self.folded:
+            state = 0
+            for char in folded:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append((keyword, len(folded)))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if fail[next_state] == next_state:
+                    fail[next_state] = 0
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+
+    def iter_matches(self, text):
+        """
+        Metindeki tüm eşleşmeleri üret
+
+        Yields:
+            tuple: (anahtar kelime, başlangıç konumu)
+        """
+        if not self.keywords or not text:
+            return
+
+        folded_text = turkish_fold(text)
+
+        if not self.use_automaton:
+            for keyword, folded in self.folded:
+                position = folded_text.find(folded)
+                while position != -1:
+                    yield keyword, position
+                    position = folded_text.find(folded, position + 1)
+            return
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+
+        for index, char in enumerate(folded_text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for keyword, length in output[state]:
+                    yield keyword, index - length + 1
+
+    def find_matches(self, text):
+        """
+        Hangi anahtar kelimelerin nerede geçtiğini bul
+
+        Returns:
+            dict: {anahtar kelime: [konum, ...]}
+        """
+        matches = {}
+        for keyword, position in self.iter_matches(text):
+            matches.setdefault(keyword, []).append(position)
+        return matches
+
+    def contains_any(self, text):
+        """Metinde herhangi bir anahtar kelime geçiyor mu? (ilk eşleşmede durur)"""
+        for _ in self.iter_matches(text):
+            return True
+        return False
@@ -0,0 +1,279 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from email.utils import parseaddr, parsedate_to_datetime
+
+
+# Bu kadar kayıt birikince tur bitmeden de yazılır
+DEFAULT_ARCHIVE_BATCH_SIZE = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mails (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    rule TEXT,
+    account TEXT,
+    uid TEXT,
+    message_id TEXT,
+    sender TEXT,
+    sender_raw TEXT,
+    subject TEXT,
+    date TEXT,
+    date_raw TEXT,
+    body TEXT,
+    attachments TEXT,
+    eml_path TEXT,
+    json_path TEXT,
+    saved_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS mails_unique ON mails (source, account, uid, IFNULL(message_id, ''));
+CREATE INDEX IF NOT EXISTS mails_sender ON mails (sender);
+CREATE INDEX IF NOT EXISTS mails_date ON mails (date);
+CREATE INDEX IF NOT EXISTS mails_message_id ON mails (message_id);
+CREATE INDEX IF NOT EXISTS mails_source ON mails (source, rule);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS mails_fts USING fts5(
+    subject, body, sender_raw, content='mails', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS mails_fts_insert AFTER INSERT ON mails BEGIN
+    INSERT INTO mails_fts (rowid, subject, body, sender_raw) VALUES (new.id, new.subject, new.body, new.sender_raw);
+END;
+CREATE TRIGGER IF NOT EXISTS mails_fts_delete AFTER DELETE ON mails BEGIN
+    INSERT INTO mails_fts (mails_fts, rowid, subject, body, sender_raw)
+    VALUES ('delete', old.id, old.subject, old.body, old.sender_raw);
+END;
+"""
+
+# Gönderici sütunu olmayan eski FTS tablosu yeniden kurulur
+_FTS_DROP = """
+DROP TRIGGER IF EXISTS mails_fts_insert;
+DROP TRIGGER IF EXISTS mails_fts_delete;
+DROP TABLE IF EXISTS mails_fts;
+"""
+
+_COLUMNS = ("source", "rule", "account", "uid", "message_id", "sender", "sender_raw", "subject",
+            "date", "date_raw", "body", "attachments", "eml_path", "json_path", "saved_at")
+
+
+def normalize_date(value):
+    """
+    Date başlığını UTC ISO biçimine çevir (sıralama ve aralık sorguları için)
+
+    Returns:
+        str: "2025-11-01T17:30:00+00:00", çözülemezse None
+    """
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+class MailArchive:
+    """
+    Yakalanan mailleri tek bir SQLite dosyasında saklar ve indeksler
+
+    Her mail için ayrı JSON dosyası yerine meta veri, eşleşen kural ve gövde
+    tek tabloda tutulur; gönderici, tarih, Message-ID ve takip sistemi
+    üzerinde indeks, konu/gövde üzerinde FTS5 tam metin indeksi vardır.
+    Kayıtlar bellekte biriktirilir ve her kontrol turunun sonunda tek
+    transaction ile yazılır (flush). WAL modu sayesinde yazarken okuma
+    (arama) engellenmez.
+    """
+
+    def __init__(self, path="mail_archive.db", batch_size=DEFAULT_ARCHIVE_BATCH_SIZE):
+        """
+        Args:
+            path (str): SQLite dosyası
+            batch_size (int): Bu kadar kayıt birikince tur bitmeden yazılır (0: sadece flush() ile)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()        # pending listesi
+        self.write_lock = threading.Lock()  # bağlantı
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+        try:
+            self.connection.executescript(_FTS_SCHEMA)
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(mails_fts)")]
+            if "sender_raw" not in columns:
+                print("🔧 Arşiv: tam metin indeksi gönderici alanıyla yeniden kuruluyor...")
+                self.connection.executescript(_FTS_DROP + _FTS_SCHEMA)
+                with self.connection:
+                    self.connection.execute("INSERT INTO mails_fts (mails_fts) VALUES ('rebuild')")
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            # SQLite FTS5 olmadan derlenmişse arşiv yine çalışır, sadece tam metin arama olmaz
+            print(f"⚠️  Arşiv: FTS5 kullanılamıyor ({e}), tam metin arama kapalı")
+            self.full_text = False
+
+    def add(self, source, mail_data, rule=None, account=None, message_id=None,
+            eml_path=None, json_path=None, attachments=None):
+        """
+        Maili yazılmak üzere sıraya ekle
+
+        Args:
+            source (str): Takip sistemi ("keyword", "sender", "reply")
+            mail_data (dict): id, subject, from, date, body
+            rule (str): Eşleşen kural (anahtar kelimeler, gönderici, yanıtlanan Message-ID)
+            account (str): Mailin geldiği hesap
+            message_id (str): Mailin Message-ID'si
+            eml_path (str): Kaydedilen .eml dosyası
+            json_path (str): Kaydedilen JSON dosyası (varsa)
+            attachments (list): Ek bilgileri
+        """
+        uid = mail_data.get("id")
+        if isinstance(uid, bytes):
+            uid = uid.decode()
+        sender_raw = str(mail_data.get("from") or "")
+        date_raw = mail_data.get("date")
+
+        record = (
+            source,
+            rule,
+            account,
+            str(uid) if uid is not None else None,
+            str(message_id).strip() if message_id else None,
+            parseaddr(sender_raw)[1].lower() or None,
+            sender_raw,
+            mail_data.get("subject"),
+            normalize_date(date_raw),
+            str(date_raw) if date_raw else None,
+            mail_data.get("body"),
+            json.dumps(attachments, ensure_ascii=False) if attachments else None,
+            eml_path,
+            json_path,
+            datetime.now().isoformat()
+        )
+
+        with self.lock:
+            self.pending.append(record)
+            full = bool(self.batch_size) and len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self, statements=()):
+        """
+        Biriken kayıtları tek transaction ile yaz
+
+        Args:
+            statements (list): Aynı transaction'da çalıştırılacak [(sql, parametre listesi)]
+
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        with self.lock:
+            records, self.pending = self.pending, []
+        if not records and not statements:
+            return 0
+
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        try:
+            with self.write_lock, self.connection:
+                self.connection.executemany(
+                    f"INSERT OR IGNORE INTO mails ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                    records
+                )
+                for sql, rows in statements:
+                    self.connection.executemany(sql, rows)
+        except sqlite3.Error as e:
+            print(f"✗ Arşiv yazma hatası: {e}")
+            # Kayıtlar kaybolmasın, sonraki turda tekrar denenir
+            with self.lock:
+                self.pending = records + self.pending
+            return 0
+        return len(records)
+
+    def _query(self, sql, params):
+        with self.write_lock:
+            cursor = self.connection.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _filters(self, sender=None, message_id=None, source=None, since=None, until=None, prefix=""):
+        """İndeksli alanlar için WHERE koşulları ve parametreleri"""
+        conditions = []
+        params = []
+        for column, value in (("sender", sender and sender.lower()), ("message_id", message_id),
+                              ("source", source)):
+            if value:
+                conditions.append(f"{prefix}{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append(f"{prefix}date >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{prefix}date < ?")
+            params.append(until)
+        return conditions, params
+
+    def search(self, query, limit=20, rank=True, **filters):
+        """
+        Konu, gövde ve göndericide tam metin arama (FTS5 sorgu sözdizimi)
+
+        Args:
+            query (str): Örn: 'fatura', 'sipariş AND kargo', '"son ödeme"', 'sender_raw:yapikredi'
+            limit (int): En fazla sonuç
+            rank (bool): True: en alakalıdan başla (bm25), False: en yeniden başla
+                (çok yaygın terimlerde tüm eşleşmeler puanlanmadığı için çok daha hızlı)
+            **filters: sender, message_id, source, since, until (find() ile aynı)
+
+        Returns:
+            list: Kayıtlar (snippet alanıyla)
+        """
+        if not self.full_text:
+            return []
+        conditions, params = self._filters(prefix="m.", **filters)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        order = "rank" if rank else "mails_fts.rowid DESC"
+        return self._query(
+            f"""SELECT m.id, m.source, m.rule, m.account, m.sender, m.subject, m.date, m.eml_path,
+                       m.json_path, snippet(mails_fts, 1, '[', ']', '…', 12) AS snippet
+                FROM mails_fts JOIN mails m ON m.id = mails_fts.rowid
+                WHERE mails_fts MATCH ?{where} ORDER BY {order} LIMIT ?""",
+            [query] + params + [limit]
+        )
+
+    def find(self, sender=None, message_id=None, source=None, since=None, until=None, limit=50):
+        """
+        İndeksli alanlara göre kayıtları bul (en yeniden eskiye)
+
+        Args:
+            sender (str): Gönderici email adresi
+            message_id (str): Message-ID
+            source (str): Takip sistemi
+            since (str): Bu tarihten sonra (ISO, örn: "2025-11-01")
+            until (str): Bu tarihten önce (ISO)
+            limit (int): En fazla sonuç
+
+        Returns:
+            list: Kayıtlar (gövde hariç)
+        """
+        conditions, params = self._filters(sender, message_id, source, since, until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query(
+            f"""SELECT id, source, rule, account, uid, message_id, sender, subject, date, eml_path, json_path
+                FROM mails {where} ORDER BY date DESC LIMIT ?""",
+            params + [limit]
+        )
+
+    def count(self):
+        """Arşivdeki kayıt sayısı (yazılmayı bekleyenler hariç)"""
+        return self._query("SELECT COUNT(*) AS n FROM mails", ())[0]["n"]
+
+    def close(self):
+        """Bekleyen kayıtları yaz ve bağlantıyı kapat"""
+        self.flush()
+        with self.write_lock:
+            self.connection.close()
@@ -0,0 +1,302 @@
+import imaplib
+from datetime import datetime
+from uid_state import UidState, UidCheckpoint, get_uidvalidity, get_max_uid, search_new_uids
+from imap_idle import supports_idle, wait_for_new_mail
+from imap_fetch import fetch_messages, fetch_with_header_prefilter, DEFAULT_FETCH_BATCH_SIZE
+from imap_search import search_matching_uids
+from mail_parser import LazyMail
+
+
+class MailFetcher:
+    """
+    Tek IMAP oturumu ile yeni mailleri bir kez çeker ve tüm takip
+    sistemlerine (anahtar kelime, gönderici, yanıt) dağıtır
+    """
+
+    def __init__(self, imap_server, email_address, password, check_interval=30,
+                 use_idle=True, folder="INBOX", state_file=".uid_state.json",
+                 fetch_batch_size=DEFAULT_FETCH_BATCH_SIZE, server_search=True,
+                 parser_pool=None):
+        """
+        Args:
+            imap_server (str): IMAP sunucu adresi
+            email_address (str): Email adresi
+            password (str): Email şifresi veya uygulama şifresi
+            check_interval (int): IDLE yoksa kontrol aralığı (saniye)
+            use_idle (bool): Sunucu destekliyorsa IMAP IDLE kullan
+            folder (str): İzlenecek klasör
+            state_file (str): Son görülen UID'nin saklanacağı dosya
+            fetch_batch_size (int): Tek FETCH komutunda çekilecek en fazla mail sayısı
+            server_search (bool): Eşleştirmeyi IMAP SEARCH ile sunucuda yapmayı dene
+            parser_pool (MailParserPool): Verilirse mailler ayrı süreçlerde parse edilir
+        """
+        self.imap_server = imap_server
+        self.email_address = email_address
+        self.password = password
+        self.check_interval = check_interval
+        self.use_idle = use_idle
+        self.folder = folder
+        self.fetch_batch_size = fetch_batch_size
+        self.server_search = server_search
+        self.parser_pool = parser_pool
+        self.mail = None
+        self.uid_state = UidState(state_file)
+        self.handlers = []  # [{"name", "handler", "header_filter", "search_terms"}]
+        self.poll_hooks = []
+        self.last_poll_failed = False
+
+    def add_handler(self, name, handler, header_filter=None, search_terms=None):
+        """
+        Her yeni mail için çağrılacak işleyiciyi ekle
+
+        Args:
+            name (str): İşleyici adı (log için)
+            handler (callable): handler(uid, msg) şeklinde çağrılır
+            header_filter (callable): Verilirse sadece başlıklarla eşleşme kontrolü
+                yapar; tüm işleyicilerin filtresi varsa sadece eşleşen maillerin
+                tamamı indirilir
+            search_terms (callable): search_terms(mail) - sunucu tarafı IMAP arama
+                terimlerini döndürür; tüm işleyicilerde varsa filtreleme sunucuda yapılır
+        """
+        self.handlers.append({
+            "name": name,
+            "handler": handler,
+            "header_filter": header_filter,
+            "search_terms": search_terms
+        })
+
+    def add_poll_hook(self, hook):
+        """
+        Her kontrol turunun sonunda (hata olsa da) çağrılacak fonksiyonu ekle
+
+        Args:
+            hook (callable): hook() - örn. turda biriken arşiv kayıtlarını yazmak için
+        """
+        self.poll_hooks.append(hook)
+
+    def run_poll_hooks(self):
+        for hook in self.poll_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"✗ Tur sonu işlemi hatası: {e}")
+
+    def can_prefilter(self):
+        """Tüm işleyiciler başlık filtresi sağlıyorsa iki aşamalı FETCH kullanılabilir"""
+        return bool(self.handlers) and all(h["header_filter"] for h in self.handlers)
+
+    def can_search_on_server(self):
+        """Tüm işleyiciler arama terimi sağlıyorsa filtreleme sunucuda yapılabilir"""
+        return self.server_search and bool(self.handlers) and all(h["search_terms"] for h in self.handlers)
+
+    def match_headers(self, headers):
+        """Başlıklarla eşleşen işleyici isimlerini döndür"""
+        return [h["name"] for h in self.handlers if h["header_filter"](headers)]
+
+    def search_on_server(self, last_uid, max_uid):
+        """
+        Her işleyicinin terimlerini sunucuda ara
+
+        Returns:
+            dict: {uid: [işleyici isimleri]} veya sunucu tarafı arama
+                  kullanılamıyorsa None
+        """
+        matched = {}
+        for h in self.handlers:
+            uids = search_matching_uids(self.mail, last_uid + 1, max_uid, h["search_terms"](self.mail))
+            if uids is None:
+                return None
+            for uid in uids:
+                matched.setdefault(uid, []).append(h["name"])
+        return matched
+
+    def connect(self):
+        """Mail sunucusuna bağlan"""
+        try:
+            self.mail = imaplib.IMAP4_SSL(self.imap_server)
+            self.mail.login(self.email_address, self.password)
+            print(f"✓ {self.email_address} adresine başarıyla bağlanıldı (ortak oturum)")
+            return True
+        except Exception as e:
+            print(f"✗ Bağlantı hatası: {e}")
+            return False
+
+    def disconnect(self):
+        """Mail sunucusundan ayrıl"""
+        if self.mail:
+            try:
+                self.mail.close()
+                self.mail.logout()
+                print("✓ Bağlantı kapatıldı")
+            except:
+                pass
+
+    def has_saved_state(self):
+        """Bu hesap/klasör için kaydedilmiş UID durumu var mı?"""
+        self.mail.select(self.folder)
+        uidvalidity = get_uidvalidity(self.mail)
+        return self.uid_state.get_last_uid(self.email_address, self.folder, uidvalidity) > 0
+
+    def skip_existing(self):
+        """Mevcut mailleri işlenmiş say (kayıtlı durum varsa kaldığı yerden devam et)"""
+        self.mail.select(self.folder)
+        uidvalidity = get_uidvalidity(self.mail)
+        last_uid = self.uid_state.get_last_uid(self.email_address, self.folder, uidvalidity)
+
+        if last_uid:
+            print(f"ℹ️  UID {last_uid} sonrasından devam ediliyor.")
+            return
+
+        max_uid = get_max_uid(self.mail)
+        self.uid_state.set_last_uid(self.email_address, self.folder, uidvalidity, max_uid)
+        print(f"ℹ️  UID {max_uid} ve öncesi mevcut mailler atlandı. Sadece yeni gelenler işlenecek.")
+
+    def dispatch(self, uid, msg, only=None):
+        """
+        Maili işleyicilere gönder - bir işleyicinin hatası diğerlerini etkilemez
+
+        Args:
+            uid (bytes): Mailin UID'si
+            msg (LazyMail): Mail (başlıklar ve gövde gerektiğinde parse edilir)
+            only (list): Verilirse sadece bu isimdeki işleyiciler çağrılır
+        """
+        for h in self.handlers:
+            name = h["name"]
+            if only is not None and name not in only:
+                continue
+            try:
+                h["handler"](uid, msg)
+            except KeyboardInterrupt:
+                raise
+            except SystemExit:
+                # pywhatkit tab_close=True ile SystemExit fırlatabiliyor
+                print(f"   ⚠️ {name}: SystemExit yakalandı, devam ediliyor...")
+            except Exception as e:
+                print(f"✗ {name} işleyici hatası: {e}")
+
+    def parse_messages(self, items):
+        """
+        (uid, ham mail, ...) akışındaki mailleri parse et
+
+        Havuz yoksa mail LazyMail olarak sarılır ve işleyiciler ne kadarına
+        bakarsa o kadar parse edilir; havuz varsa her FETCH grubu worker
+        süreçlerde paralel parse edilir.
+
+        Yields:
+            tuple: (uid, mail nesnesi veya None, ...)
+        """
+        if self.parser_pool:
+            yield from self.parser_pool.parse_stream(items, self.fetch_batch_size)
+            return
+
+        for uid, raw_email, *rest in items:
+            yield (uid, LazyMail(raw_email) if raw_email else None, *rest)
+
+    def poll(self, max_messages=None):
+        """
+        Yeni mailleri bir kez çek ve dağıt
+
+        Args:
+            max_messages (int): Verilirse bu turda en fazla bu kadar mail işlenir,
+                kalanlar sonraki tura kalır (çok hesaplı havuzda adil paylaşım için)
+
+        Returns:
+            int: İşlenen mail sayısı
+        """
+        self.last_poll_failed = False
+        try:
+            self.mail.select(self.folder)
+            uidvalidity = get_uidvalidity(self.mail)
+            # İşlenen UID'ler her batch sonunda diske yazılır
+            checkpoint = UidCheckpoint(self.uid_state, self.email_address, self.folder,
+                                       uidvalidity, self.fetch_batch_size)
+            last_uid = checkpoint.last_uid
+
+            # Tüm işleyiciler destekliyorsa filtrelemeyi sunucuda yap
+            if self.can_search_on_server():
+                max_uid = get_max_uid(self.mail)
+                matched = self.search_on_server(last_uid, max_uid)
+
+                if matched is not None:
+                    # İşleyici sırasıyla değil geliş sırasıyla: tur sınırı en eski mailleri alır
+                    uids = sorted(checkpoint.filter_new(matched), key=int)
+                    # Tur sınırı aşıldıysa son UID ilerlemez, kalanlar sonraki turda işlenir
+                    truncated = max_messages is not None and len(uids) > max_messages
+                    if truncated:
+                        uids = uids[:max_messages]
+                    if uids:
+                        print(f"🔔 {len(uids)} eşleşen yeni mail bulundu!")
+
+                    count = 0
+                    try:
+                        for uid, msg in self.parse_messages(
+                                fetch_messages(self.mail, uids, "(RFC822)", self.fetch_batch_size)):
+                            self.dispatch(uid, msg, only=matched[uid])
+                            # Aradaki eşleşmeyen UID'ler görülmedi, son UID ilerlemez
+                            checkpoint.mark(uid, advance=False)
+                            count += 1
+                    except BaseException:
+                        checkpoint.commit()
+                        raise
+
+                    checkpoint.commit(None if truncated else max_uid)
+                    return count
+
+            new_uids = checkpoint.filter_new(search_new_uids(self.mail, last_uid) or [])
+            if max_messages is not None:
+                new_uids = new_uids[:max_messages]
+
+            if not new_uids:
+                return 0
+
+            print(f"🔔 {len(new_uids)} yeni mail bulundu!")
+
+            count = 0
+            try:
+                if self.can_prefilter():
+                    # Önce sadece başlıklar; mailin tamamı sadece eşleşenler için indirilir
+                    for uid, msg, matched in self.parse_messages(fetch_with_header_prefilter(
+                            self.mail, new_uids, self.match_headers, self.fetch_batch_size)):
+                        if msg is not None:
+                            self.dispatch(uid, msg, only=matched)
+                        count += 1
+                        checkpoint.mark(uid)
+                else:
+                    # Mail bir kez parse edilir, tüm takip sistemleri aynı nesneyi kullanır
+                    for uid, msg in self.parse_messages(
+                            fetch_messages(self.mail, new_uids, "(RFC822)", self.fetch_batch_size)):
+                        self.dispatch(uid, msg)
+                        count += 1
+                        checkpoint.mark(uid)
+            finally:
+                checkpoint.commit()
+
+            return count
+
+        except Exception as e:
+            print(f"✗ Mail kontrol hatası: {e}")
+            self.last_poll_failed = True
+            return 0
+        finally:
+            self.run_poll_hooks()
+
+    def run(self, stop_check=None):
+        """
+        Yeni mailleri sürekli çek ve dağıt
+
+        Args:
+            stop_check (callable): True döndürürse döngü biter
+        """
+        if self.use_idle and supports_idle(self.mail):
+            print(f"⚡ IMAP IDLE aktif: yeni mailler anında yakalanacak")
+        else:
+            print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
+
+        while not (stop_check and stop_check()):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"\n[{timestamp}] Mail kontrol ediliyor...")
+
+            if not self.poll():
+                print("📭 Yeni mail yok")
+
+            wait_for_new_mail(self.mail, self.check_interval, self.use_idle, stop_check)
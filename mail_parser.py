@@ -0,0 +1,383 @@
+import binascii
+import multiprocessing
+import quopri
+import re
+from concurrent.futures import ProcessPoolExecutor
+from email.generator import BytesGenerator
+from email.parser import BytesFeedParser, BytesHeaderParser
+
+
+# Bundan küçük gruplar süreçlere gönderilmez; IPC maliyeti parse süresini aşar
+MIN_POOL_BATCH = 8
+
+# Parser'a tek seferde verilen ham mail parçası
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Ekler diske bu boyutta (kodlanmış karakter) parçalar halinde çözülür
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+
+_HEADER_END_RE = re.compile(rb"\r?\n\r?\n")
+_NON_BASE64_RE = re.compile(r"[^A-Za-z0-9+/]")
+
+
+def parse_bytes(raw_email, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Ham maili BytesFeedParser'a parça parça vererek parse et
+
+    email.message_from_bytes önce tüm maili tek bir str'ye çevirir; büyük
+    maillerde bu, mail boyutu kadar ek bir kopya demektir. Sonuç aynıdır.
+
+    Returns:
+        email.message.Message: Parse edilmiş mail
+    """
+    parser = BytesFeedParser()
+    view = memoryview(raw_email)
+    for offset in range(0, len(view), chunk_size):
+        parser.feed(bytes(view[offset:offset + chunk_size]))
+    return parser.close()
+
+
+def parse_headers(raw_email):
+    """
+    Sadece başlık bloğunu parse et (gövde kopyalanmaz)
+
+    Returns:
+        email.message.Message: Sadece başlıkları olan mail
+    """
+    match = _HEADER_END_RE.search(raw_email)
+    end = match.end() if match else len(raw_email)
+    return BytesHeaderParser().parsebytes(raw_email[:end])
+
+
+def get_email_body(msg):
+    """
+    Email içeriğini al (son text/plain parçası, ekler hariç)
+
+    Takip sistemlerindeki get_email_body ile aynı kuralları uygular.
+    """
+    body = ""
+
+    if msg.is_multipart():
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            content_disposition = str(part.get("Content-Disposition"))
+
+            if content_type == "text/plain" and "attachment" not in content_disposition:
+                try:
+                    body = part.get_payload(decode=True).decode()
+                except:
+                    pass
+    else:
+        try:
+            body = msg.get_payload(decode=True).decode()
+        except:
+            pass
+
+    return body
+
+
+def parse_mail(raw_email):
+    """
+    Ham maili parse edip eşleştiricilerin ihtiyaç duyduğu özeti çıkar
+
+    Worker süreçte çalışır; sonuç küçük ve pickle edilebilirdir (mail nesnesi
+    ve ek içerikleri ana sürece taşınmaz).
+
+    Args:
+        raw_email (bytes): RFC822 mail
+
+    Returns:
+        dict: headers ([(ad, değer)]), body, multipart,
+              attachments ([{"filename", "content_type", "size"}])
+    """
+    msg = parse_bytes(raw_email)
+
+    attachments = []
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_disposition() == "attachment":
+                filename = part.get_filename()
+                if filename:
+                    payload = part.get_payload(decode=True) or b""
+                    attachments.append({
+                        "filename": filename,
+                        "content_type": part.get_content_type(),
+                        "size": len(payload)
+                    })
+
+    return {
+        "headers": msg.items(),
+        "body": get_email_body(msg),
+        "multipart": msg.is_multipart(),
+        "attachments": attachments
+    }
+
+
+class LazyMail:
+    """
+    Sadece gerektiği kadar parse edilen mail
+
+    Başlıklar ilk get()/[] çağrısında sadece başlık bloğundan okunur; MIME
+    ağacı gövde veya walk(), get_payload() gibi Message metodları istenince
+    kurulur. Başlığa bakıp maili eleyen takip sistemleri (gönderici, yanıt)
+    için gövde ve ekler hiç parse edilmez. Ham mail .eml kaydı için saklanır.
+    """
+
+    def __init__(self, raw_email):
+        """
+        Args:
+            raw_email (bytes): RFC822 mail
+        """
+        self.raw_email = raw_email
+        self._headers = None
+        self._message = None
+        self._body = None
+
+    @property
+    def message(self):
+        """Tam email.message.Message nesnesi (gerektiğinde oluşturulur)"""
+        if self._message is None:
+            self._message = parse_bytes(self.raw_email)
+        return self._message
+
+    @property
+    def body(self):
+        """Düz metin gövde (get_email_body kuralları)"""
+        if self._body is None:
+            self._body = get_email_body(self.message)
+        return self._body
+
+    def get(self, name, failobj=None):
+        if self._message is not None:
+            return self._message.get(name, failobj)
+        if self._headers is None:
+            self._headers = parse_headers(self.raw_email)
+        return self._headers.get(name, failobj)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __getattr__(self, name):
+        # Message'ın diğer metodları (walk, is_multipart, get_payload...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.message, name)
+
+
+class ParsedMail(LazyMail):
+    """
+    Worker süreçte parse edilmiş mail
+
+    Başlıklar, gövde ve ek bilgileri hazırdır. walk(), get_payload() gibi
+    diğer metodlar ilk kullanımda ham maili ana süreçte parse eder - bu
+    sadece eşleşen (kaydedilecek) mailler için olur.
+    """
+
+    def __init__(self, raw_email, parsed):
+        """
+        Args:
+            raw_email (bytes): RFC822 mail
+            parsed (dict): parse_mail() sonucu
+        """
+        super().__init__(raw_email)
+        self.header_items = parsed["headers"]
+        self._body = parsed["body"]
+        self.multipart = parsed["multipart"]
+        self.attachments = parsed["attachments"]
+
+    def get(self, name, failobj=None):
+        name = name.lower()
+        for key, value in self.header_items:
+            if key.lower() == name:
+                return value
+        return failobj
+
+    def is_multipart(self):
+        return self.multipart
+
+
+def get_attachment_names(msg):
+    """Mailin ek dosya adları (ParsedMail'de maili yeniden parse etmeden)"""
+    if isinstance(msg, ParsedMail):
+        return [attachment["filename"] for attachment in msg.attachments]
+
+    names = []
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_disposition() == "attachment":
+                filename = part.get_filename()
+                if filename:
+                    names.append(filename)
+    return names
+
+
+def save_raw_email(msg, path):
+    """
+    Maili .eml olarak kaydet
+
+    Sunucudan gelen ham byte'lar varsa aynen yazılır; yoksa mail parça parça
+    dosyaya serileştirilir (as_bytes() gibi bellekte ikinci kopya oluşmaz).
+    """
+    raw_email = getattr(msg, "raw_email", None)
+    with open(path, "wb") as f:
+        if raw_email is not None:
+            f.write(raw_email)
+        else:
+            BytesGenerator(f, mangle_from_=False, policy=msg.policy).flatten(msg, unixfrom=False)
+
+
+def _encode_payload(text):
+    # Message.get_payload(decode=True) ile aynı kural
+    try:
+        return text.encode("ascii", "surrogateescape")
+    except UnicodeEncodeError:
+        return text.encode("raw-unicode-escape")
+
+
+def iter_decoded_payload(payload, encoding, chunk_size=ATTACHMENT_CHUNK_SIZE):
+    """
+    base64 / quoted-printable kodlu içeriği parça parça çöz
+
+    Yields:
+        bytes: Çözülmüş parça
+    """
+    if encoding == "base64":
+        pending = ""
+        for offset in range(0, len(payload), chunk_size):
+            text = pending + _NON_BASE64_RE.sub("", payload[offset:offset + chunk_size])
+            usable = len(text) - len(text) % 4
+            pending = text[usable:]
+            if usable:
+                yield binascii.a2b_base64(text[:usable])
+        if len(pending) > 1:
+            yield binascii.a2b_base64(pending + "=" * (-len(pending) % 4))
+        return
+
+    # quoted-printable: satır sonlarında bölünür, yumuşak satır sonları bozulmaz
+    start = 0
+    while start < len(payload):
+        end = payload.find("\n", start + chunk_size)
+        end = len(payload) if end < 0 else end + 1
+        yield quopri.decodestring(_encode_payload(payload[start:end]))
+        start = end
+
+
+def iter_attachment(part, chunk_size=ATTACHMENT_CHUNK_SIZE):
+    """
+    Ekin çözülmüş içeriğini tamamını bellekte çözmeden parça parça üret
+
+    Args:
+        part (email.message.Message): Ek parçası
+        chunk_size (int): Tek seferde çözülecek kodlanmış karakter sayısı
+
+    Yields:
+        bytes: Çözülmüş parça
+    """
+    encoding = str(part.get("Content-Transfer-Encoding", "")).strip().lower()
+    # get_payload() içeriği kontrol için bir kez UTF-8'e kodlar (ek boyutunda geçici kopya)
+    payload = part._payload
+
+    streamable = isinstance(payload, str) and encoding in ("base64", "quoted-printable")
+    if streamable and encoding == "base64":
+        # Ortada dolgu (=) olan base64 birden çok bloğun birleşimidir; parça parça çözülemez
+        padding = payload.find("=")
+        streamable = padding < 0 or not payload[padding:].strip("= \t\r\n")
+
+    if streamable:
+        # Alfabe dışı karakterler atıldığı için a2b_base64 bozuk girdide de hata vermez
+        yield from iter_decoded_payload(payload, encoding, chunk_size)
+    else:
+        # Kodlamasız veya parça parça çözülemeyen içerik: email paketinin toleranslı çözücüsü
+        yield part.get_payload(decode=True) or b""
+
+
+def save_attachment(part, path, chunk_size=ATTACHMENT_CHUNK_SIZE):
+    """
+    Eki tamamını bellekte çözmeden diske yaz
+
+    Args:
+        part (email.message.Message): Ek parçası
+        path (str): Hedef dosya
+        chunk_size (int): Tek seferde çözülecek kodlanmış karakter sayısı
+
+    Returns:
+        int: Yazılan byte sayısı
+    """
+    written = 0
+    with open(path, "wb") as f:
+        for chunk in iter_attachment(part, chunk_size):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+class MailParserPool:
+    """
+    Mailleri ayrı süreçlerde paralel parse eder
+
+    Binlerce büyük HTML/ekli mailin biriktiği durumlarda MIME parse, gövde
+    çıkarma ve ek çözme GIL yüzünden tek çekirdekte kalır. Havuz bunları
+    workers kadar süreçe dağıtır; ana sürece sadece özet döner.
+    """
+
+    def __init__(self, workers=None, min_batch=MIN_POOL_BATCH):
+        """
+        Args:
+            workers (int): Süreç sayısı (None ise çekirdek sayısı)
+            min_batch (int): Bundan küçük gruplar ana süreçte parse edilir
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.min_batch = min_batch
+        # fork, thread'li bir süreçte kilitleri kopyalayabilir; spawn güvenli
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def parse_batch(self, raw_emails):
+        """
+        Args:
+            raw_emails (list): Ham mailler (bytes)
+
+        Returns:
+            list: Aynı sırada ParsedMail nesneleri
+        """
+        if len(raw_emails) < self.min_batch:
+            results = [parse_mail(raw) for raw in raw_emails]
+        else:
+            chunksize = max(1, len(raw_emails) // (self.workers * 4))
+            results = self.executor.map(parse_mail, raw_emails, chunksize=chunksize)
+        return [ParsedMail(raw, parsed) for raw, parsed in zip(raw_emails, results)]
+
+    def parse_items(self, items):
+        """
+        (uid, ham mail, ...) demetlerini (uid, ParsedMail, ...) olarak döndür
+
+        Ham mail None ise (başlık ön filtresine takılan mail) None kalır.
+        """
+        raw_emails = [item[1] for item in items if item[1]]
+        parsed = iter(self.parse_batch(raw_emails))
+        return [(item[0], next(parsed) if item[1] else None) + tuple(item[2:]) for item in items]
+
+    def parse_stream(self, items, batch_size):
+        """
+        (uid, ham mail, ...) akışını batch_size'lık gruplar halinde parse et
+
+        Yields:
+            tuple: (uid, ParsedMail veya None, ...)
+        """
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from self.parse_items(batch)
+                batch = []
+        if batch:
+            yield from self.parse_items(batch)
+
+    def close(self):
+        """Worker süreçlerini kapat"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,303 @@
+import glob
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+# Segment bu boyuta ulaşınca yenisine geçilir
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Bu kadar kayıt birikince tur bitmeden de yazılır
+DEFAULT_SEGMENT_BATCH = 100
+
+SEGMENT_EXTENSIONS = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+INDEX_EXTENSION = ".idx"
+
+_PREFIX_RE = re.compile(r"[^\w.@-]+")
+_SEGMENT_NAME_RE = re.compile(r"-(\d{8})-(\d+)\.jsonl")
+
+
+def load_zstd():
+    """zstandard paketi (kurulu değilse None)"""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def detect_compression(path):
+    """Segment dosyasının sıkıştırması (uzantıdan)"""
+    if path.endswith(SEGMENT_EXTENSIONS["gzip"]):
+        return "gzip"
+    if path.endswith(SEGMENT_EXTENSIONS["zstd"]):
+        return "zstd"
+    return None
+
+
+def split_lines(block):
+    """
+    Bloğu kayıt satırlarına böl
+
+    Sadece b"\n" ile bölünür; str.splitlines() JSON'da kaçışsız kalan
+    U+2028, U+0085 gibi karakterlerde de böler ve kaydı parçalar.
+    """
+    return block.split(b"\n")
+
+
+def decompress_block(data, compression):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return load_zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+class SegmentWriter:
+    """
+    Kaydedilen mailleri gün gün dönen, sadece sonuna eklenen JSONL segmentlerine yazar
+
+    Her mail için ayrı girintili JSON dosyası yerine kayıtlar tek satırlık
+    JSON olarak biriktirilir ve her kontrol turunun sonunda (flush) tek
+    write ile segmentin sonuna eklenir. Sıkıştırma açıksa her tur bağımsız
+    bir gzip üyesi / zstd çerçevesi olur; dosya baştan sona tek seferde de
+    okunabilir. Her segmentin yanındaki .idx dosyası kayıt anahtarını
+    (blok konumu, blok uzunluğu, bloktaki satır) ile eşler, böylece tek bir
+    kayda dosyanın tamamını açmadan ulaşılır.
+
+    Dosya adı: <klasör>/<önek>-<YYYYMMDD>-<sıra>.jsonl[.gz|.zst]
+    """
+
+    def __init__(self, folder, prefix="mails", compression="gzip",
+                 max_segment_bytes=DEFAULT_SEGMENT_BYTES, batch_size=DEFAULT_SEGMENT_BATCH):
+        """
+        Args:
+            folder (str): Segment klasörü
+            prefix (str): Dosya adı öneki (örn. hesap adı; aynı klasörü paylaşan yazıcılar çakışmaz)
+            compression (str): None, "gzip" veya "zstd" (zstandard paketi gerekir)
+            max_segment_bytes (int): Segment bu boyuta ulaşınca yenisine geçilir
+            batch_size (int): Bu kadar kayıt birikince tur bitmeden yazılır
+        """
+        if compression == "zstd" and load_zstd() is None:
+            print("⚠️  Segment: zstandard kurulu değil (pip install zstandard), gzip kullanılıyor")
+            compression = "gzip"
+        if compression not in SEGMENT_EXTENSIONS:
+            raise ValueError(f"Bilinmeyen segment sıkıştırması: {compression}")
+
+        self.folder = folder
+        self.prefix = _PREFIX_RE.sub("_", prefix or "").strip("._") or "mails"
+        self.compression = compression
+        self.max_segment_bytes = max_segment_bytes
+        self.batch_size = batch_size
+        self.compressor = load_zstd().ZstdCompressor() if compression == "zstd" else None
+
+        self.pending = []  # [(anahtar, JSON satırı)]
+        self.lock = threading.Lock()
+        self.day = None
+        self.sequence = 0
+        self.path = None
+        Path(folder).mkdir(parents=True, exist_ok=True)
+
+    def segment_path(self, day, sequence):
+        return os.path.join(self.folder, f"{self.prefix}-{day}-{sequence:04d}{SEGMENT_EXTENSIONS[self.compression]}")
+
+    def last_sequence(self, day):
+        """Klasörde o güne ait son segmentin sırası (yeniden başlatmada ona devam edilir)"""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}-{day}-(\d+){re.escape(SEGMENT_EXTENSIONS[self.compression])}$")
+        sequences = [0]
+        for name in os.listdir(self.folder):
+            match = pattern.match(name)
+            if match:
+                sequences.append(int(match.group(1)))
+        return max(sequences)
+
+    def current_segment(self):
+        """Bugünün yazılabilir segmenti (gün değişince veya segment dolunca yenisi)"""
+        day = datetime.now().strftime("%Y%m%d")
+        if day != self.day:
+            self.day = day
+            self.sequence = self.last_sequence(day)
+
+        path = self.segment_path(day, self.sequence)
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_segment_bytes:
+            self.sequence += 1
+            path = self.segment_path(day, self.sequence)
+        self.path = path
+        return path
+
+    def append(self, record, key):
+        """
+        Kaydı yazılmak üzere sıraya ekle
+
+        Args:
+            record (dict): JSON'a çevrilebilir kayıt
+            key (str): İndeksteki anahtar (örn: "20251101_173000_email_123")
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self.lock:
+            self.pending.append((key, line))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Biriken kayıtları segmentin sonuna tek blok olarak yaz
+
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        with self.lock:
+            records, self.pending = self.pending, []
+            if not records:
+                return 0
+
+            path = self.current_segment()
+            lines = [(line + "\n").encode("utf-8") for _, line in records]
+            index = []
+            try:
+                with open(path, "ab") as f:
+                    offset = f.tell()
+                    if self.compression:
+                        # Turun tüm kayıtları tek sıkıştırılmış blok
+                        block = b"".join(lines)
+                        if self.compression == "gzip":
+                            block = gzip.compress(block, mtime=0)
+                        else:
+                            block = self.compressor.compress(block)
+                        f.write(block)
+                        index = [[key, offset, len(block), number] for number, (key, _) in enumerate(records)]
+                    else:
+                        f.write(b"".join(lines))
+                        for (key, _), line in zip(records, lines):
+                            index.append([key, offset, len(line), 0])
+                            offset += len(line)
+
+                with open(path + INDEX_EXTENSION, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in index))
+            except OSError as e:
+                print(f"✗ Segment yazma hatası: {e}")
+                # Kayıtlar kaybolmasın, sonraki turda tekrar denenir
+                self.pending = records + self.pending
+                return 0
+        return len(records)
+
+    def close(self):
+        """Bekleyen kayıtları yaz"""
+        self.flush()
+
+
+def list_segments(folder, prefix=None):
+    """Klasördeki segmentler (eskiden yeniye)"""
+    pattern = f"{prefix}-*" if prefix else "*"
+    paths = [path for path in glob.glob(os.path.join(folder, pattern + ".jsonl*"))
+             if not path.endswith(INDEX_EXTENSION)]
+
+    def order(path):
+        match = _SEGMENT_NAME_RE.search(os.path.basename(path))
+        return (match.group(1), int(match.group(2)), path) if match else ("", 0, path)
+
+    return sorted(paths, key=order)
+
+
+def load_index(segment_path):
+    """
+    Returns:
+        dict: {anahtar: (blok konumu, blok uzunluğu, satır)}
+    """
+    index = {}
+    index_path = segment_path + INDEX_EXTENSION
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    key, offset, length, number = json.loads(line)
+                    index[key] = (offset, length, number)
+    return index
+
+
+def read_record(segment_path, entry):
+    """
+    İndeks girdisiyle tek kaydı oku (sadece ilgili blok okunur ve açılır)
+
+    Args:
+        segment_path (str): Segment dosyası
+        entry (tuple): load_index() girdisi
+
+    Returns:
+        dict: Kayıt
+    """
+    offset, length, number = entry
+    with open(segment_path, "rb") as f:
+        f.seek(offset)
+        block = decompress_block(f.read(length), detect_compression(segment_path))
+    return json.loads(split_lines(block)[number])
+
+
+def iter_indexed_records(segment_path, start=0):
+    """
+    Segmentte start konumundan sonra başlayan blokların kayıtlarını oku
+
+    Sadece indekse girmiş (tamamı yazılmış) bloklar okunur; artımlı
+    indeksleme her seferinde kaldığı konumdan devam eder.
+
+    Yields:
+        tuple: (anahtar, kayıt, bloğun bittiği konum)
+    """
+    blocks = {}
+    for key, (offset, length, number) in load_index(segment_path).items():
+        if offset >= start:
+            blocks.setdefault((offset, length), []).append((number, key))
+
+    compression = detect_compression(segment_path)
+    with open(segment_path, "rb") as f:
+        for (offset, length), entries in sorted(blocks.items()):
+            f.seek(offset)
+            lines = split_lines(decompress_block(f.read(length), compression))
+            for number, key in sorted(entries):
+                yield key, json.loads(lines[number]), offset + length
+
+
+def find_record(folder, key):
+    """Anahtarı klasördeki segment indekslerinde ara (yeniden eskiye)"""
+    for path in reversed(list_segments(folder)):
+        entry = load_index(path).get(key)
+        if entry:
+            return read_record(path, entry)
+    return None
+
+
+def iter_records(folder, prefix=None):
+    """
+    Klasördeki tüm kayıtları yazılma sırasıyla oku (dışa aktarma / tekrar oynatma)
+
+    Her segment baştan sona tek seferde okunur; indeks kullanılmaz.
+
+    Yields:
+        dict: Kayıt
+    """
+    for path in list_segments(folder, prefix):
+        compression = detect_compression(path)
+        with open(path, "rb") as raw:
+            if compression == "gzip":
+                stream = gzip.GzipFile(fileobj=raw)
+            elif compression == "zstd":
+                stream = load_zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            else:
+                stream = raw
+            buffer = b""
+            while True:
+                chunk = stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line:
+                        yield json.loads(line)
+            if buffer.strip():
+                yield json.loads(buffer)
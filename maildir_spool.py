@@ -0,0 +1,146 @@
+import glob
+import hashlib
+import io
+import itertools
+import os
+import re
+import socket
+import threading
+import time
+from email.generator import BytesGenerator
+
+
+# Dosya adındaki içerik özeti uzunluğu (hex)
+DIGEST_LENGTH = 24
+
+_DIGEST_RE = re.compile(rf"\.H([0-9a-f]{{{DIGEST_LENGTH}}})_")
+
+
+def raw_bytes(msg):
+    """
+    Mailin ham RFC822 byte'ları
+
+    LazyMail/ParsedMail sunucudan gelen byte'ları taşır; sadece düz Message
+    nesnelerinde mail yeniden serileştirilir.
+    """
+    raw_email = getattr(msg, "raw_email", None)
+    if raw_email is not None:
+        return raw_email
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, mangle_from_=False, policy=msg.policy).flatten(msg, unixfrom=False)
+    return buffer.getvalue()
+
+
+class MaildirSpool:
+    """
+    Ham mailleri tüm takip sistemlerinin paylaştığı bir Maildir'e bir kez yazar
+
+    Mail önce tmp/ altına yazılır, diske işlenir ve new/ altına tek adımda
+    taşınır; okuyucular yarım dosya görmez. Dosya adı Maildir kuralına uyar
+    ve içeriğin SHA-256 özetini taşır: aynı mail birden fazla kurala (veya
+    takip sistemine) takılsa da, tekrar gelse de ikinci kez yazılmaz, mevcut
+    dosyanın yolu döner. Maildir herhangi bir mail istemcisiyle açılabilir
+    (mutt -f maildir/).
+    """
+
+    def __init__(self, root="maildir", fsync=True):
+        """
+        Args:
+            root (str): Maildir klasörü (tmp/, new/, cur/ oluşturulur)
+            fsync (bool): Taşımadan önce dosyayı diske işle
+        """
+        self.root = root
+        self.fsync = fsync
+        self.hostname = socket.gethostname().replace("/", "\\057").replace(":", "\\072")
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+        for folder in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+        # Daha önce yazılmış mailler (özet → yol); istemci new/'den cur/'a taşıyabilir
+        self.paths = {}
+        self.scan()
+
+    def scan(self):
+        """Özet → yol eşlemesini new/ ve cur/ klasörlerinden yeniden kur"""
+        paths = {}
+        for folder in ("new", "cur"):
+            for name in os.listdir(os.path.join(self.root, folder)):
+                match = _DIGEST_RE.search(name)
+                if match:
+                    paths[match.group(1)] = os.path.join(self.root, folder, name)
+        self.paths = paths
+
+    def find(self, digest):
+        """
+        Özeti taşıyan mevcut dosya (kilit altında çağrılır)
+
+        Önbellekteki yol artık yoksa (istemci maili cur/'a taşıyıp :2,S
+        eklemiş olabilir) klasörler yeniden taranır. Önbellekte olmayan özet
+        için sadece o özeti taşıyan dosya aranır (başka bir süreç yazmış
+        olabilir); her yeni mailde tüm klasör taranmaz.
+
+        Returns:
+            str: Dosya yolu, yoksa None
+        """
+        path = self.paths.get(digest)
+        if path:
+            if os.path.exists(path):
+                return path
+            self.scan()
+            return self.paths.get(digest)
+
+        for folder in ("new", "cur"):
+            matches = glob.glob(os.path.join(glob.escape(self.root), folder, f"*.H{digest}_*"))
+            if matches:
+                self.paths[digest] = matches[0]
+                return matches[0]
+        return None
+
+    def unique_name(self, digest):
+        """<zaman>.H<özet>_P<pid>Q<sayaç>.<makine> (Maildir benzersiz ad kuralı)"""
+        return f"{int(time.time())}.H{digest}_P{os.getpid()}Q{next(self.counter)}.{self.hostname}"
+
+    def store(self, msg):
+        """
+        Maili spool'a yaz (zaten varsa yazmadan yolunu döndür)
+
+        Args:
+            msg: LazyMail, ParsedMail veya email.message.Message
+
+        Returns:
+            str: new/ (veya istemci taşıdıysa cur/) altındaki dosya yolu
+        """
+        data = raw_bytes(msg)
+        digest = hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+
+        with self.lock:
+            path = self.find(digest)
+        if path:
+            return path
+
+        # Yazma ve fsync kilit dışında; aynı mail aynı anda iki kez yazılırsa biri silinir
+        name = self.unique_name(digest)
+        tmp_path = os.path.join(self.root, "tmp", name)
+        path = os.path.join(self.root, "new", name)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            with self.lock:
+                existing = self.paths.get(digest)
+                if existing and os.path.exists(existing):
+                    # Aynı anda başka bir thread yazdı
+                    os.remove(tmp_path)
+                    return existing
+                os.rename(tmp_path, path)
+                self.paths[digest] = path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
@@ -1,56 +1,167 @@
-import pywhatkit as pwk
-import requests
 import time
 import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from notification_queue import NotificationQueue
+from rate_limiter import shared_limiter
+from outbox import NotificationOutbox
+from notifier_backends import build_backend, platform_settings, find_image, DEFAULT_RETRY_AFTER
+
+
+# Giden kutusunda zamanı gelen bildirimlerin kontrol aralığı (saniye)
+OUTBOX_POLL_SECONDS = 1
+
+# Özet mesajında listelenecek en fazla konu ve gönderici
+DIGEST_MAX_SUBJECTS = 10
+DIGEST_MAX_SENDERS = 5
 
 
 class MailNotificationManager:
-    """Telegram veya WhatsApp üzerinden mail bildirimleri gönderir"""
+    """
+    Telegram veya WhatsApp üzerinden mail bildirimleri gönderir
+    
+    Mesajı biçimlendirme, hız limiti, özet, kuyruk ve giden kutusu burada;
+    mesajın kanala iletilmesi backend'dedir (notifier_backends.py).
+    """
     
     def __init__(self, platform="telegram", phone_number=None, telegram_token=None, 
-                 telegram_chat_id=None, throttle_seconds=300, enabled=True):
+                 telegram_chat_id=None, throttle_seconds=300, enabled=True,
+                 async_send=True, queue_size=100, workers=1, digest=True, rate_limit=None,
+                 outbox_file=None, whatsapp_api=None, backend=None, channel=None):
         """
         Args:
             platform (str): Bildirim platformu ("telegram" veya "whatsapp")
             phone_number (str): WhatsApp telefon numarası (örn: "+905378284599")
             telegram_token (str): Telegram bot token
             telegram_chat_id (str): Telegram chat ID
-            throttle_seconds (int): Bildirimler arası minimum bekleme süresi (saniye)
+            throttle_seconds (int): Aynı kaynaktan (takip sisteminden) bildirimler
+                arası minimum bekleme süresi (saniye)
             enabled (bool): Bildirim sistemi aktif mi?
+            async_send (bool): Bildirimleri arka planda gönder (mail akışı beklemez)
+            queue_size (int): Gönderim bekleyen en fazla bildirim sayısı
+            workers (int): Gönderim yapan arka plan thread sayısı
+            digest (bool): Throttle süresinde gelen bildirimleri atmak yerine
+                biriktir ve süre dolunca tek özet mesajı olarak gönder
+            rate_limit (dict): Hız limiti ayarları - "source_burst" (kaynak başına
+                art arda gönderilebilecek bildirim), "destination_rate" (hedef
+                sohbete saniyede en fazla mesaj), "destination_burst"
+            outbox_file (str): Verilirse bildirimler gönderilmeden önce bu dosyaya
+                yazılır; başarısız olanlar üstel beklemeyle (program yeniden
+                başlasa bile) tekrar denenir
+            whatsapp_api (dict): WhatsApp Cloud API ayarları - "token",
+                "phone_number_id", "api_url". Verilmezse WhatsApp mesajları
+                pywhatkit ile tarayıcı açılarak gönderilir
+            backend (NotifierBackend): Hazır backend (verilirse platform
+                ayarları yerine bu kullanılır)
+            channel (dict): Kanal ayarları, örn: {"type": "webhook", "url": ...}
+                (verilirse platform parametreleri yerine bu kullanılır)
         """
+        if channel:
+            platform = channel.get("type", platform)
         self.platform = platform.lower()
         self.phone_number = phone_number
         self.telegram_token = telegram_token
         self.telegram_chat_id = telegram_chat_id
         self.throttle_seconds = throttle_seconds
         self.enabled = enabled
-        self.last_notification_time = None
+        
+        # Mesajı kanala ileten backend (Telegram, WhatsApp Cloud API veya pywhatkit)
+        self.backend = backend or build_backend(
+            channel or platform_settings(self.platform, phone_number, telegram_token,
+                                         telegram_chat_id, whatsapp_api),
+            pool_size=max(1, workers),
+            on_rate_limited=self.handle_rate_limited
+        )
+        if self.backend is None:
+            print(f"⚠️  Bildirim kanalı oluşturulamadı: {platform} (tür bilinmiyor veya ayarlar eksik)")
+            self.enabled = False
+        elif backend:
+            backend.on_rate_limited = self.handle_rate_limited
+        
+        # Hız limiti: (platform, hedef) ve (platform, hedef, kaynak) için ayrı token bucket'lar.
+        # Gürültülü bir kaynak diğerlerinin bildirimlerini engellemez.
+        rate_limit = rate_limit or {}
+        default_rate, default_burst = self.backend.rate_limit if self.backend else (1.0, 1)
+        self.limiter = shared_limiter
+        self.source_rate = 1.0 / throttle_seconds if throttle_seconds else None
+        self.source_burst = rate_limit.get("source_burst", 1)
+        self.destination_rate = rate_limit.get("destination_rate", default_rate)
+        self.destination_burst = rate_limit.get("destination_burst", default_burst)
+        
+        # Throttle süresinde biriken bildirimler (özet modu), kaynak bazında
+        self.digest = digest
+        self.digest_lock = threading.Lock()
+        self.digest_items = {}   # {kaynak: [{"mail_data", "source", "attachment_paths"}]}
+        self.digest_timers = {}  # {kaynak: threading.Timer}
+        
+        # Arka plan gönderim kuyruğu
+        self.queue = None
+        if self.enabled and async_send:
+            # pywhatkit tek tarayıcıyı klavye/fare ile kullanır, paralel gönderim olmaz
+            if not self.backend.parallel:
+                workers = 1
+            self.queue = NotificationQueue(
+                self.deliver_notification,
+                maxsize=queue_size,
+                workers=workers,
+                name=f"{self.backend.name} bildirim"
+            )
+        
+        # Kalıcı giden kutusu ve tekrar deneyici
+        self.outbox = None
+        self.retry_stop = threading.Event()
+        self.retry_thread = None
+        if self.enabled and outbox_file:
+            self.outbox = NotificationOutbox(outbox_file)
+            pending = self.outbox.count()
+            if pending:
+                print(f"📮 Giden kutusunda {pending} gönderilmemiş bildirim var, tekrar denenecek")
+            self.retry_thread = threading.Thread(
+                target=self.retry_loop,
+                daemon=True,
+                name=f"{self.backend.name} tekrar deneyici"
+            )
+            self.retry_thread.start()
         
         if self.enabled:
-            if self.platform == "telegram":
-                print(f"✅ Telegram bildirimleri aktif: Chat ID {telegram_chat_id}")
-                print(f"⏱️  Throttle süresi: {throttle_seconds} saniye ({throttle_seconds//60} dakika)")
-            elif self.platform == "whatsapp":
-                print(f"✅ WhatsApp bildirimleri aktif: {phone_number}")
-                print(f"⏱️  Throttle süresi: {throttle_seconds} saniye ({throttle_seconds//60} dakika)")
+            print(f"✅ {self.backend.name} bildirimleri aktif: {self.backend.describe()}")
+            print(f"⏱️  Throttle süresi: {throttle_seconds} saniye ({throttle_seconds//60} dakika) - kaynak başına")
+            print(f"🚦 Hedef limiti: saniyede {self.destination_rate:g} mesaj (burst {self.destination_burst})")
         else:
             print("⚠️  Bildirimler devre dışı")
     
-    def should_send_notification(self):
-        """Bildirim gönderilmeli mi? (Throttle kontrolü)"""
+    def source_key(self, source):
+        """
+        Kaynağın takip sistemi adı - hız limiti bu ada göre uygulanır
+        
+        Örn: "Gönderici Takip - Ali" -> "Gönderici Takip",
+             "Anahtar Kelime Takip (fatura)" -> "Anahtar Kelime Takip"
+        """
+        return source.split(" - ")[0].split(" (")[0].strip()
+    
+    def destination_key(self):
+        """Bildirimlerin gittiği hedef: (platform, chat ID / telefon)"""
+        return (self.platform, self.backend.destination())
+    
+    def rate_limit_buckets(self, source):
+        """Bir bildirim için kontrol edilecek token bucket'lar (hedef ve kaynak)"""
+        destination = self.destination_key()
+        return [
+            self.limiter.bucket(destination, self.destination_rate, self.destination_burst),
+            self.limiter.bucket(destination + (self.source_key(source),), self.source_rate, self.source_burst)
+        ]
+    
+    def should_send_notification(self, source=""):
+        """Bildirim gönderilmeli mi? (Hız limiti kontrolü, uygunsa token harcanır)"""
         if not self.enabled:
             return False
         
-        if self.last_notification_time is None:
-            return True
-        
-        elapsed = (datetime.now() - self.last_notification_time).total_seconds()
-        
-        if elapsed < self.throttle_seconds:
-            remaining = int(self.throttle_seconds - elapsed)
-            print(f"⏳ Throttle aktif, bildirim atlandı (kalan: {remaining} saniye)")
+        wait = self.limiter.acquire(self.rate_limit_buckets(source))
+        if wait > 0:
+            print(f"⏳ Hız limiti aktif, bildirim atlandı (kalan: {wait:.0f} saniye)")
             return False
         
         return True
@@ -92,172 +203,280 @@ class MailNotificationManager:
         
         return message
     
-    def send_telegram_message(self, message, image_path=None):
+    def format_digest(self, items):
         """
-        Telegram üzerinden mesaj gönder
+        Biriken bildirimleri tek özet mesajına çevir
         
         Args:
-            message (str): Gönderilecek mesaj
-            image_path (str): Görsel dosya yolu (opsiyonel)
+            items (list): [{"mail_data", "source", "attachment_paths"}, ...]
         
         Returns:
-            bool: Başarılı ise True
+            str: Formatlanmış özet mesajı
         """
-        try:
-            if image_path and os.path.exists(image_path):
-                # Görsel ile mesaj gönder
-                print(f"   📎 Görsel eki: {os.path.basename(image_path)}")
-                url = f"https://api.telegram.org/bot{self.telegram_token}/sendPhoto"
-                
-                with open(image_path, 'rb') as photo:
-                    files = {'photo': photo}
-                    data = {
-                        'chat_id': self.telegram_chat_id,
-                        'caption': message
-                    }
-                    response = requests.post(url, files=files, data=data, timeout=30)
-                
-                if response.status_code == 200:
-                    print("   ✅ Görsel ve mesaj gönderildi!")
-                    return True
-                else:
-                    print(f"   ⚠️ Görsel gönderilemedi (HTTP {response.status_code}), sadece metin gönderiliyor...")
-                    # Görsel gönderilemezse sadece mesaj gönder
-                    return self.send_telegram_message(message, image_path=None)
-            else:
-                # Sadece metin mesaj gönder
-                url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-                data = {
-                    'chat_id': self.telegram_chat_id,
-                    'text': message
-                }
-                response = requests.post(url, json=data, timeout=30)
-                
-                if response.status_code == 200:
-                    print("   ✅ Mesaj gönderildi!")
-                    return True
-                else:
-                    print(f"   ✗ Mesaj gönderilemedi (HTTP {response.status_code})")
-                    print(f"   Yanıt: {response.text}")
-                    return False
-                    
-        except Exception as e:
-            print(f"   ✗ Telegram mesajı gönderilemedi: {e}")
-            return False
+        sources = Counter(item["source"] for item in items)
+        senders = Counter(item["mail_data"].get("from", "Bilinmeyen")[:60] for item in items)
+        
+        lines = [f"🔔 {len(items)} YENİ MAİL (ÖZET)", "", "📌 Kaynaklar:"]
+        for source, count in sources.most_common():
+            lines.append(f"  • {source}: {count}")
+        
+        lines += ["", "👤 Gönderenler:"]
+        for sender, count in senders.most_common(DIGEST_MAX_SENDERS):
+            lines.append(f"  • {sender} ({count})")
+        if len(senders) > DIGEST_MAX_SENDERS:
+            lines.append(f"  • +{len(senders) - DIGEST_MAX_SENDERS} gönderici daha")
+        
+        lines += ["", "📩 Konular:"]
+        for item in items[:DIGEST_MAX_SUBJECTS]:
+            lines.append(f"  • {item['mail_data'].get('subject', 'Konu yok')[:80]}")
+        if len(items) > DIGEST_MAX_SUBJECTS:
+            lines.append(f"  • +{len(items) - DIGEST_MAX_SUBJECTS} mail daha")
+        
+        return "\n".join(lines)[:self.backend.message_limit]
+    
+    def handle_rate_limited(self, retry_after):
+        """
+        Sunucu hız sınırı bildirdi (HTTP 429): hedefe gönderimi durdur
+        
+        Args:
+            retry_after (float): Sunucunun istediği bekleme süresi (saniye)
+        """
+        self.limiter.block(self.destination_key(), retry_after)
     
     def send_notification(self, mail_data, source, attachment_paths=None):
         """
         Telegram veya WhatsApp bildirimi gönder
         
+        Arka plan kuyruğu açıksa bildirim kuyruğa eklenir ve hemen dönülür;
+        gönderim (throttle kontrolü dahil) worker thread'inde yapılır.
+        
         Args:
             mail_data (dict): Mail bilgileri
             source (str): Bildirim kaynağı
             attachment_paths (list): Gönderilecek ek dosya yolları (görseller)
         
         Returns:
-            bool: Başarılı ise True
+            bool: Başarılı ise (kuyruk açıksa kuyruğa eklendiyse) True
+        """
+        outbox_id = None
+        if self.outbox:
+            # Gönderimden önce diske yaz: hata veya yeniden başlatmada kaybolmaz
+            outbox_id = self.outbox.add(mail_data, source, attachment_paths)
+        
+        if self.queue:
+            if self.queue.submit(mail_data, source, attachment_paths, outbox_id):
+                return True
+            if self.outbox:
+                # Kuyruk dolu, kayıt giden kutusunda kalır ve tekrar deneyici gönderir
+                self.outbox.release(outbox_id)
+                return True
+            return False
+        
+        return self.deliver_notification(mail_data, source, attachment_paths, outbox_id)
+    
+    def outbox_result(self, outbox_id, success):
+        """Gönderim sonucunu giden kutusuna işle (başarısızsa tekrar denemeyi planla)"""
+        if not self.outbox or outbox_id is None:
+            return
+        
+        if success:
+            self.outbox.done(outbox_id)
+        else:
+            delay = self.outbox.retry_later(outbox_id)
+            print(f"   📮 Bildirim giden kutusunda, {delay:.0f} saniye sonra tekrar denenecek")
+    
+    def retry_loop(self):
+        """Giden kutusunda zamanı gelen bildirimleri tekrar gönder"""
+        while not self.retry_stop.wait(OUTBOX_POLL_SECONDS):
+            for record in self.outbox.take_due():
+                args = (record["mail_data"], record["source"], record["attachment_paths"], record["id"])
+                if self.queue and not self.queue.closed:
+                    if not self.queue.submit(*args):
+                        self.outbox.release(record["id"])
+                        break
+                else:
+                    self.deliver_notification(*args)
+    
+    def deliver_notification(self, mail_data, source, attachment_paths=None, outbox_id=None):
         """
-        # Throttle kontrolü
-        if not self.should_send_notification():
+        Bildirimi hemen (çağıran thread'de) gönder
+        
+        Özet modunda throttle süresi içinde gelen bildirim atılmaz, özete
+        eklenir; süre dolunca biriken bildirimler tek mesajla gönderilir.
+        
+        Args:
+            mail_data (dict): Mail bilgileri
+            source (str): Bildirim kaynağı
+            attachment_paths (list): Gönderilecek ek dosya yolları (görseller)
+            outbox_id (str): Giden kutusu kaydı (varsa sonuç buna işlenir)
+        
+        Returns:
+            bool: Gönderildiyse veya özete eklendiyse True
+        """
+        if not self.digest:
+            # Hız limiti kontrolü - limitte atlanan bildirim bilerek atılır
+            if not self.should_send_notification(source):
+                self.outbox_result(outbox_id, True)
+                return False
+            success = self.send_mail_notification(mail_data, source, attachment_paths)
+            self.outbox_result(outbox_id, success)
+            return success
+        
+        if not self.enabled:
             return False
         
+        key = self.source_key(source)
+        buckets = self.rate_limit_buckets(source)
+        item = {
+            "mail_data": mail_data,
+            "source": source,
+            "attachment_paths": attachment_paths,
+            "outbox_id": outbox_id
+        }
+        
+        with self.digest_lock:
+            # Bu kaynağın bekleyen özeti varsa yeni bildirim de sıraya girer, önüne geçmez
+            pending = self.digest_items.get(key)
+            if pending:
+                pending.append(item)
+                return True
+        
+        wait = self.limiter.acquire(buckets)
+        if wait == 0:
+            success = self.send_mail_notification(mail_data, source, attachment_paths)
+            # Telegram 429 döndürdüyse bildirim kaybolmasın, özete girsin
+            wait = self.limiter.blocked_time(buckets)
+            if success or wait == 0:
+                self.outbox_result(outbox_id, success)
+                return success
+        
+        with self.digest_lock:
+            self.digest_items.setdefault(key, []).append(item)
+            count = len(self.digest_items[key])
+        
+        print(f"⏳ Hız limiti aktif ({key}), bildirim özete eklendi ({count} bekleyen, kalan: {wait:.0f} saniye)")
+        self.schedule_digest(key, wait)
+        return True
+    
+    def schedule_digest(self, key, delay):
+        """Hız limiti uygun olunca kaynağın özetinin gönderilmesini planla"""
+        with self.digest_lock:
+            timer = self.digest_timers.get(key)
+            if timer and timer.is_alive():
+                return
+            timer = threading.Timer(delay, self.on_digest_due, args=(key,))
+            timer.daemon = True
+            self.digest_timers[key] = timer
+            timer.start()
+    
+    def on_digest_due(self, key):
+        """Zamanlayıcı doldu: özeti gönder (kuyruk varsa worker'da)"""
+        with self.digest_lock:
+            self.digest_timers.pop(key, None)
+        
+        if self.queue and not self.queue.closed:
+            if not self.queue.submit_call(self.flush_digest, key):
+                # Kuyruk dolu, özet kaybolmasın diye biraz sonra tekrar dene
+                self.schedule_digest(key, 5)
+            return
+        
+        self.flush_digest(key)
+    
+    def flush_digest(self, key, force=False):
+        """
+        Kaynakta biriken bildirimleri tek mesaj olarak gönder
+        
+        Args:
+            key (str): Kaynak (takip sistemi adı)
+            force (bool): Hız limitini beklemeden gönder (kapanışta)
+        
+        Returns:
+            bool: Gönderildiyse (veya gönderilecek bir şey yoksa) True
+        """
+        with self.digest_lock:
+            if not self.digest_items.get(key):
+                return True
+        
+        buckets = self.rate_limit_buckets(key)
+        if not force:
+            wait = self.limiter.acquire(buckets)
+            if wait > 0:
+                self.schedule_digest(key, wait)
+                return True
+        
+        with self.digest_lock:
+            items = self.digest_items.pop(key, [])
+        
+        if not items:
+            return True
+        
+        if len(items) == 1:
+            item = items[0]
+            success = self.send_mail_notification(item["mail_data"], item["source"], item["attachment_paths"])
+        elif self.backend.batching and len(items) <= DIGEST_MAX_SUBJECTS:
+            # Backend birden fazla bildirimi tek mesajda taşıyabiliyor: özet yerine tam bildirimler
+            print(f"\n📱 {len(items)} bildirim toplu gönderiliyor ({key})...")
+            success = self.backend.send_batch([
+                self.format_mail_summary(item["mail_data"], item["source"]) for item in items
+            ])
+        else:
+            print(f"\n📱 {len(items)} bildirim özet olarak gönderiliyor ({key})...")
+            success = self.send_text(self.format_digest(items))
+        
+        if success or self.outbox:
+            # Giden kutusu varsa başarısız bildirimler üstel beklemeyle tekrar denenir
+            for item in items:
+                self.outbox_result(item["outbox_id"], success)
+        else:
+            # Gönderilemeyen özet kaybolmaz, limit uygun olunca tekrar denenir
+            with self.digest_lock:
+                self.digest_items[key] = items + self.digest_items.get(key, [])
+            self.schedule_digest(key, self.limiter.wait_time(buckets) or DEFAULT_RETRY_AFTER)
+        
+        return success
+    
+    def flush_all_digests(self, force=False):
+        """Tüm kaynakların bekleyen özetlerini gönder"""
+        with self.digest_lock:
+            keys = list(self.digest_items)
+        for key in keys:
+            self.flush_digest(key, force)
+        return True
+    
+    def send_text(self, message):
+        """
+        Sadece metin mesaj gönder
+        
+        Returns:
+            bool: Başarılı ise True
+        """
+        return self.backend.send_text(message)
+    
+    def send_mail_notification(self, mail_data, source, attachment_paths=None):
+        """
+        Tek mail için bildirimi throttle kontrolü yapmadan gönder
+        
+        Args:
+            mail_data (dict): Mail bilgileri
+            source (str): Bildirim kaynağı
+            attachment_paths (list): Gönderilecek ek dosya yolları (görseller)
+        
+        Returns:
+            bool: Başarılı ise True
+        """
         try:
             # Mesajı formatla
             message = self.format_mail_summary(mail_data, source)
             
-            # Platform seçimi
-            if self.platform == "telegram":
-                print(f"\n📱 Telegram bildirimi gönderiliyor...")
-                print(f"   💬 Chat ID: {self.telegram_chat_id}")
-                print(f"   📌 Kaynak: {source}")
-                
-                # Görsel ek var mı?
-                image_to_send = None
-                if attachment_paths:
-                    # İlk görsel eki bul
-                    for path in attachment_paths:
-                        if path and os.path.exists(path):
-                            # Görsel dosyası mı kontrol et
-                            ext = os.path.splitext(path)[1].lower()
-                            if ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                                image_to_send = path
-                                break
-                
-                # Telegram mesajı gönder
-                success = self.send_telegram_message(message, image_to_send)
-                
-                if success:
-                    self.last_notification_time = datetime.now()
-                    return True
-                else:
-                    return False
-                    
-            elif self.platform == "whatsapp":
-                print(f"\n📱 WhatsApp bildirimi gönderiliyor...")
-                print(f"   📞 Numara: {self.phone_number}")
-                print(f"   📌 Kaynak: {source}")
-                
-                # Görsel ek var mı?
-                image_to_send = None
-                if attachment_paths:
-                    # İlk görsel eki bul
-                    for path in attachment_paths:
-                        if path and os.path.exists(path):
-                            # Görsel dosyası mı kontrol et
-                            ext = os.path.splitext(path)[1].lower()
-                            if ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                                image_to_send = path
-                                break
-                
-                # WhatsApp mesajı gönder - ÇALIŞAN KOD (send_message.py'den)
-                if image_to_send:
-                    print(f"   📎 Görsel eki: {os.path.basename(image_to_send)}")
-                    try:
-                        # Görsel ile mesaj gönder
-                        pwk.sendwhats_image(
-                            self.phone_number,
-                            image_to_send,
-                            message,
-                            wait_time=10,  # send_message.py'deki çalışan değer
-                            tab_close=True  # send_message.py'deki çalışan değer
-                        )
-                        print("   ✅ Görsel ve mesaj gönderildi!")
-                    except Exception as e:
-                        print(f"   ⚠️ Görsel gönderilemedi ({e}), sadece metin gönderiliyor...")
-                        # Görsel gönderilemezse sadece mesaj gönder
-                        try:
-                            pwk.sendwhatmsg_instantly(
-                                self.phone_number,
-                                message,
-                                wait_time=10,  # send_message.py'deki çalışan değer
-                                tab_close=True  # send_message.py'deki çalışan değer
-                            )
-                            print("   ✅ Mesaj gönderildi!")
-                        except Exception as e2:
-                            print(f"   ✗ Mesaj da gönderilemedi: {e2}")
-                            return False
-                else:
-                    # Sadece metin mesaj gönder - send_message.py'deki AYNI KOD
-                    try:
-                        print("   ⏳ WhatsApp Web açılıyor ve mesaj gönderiliyor...")
-                        pwk.sendwhatmsg_instantly(
-                            self.phone_number,
-                            message,
-                            wait_time=10,  # send_message.py'deki çalışan değer
-                            tab_close=True  # send_message.py'deki çalışan değer  
-                        )
-                        print("   ✅ Mesaj gönderildi!")
-                    except Exception as e:
-                        print(f"   ✗ Mesaj gönderilemedi: {e}")
-                        return False
-                
-                # Son bildirim zamanını güncelle
-                self.last_notification_time = datetime.now()
-                return True
+            print(f"\n📱 {self.backend.name} bildirimi gönderiliyor...")
+            print(f"   {self.backend.describe()}")
+            print(f"   📌 Kaynak: {source}")
             
-            else:
-                print(f"   ✗ Bilinmeyen platform: {self.platform}")
-                return False
+            # Görsel ek varsa ilk görsel mesajla birlikte gönderilir
+            image_to_send = find_image(attachment_paths)
+            if image_to_send:
+                return self.backend.send_image(message, image_to_send)
+            return self.backend.send_text(message)
             
         except KeyboardInterrupt:
             # Kullanıcı Ctrl+C bastıysa, bunu yukarı fırlat
@@ -269,6 +488,45 @@ class MailNotificationManager:
             # Exception'ı yakalayıp thread'in devam etmesini sağla
             return False
     
+    def get_queue_stats(self):
+        """Gönderim kuyruğu metriklerini döndür (kuyruk yoksa None)"""
+        if not self.queue:
+            return None
+        return self.queue.get_stats()
+    
+    def close(self, timeout=30):
+        """Bekleyen bildirimleri ve özeti gönder, kuyruğu ve backend bağlantılarını kapat"""
+        if self.retry_thread:
+            self.retry_stop.set()
+            self.retry_thread.join(timeout=5)
+        
+        with self.digest_lock:
+            for timer in self.digest_timers.values():
+                timer.cancel()
+            self.digest_timers = {}
+        
+        if self.queue:
+            # Özetler, kuyrukta onlardan önce bekleyen bildirimlerden sonra gönderilir
+            if self.digest:
+                self.queue.submit_call(self.flush_all_digests, True)
+            self.queue.close(timeout)
+            self.queue.print_stats()
+        
+        # Kuyruk kapanırken özete eklenenler de gönderilsin
+        if self.digest_items:
+            self.flush_all_digests(force=True)
+        
+        if self.backend:
+            stats = self.backend.get_stats()
+            if stats and stats["calls"]:
+                print(f"📊 {self.backend.name} istekleri: {stats['calls']} istek, {stats['errors']} hata, "
+                      f"ortalama {stats['avg_ms']:.0f} ms (p50 {stats['p50_ms']:.0f}, "
+                      f"p95 {stats['p95_ms']:.0f}, en fazla {stats['max_ms']:.0f} ms)")
+            self.backend.close()
+        
+        if self.outbox and self.outbox.count():
+            print(f"📮 Giden kutusunda {self.outbox.count()} bildirim kaldı, sonraki açılışta gönderilecek")
+    
     def test_notification(self):
         """Test bildirimi gönder"""
         test_mail = {
@@ -278,7 +536,152 @@ class MailNotificationManager:
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        return self.send_notification(test_mail, "Test Modu")
+        # Test sonucu beklendiği için kuyruk kullanılmaz
+        return self.deliver_notification(test_mail, "Test Modu")
+
+
+
+class MultiChannelNotifier:
+    """
+    Aynı bildirimi birden fazla kanala (Telegram, WhatsApp, webhook, dosya) gönderir
+    
+    Her kanalın kendi MailNotificationManager'ı vardır: hız limiti, özet,
+    kuyruk ve giden kutusu kanala özeldir, yavaş veya hatalı bir kanal
+    diğerlerini etkilemez. Kanallar thread havuzunda aynı anda çağrılır;
+    toplam süre kanalların toplamı değil, en yavaş kanal kadardır.
+    """
+    
+    def __init__(self, managers):
+        """
+        Args:
+            managers (list): Kanal başına MailNotificationManager
+        """
+        self.managers = list(managers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.managers),
+            thread_name_prefix="Bildirim kanalı"
+        )
+        names = ", ".join(manager.backend.name for manager in self.managers)
+        print(f"📡 {len(self.managers)} bildirim kanalı: {names}")
+    
+    def fan_out(self, method, *args, **kwargs):
+        """
+        Her kanalda aynı metodu aynı anda çağır
+        
+        Returns:
+            list: Kanal sırasıyla sonuçlar (hata veren kanal için False)
+        """
+        futures = [
+            self.executor.submit(getattr(manager, method), *args, **kwargs)
+            for manager in self.managers
+        ]
+        results = []
+        for manager, future in zip(self.managers, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"   ✗ {manager.backend.name} kanalı hatası: {e}")
+                results.append(False)
+        return results
+    
+    def send_notification(self, mail_data, source, attachment_paths=None):
+        """
+        Bildirimi tüm kanallara gönder
+        
+        Returns:
+            bool: En az bir kanal gönderdiyse (veya kuyruğa aldıysa) True
+        """
+        return any(self.fan_out("send_notification", mail_data, source, attachment_paths))
+    
+    def test_notification(self):
+        """Tüm kanallara test bildirimi gönder"""
+        return any(self.fan_out("test_notification"))
+    
+    def get_queue_stats(self):
+        """Kanal başına kuyruk metrikleri: {kanal adı: metrikler}"""
+        return {manager.backend.name: manager.get_queue_stats() for manager in self.managers}
+    
+    def close(self, timeout=30):
+        """Tüm kanalları aynı anda kapat (bekleyen bildirimler gönderilir)"""
+        if not self.managers:
+            return
+        self.fan_out("close", timeout)
+        self.executor.shutdown(wait=True)
+        self.managers = []
+
+
+def create_notification_manager(platform="telegram", telegram_token=None, telegram_chat_id=None,
+                                whatsapp_phone=None, whatsapp_api=None, channels=None,
+                                throttle_seconds=300, async_send=True, queue_size=100,
+                                digest=True, rate_limit=None, outbox_folder=None):
+    """
+    Takip sistemleri için bildirim yöneticisini oluştur
+    
+    channels verilirse her etkin kanal için ayrı yönetici kurulur ve bildirimler
+    hepsine gönderilir; verilmezse platform parametreleriyle tek kanal kullanılır.
+    
+    Args:
+        platform (str): Tek kanal için platform ("telegram" veya "whatsapp")
+        telegram_token (str): Telegram bot token
+        telegram_chat_id (str): Telegram chat ID
+        whatsapp_phone (str): WhatsApp telefon numarası
+        whatsapp_api (dict): WhatsApp Cloud API ayarları
+        channels (list): Kanal ayarları, örn: [{"type": "telegram", "bot_token": ...,
+            "chat_id": ...}, {"type": "webhook", "url": ...}, {"type": "file", "path": "-"}].
+            Her kanal "enabled", "name" ve "rate_limit" da verebilir
+        throttle_seconds (int): Kaynak başına bildirimler arası minimum süre
+        async_send (bool): Bildirimleri arka plan kuyruğundan gönder
+        queue_size (int): Kanal başına gönderim bekleyen en fazla bildirim
+        digest (bool): Throttle süresinde gelenleri özet olarak gönder
+        rate_limit (dict): Hız limiti ayarları
+        outbox_folder (str): Giden kutusu dosyalarının klasörü (None ise giden kutusu yok)
+    
+    Returns:
+        MailNotificationManager veya MultiChannelNotifier (kanal yoksa None)
+    """
+    common = {
+        "throttle_seconds": throttle_seconds,
+        "enabled": True,
+        "async_send": async_send,
+        "queue_size": queue_size,
+        "digest": digest,
+        "rate_limit": rate_limit
+    }
+    
+    if not channels:
+        settings = platform_settings(platform, whatsapp_phone, telegram_token, telegram_chat_id, whatsapp_api)
+        if platform == "telegram" and not (telegram_token and telegram_chat_id):
+            return None
+        if platform == "whatsapp" and not whatsapp_phone:
+            return None
+        outbox_file = os.path.join(outbox_folder, ".notification_outbox.jsonl") if outbox_folder else None
+        manager = MailNotificationManager(channel=settings, outbox_file=outbox_file, **common)
+        return manager if manager.enabled else None
+    
+    managers = []
+    names = Counter()
+    for channel in channels:
+        if not channel.get("enabled", True):
+            continue
+        
+        # Her kanalın giden kutusu ayrıdır: bir kanal gönderince diğeri için kapanmaz
+        name = str(channel.get("name") or channel.get("type", "kanal")).lower()
+        names[name] += 1
+        if names[name] > 1:
+            name = f"{name}{names[name]}"
+        outbox_file = os.path.join(outbox_folder, f".notification_outbox.{name}.jsonl") if outbox_folder else None
+        
+        # Kanal kendi hız limitini verebilir (örn: dosya/webhook için daha yüksek)
+        settings = dict(common, rate_limit=channel.get("rate_limit", rate_limit))
+        manager = MailNotificationManager(channel=channel, outbox_file=outbox_file, **settings)
+        if manager.enabled:
+            managers.append(manager)
+    
+    if not managers:
+        return None
+    if len(managers) == 1:
+        return managers[0]
+    return MultiChannelNotifier(managers)
 
 
 def main():
@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+
+
+# Kuyruk bu orana dolunca uyarı verilir
+QUEUE_WARNING_RATIO = 0.8
+
+
+class NotificationQueue:
+    """
+    Bildirimleri sınırlı bir kuyrukta toplayıp arka plan worker'larıyla gönderir
+
+    Mail çekme/eşleştirme döngüsü gönderimi beklemez: submit() hemen döner.
+    Kuyruk doluysa yeni bildirim bekletilmeden atılır ve sayılır; böylece yavaş
+    bir bildirim kanalı mail akışını hiçbir zaman durdurmaz.
+    """
+
+    def __init__(self, send_func, maxsize=100, workers=1, name="Bildirim"):
+        """
+        Args:
+            send_func (callable): send_func(*args, **kwargs) - asıl gönderimi yapar,
+                başarılıysa True döner
+            maxsize (int): Kuyrukta bekleyebilecek en fazla bildirim
+            workers (int): Gönderim yapan arka plan thread sayısı
+            name (str): Thread ve log adı
+        """
+        self.send_func = send_func
+        self.maxsize = max(1, int(maxsize))
+        self.name = name
+        self.queue = queue.Queue(maxsize=self.maxsize)
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # Backpressure metrikleri
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "dropped": 0,
+            "max_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "total_send_time": 0.0
+        }
+        self.warned = False
+
+        self.workers = []
+        for index in range(max(1, int(workers))):
+            worker = threading.Thread(
+                target=self._worker,
+                daemon=True,
+                name=f"{name}-{index + 1}"
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, *args, **kwargs):
+        """
+        Bildirimi kuyruğa ekle (beklemeden döner)
+
+        Returns:
+            bool: Kuyruğa eklendiyse True, kuyruk dolu veya kapalıysa False
+        """
+        return self.submit_call(self.send_func, *args, **kwargs)
+
+    def submit_call(self, func, *args, **kwargs):
+        """
+        send_func yerine verilen fonksiyonu worker'da çalıştırmak üzere kuyruğa ekle
+
+        Aynı kanala giden başka gönderimler (örn: özet mesajı) normal
+        bildirimlerle aynı sırada ve aynı worker'larda yapılır.
+
+        Returns:
+            bool: Kuyruğa eklendiyse True, kuyruk dolu veya kapalıysa False
+        """
+        if self.closed:
+            return False
+
+        try:
+            self.queue.put_nowait((time.monotonic(), func, args, kwargs))
+        except queue.Full:
+            with self.lock:
+                self.stats["dropped"] += 1
+                dropped = self.stats["dropped"]
+            print(f"⚠️  {self.name} kuyruğu dolu ({self.maxsize}), bildirim atlandı (toplam atlanan: {dropped})")
+            return False
+
+        depth = self.queue.qsize()
+        with self.lock:
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+
+        if depth >= self.maxsize * QUEUE_WARNING_RATIO:
+            if not self.warned:
+                print(f"⚠️  {self.name} kuyruğu dolmak üzere: {depth}/{self.maxsize}")
+                self.warned = True
+        else:
+            self.warned = False
+
+        return True
+
+    def _worker(self):
+        """Kuyruktaki bildirimleri sırayla gönder"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+
+            queued_at, func, args, kwargs = item
+            started = time.monotonic()
+            wait = started - queued_at
+            success = False
+
+            try:
+                success = func(*args, **kwargs)
+            except SystemExit:
+                # pywhatkit tab_close=True ile SystemExit fırlatabiliyor
+                print(f"   ⚠️ {self.name}: SystemExit yakalandı, devam ediliyor...")
+            except Exception as e:
+                print(f"   ✗ {self.name} gönderim hatası: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                with self.lock:
+                    self.stats["sent" if success else "failed"] += 1
+                    self.stats["total_wait"] += wait
+                    self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+                    self.stats["total_send_time"] += elapsed
+                self.queue.task_done()
+
+    def get_stats(self):
+        """
+        Kuyruk metriklerini döndür
+
+        Returns:
+            dict: depth, enqueued, sent, failed, dropped, max_depth,
+                  avg_wait, max_wait, avg_send_time (saniye)
+        """
+        with self.lock:
+            stats = dict(self.stats)
+
+        processed = stats["sent"] + stats["failed"]
+        total_wait = stats.pop("total_wait")
+        total_send_time = stats.pop("total_send_time")
+        stats["depth"] = self.queue.qsize()
+        stats["avg_wait"] = total_wait / processed if processed else 0.0
+        stats["avg_send_time"] = total_send_time / processed if processed else 0.0
+        return stats
+
+    def print_stats(self):
+        """Kuyruk metriklerini yazdır"""
+        stats = self.get_stats()
+        print(f"📊 {self.name} kuyruğu: {stats['enqueued']} eklendi, {stats['sent']} gönderildi, "
+              f"{stats['failed']} başarısız, {stats['dropped']} atlandı "
+              f"(bekleyen: {stats['depth']}, en yüksek: {stats['max_depth']}/{self.maxsize})")
+        print(f"   ⏱️  Ortalama kuyruk bekleme: {stats['avg_wait']:.1f} sn "
+              f"(en fazla {stats['max_wait']:.1f} sn), ortalama gönderim: {stats['avg_send_time']:.1f} sn")
+
+    def close(self, timeout=30):
+        """
+        Yeni bildirim kabul etme, bekleyenlerin gönderilmesini bekle
+
+        Args:
+            timeout (float): Bekleyen bildirimler için en fazla bekleme süresi (saniye)
+
+        Returns:
+            bool: Kuyruk süre dolmadan boşaldıysa True
+        """
+        if self.closed:
+            return True
+        self.closed = True
+
+        pending = self.queue.qsize()
+        if pending:
+            print(f"⏳ {self.name} kuyruğunda {pending} bildirim bekliyor, gönderiliyor...")
+
+        deadline = time.monotonic() + timeout
+        for _ in self.workers:
+            # Dolu kuyrukta sonlandırma işareti de yer bekler
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self.queue.put(None, timeout=min(remaining, 1))
+                    break
+                except queue.Full:
+                    continue
+
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.monotonic()))
+
+        drained = not any(worker.is_alive() for worker in self.workers)
+        if not drained:
+            print(f"⚠️  {self.name} kuyruğu {timeout} sn içinde boşalmadı, {self.queue.qsize()} bildirim gönderilmedi")
+        return drained
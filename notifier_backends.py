@@ -0,0 +1,731 @@
+import os
+import mimetypes
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# HTTP istekleri için (bağlantı kurma, yanıt bekleme) süreleri - saniye
+HTTP_TIMEOUT = (5, 30)
+
+# Gecikme yüzdelikleri için saklanan son istek sayısı
+LATENCY_SAMPLE_SIZE = 200
+
+# 429 yanıtında bekleme süresi bildirilmezse beklenecek süre (saniye)
+DEFAULT_RETRY_AFTER = 5
+
+# WhatsApp Cloud API varsayılan adresi (test için yerel bir sunucu verilebilir)
+WHATSAPP_API_URL = "https://graph.facebook.com/v19.0"
+
+# Toplu gönderimde tek mesajda birleştirilen bildirimlerin ayıracı
+BATCH_SEPARATOR = "\n\n— — —\n\n"
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def create_http_session(pool_size=4, retries=3):
+    """
+    Bağlantıları yeniden kullanan (keep-alive) HTTP oturumu oluştur
+
+    DNS, TCP ve TLS el sıkışması sadece ilk istekte yapılır, sonraki
+    istekler açık bağlantıyı kullanır. Bağlantı kurulamayan istekler artan
+    beklemeyle tekrar denenir. Geçici sunucu hataları (502/503/504) sadece
+    GET için tekrarlanır: ağ geçidi zaman aşımında POST mesajı zaten iletmiş
+    olabilir, tekrarı outbox/kuyruk yapar. Yanıt okunurken kopan istekler de
+    aynı nedenle tekrarlanmaz. HTTP 429 burada beklenmez; backend hız
+    limitine bildirir ve worker bloklanmaz.
+
+    Args:
+        pool_size (int): Aynı anda açık tutulacak en fazla bağlantı
+        retries (int): En fazla tekrar deneme sayısı
+
+    Returns:
+        requests.Session: Ayarlanmış oturum
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        backoff_factor=0.5,
+        raise_on_status=False,
+        respect_retry_after_header=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def find_image(attachment_paths):
+    """Ek dosyalar arasında gönderilebilecek ilk görseli bul (yoksa None)"""
+    for path in attachment_paths or []:
+        if path and os.path.exists(path) and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+            return path
+    return None
+
+
+def pack_messages(messages, limit):
+    """
+    Mesajları sınırı aşmayacak şekilde olabildiğince az mesajda birleştir
+
+    Args:
+        messages (list): Mesaj metinleri
+        limit (int): Tek mesajın en fazla uzunluğu
+
+    Returns:
+        list: Birleştirilmiş mesajlar
+    """
+    packed = []
+    current = ""
+    for message in messages:
+        message = message[:limit]
+        if current and len(current) + len(BATCH_SEPARATOR) + len(message) <= limit:
+            current += BATCH_SEPARATOR + message
+        else:
+            if current:
+                packed.append(current)
+            current = message
+    if current:
+        packed.append(current)
+    return packed
+
+
+class NotifierBackend:
+    """
+    Bildirim kanalı arayüzü
+
+    MailNotificationManager mesajı biçimlendirir, hız limitini ve kuyruğu
+    yönetir; backend sadece hazır mesajı hedefe iletir. Yeni bir kanal bu
+    sınıftan türetilip send_text (ve gerekirse send_image) yazılarak eklenir.
+    """
+
+    name = "backend"
+    # Aynı anda birden fazla worker gönderim yapabilir mi?
+    parallel = True
+    # send_batch birden fazla bildirimi tek istekte gönderebiliyor mu?
+    batching = False
+    # Tek mesajın en fazla uzunluğu
+    message_limit = 4096
+    # Hedef başına varsayılan hız limiti: (mesaj/saniye, burst)
+    rate_limit = (1.0, 1)
+
+    def __init__(self, on_rate_limited=None):
+        """
+        Args:
+            on_rate_limited (callable): on_rate_limited(saniye) - sunucu hız
+                sınırı bildirdiğinde (HTTP 429) çağrılır
+        """
+        self.on_rate_limited = on_rate_limited
+
+    def destination(self):
+        """Mesajların gittiği hedef (chat ID, telefon numarası...)"""
+        return ""
+
+    def describe(self):
+        """Log için hedef açıklaması"""
+        return self.destination()
+
+    def send_text(self, message):
+        """
+        Metin mesaj gönder
+
+        Returns:
+            bool: Başarılı ise True
+        """
+        raise NotImplementedError
+
+    def send_image(self, message, image_path):
+        """Görsel ile mesaj gönder (desteklenmiyorsa sadece metin)"""
+        return self.send_text(message)
+
+    def send_batch(self, messages):
+        """
+        Birden fazla mesaj gönder
+
+        Returns:
+            bool: Hepsi gönderildiyse True (ilk hatada durur)
+        """
+        for message in messages:
+            if not self.send_text(message):
+                return False
+        return True
+
+    def rate_limited(self, retry_after):
+        """Sunucu hız sınırı bildirdi: yöneticiye haber ver"""
+        print(f"   ⏳ {self.name} hız sınırı (HTTP 429): {retry_after} saniye beklenecek")
+        if self.on_rate_limited:
+            self.on_rate_limited(retry_after)
+
+    def get_stats(self):
+        """İstek istatistikleri (yoksa None)"""
+        return None
+
+    def close(self):
+        """Açık bağlantıları kapat"""
+        pass
+
+
+class HttpBackend(NotifierBackend):
+    """Kalıcı HTTP oturumu kullanan ve istek gecikmelerini ölçen backend"""
+
+    def __init__(self, pool_size=1, on_rate_limited=None):
+        super().__init__(on_rate_limited)
+        self.pool_size = max(1, pool_size)
+        self.session = None
+        self.http_lock = threading.Lock()
+        self.http_stats = {"calls": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+        self.http_latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    def request(self, label, url, **kwargs):
+        """
+        POST isteği gönder ve süresini kaydet
+
+        Args:
+            label (str): Log'da görünecek istek adı (örn: "sendMessage")
+            url (str): İstek adresi
+            **kwargs: requests.post parametreleri (json, data, files, headers)
+
+        Returns:
+            requests.Response: Yanıt
+        """
+        if self.session is None:
+            self.session = create_http_session(pool_size=self.pool_size)
+
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.post(url, timeout=HTTP_TIMEOUT, **kwargs)
+            failed = response.status_code != 200
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.http_lock:
+                self.http_stats["calls"] += 1
+                self.http_stats["errors"] += int(failed)
+                self.http_stats["total_time"] += elapsed
+                self.http_stats["max_time"] = max(self.http_stats["max_time"], elapsed)
+                self.http_latencies.append(elapsed)
+            print(f"   ⏱️  {label}: {elapsed * 1000:.0f} ms")
+
+    def get_stats(self):
+        """
+        İstek gecikme istatistiklerini döndür
+
+        Returns:
+            dict: calls, errors, avg_ms, p50_ms, p95_ms, max_ms
+        """
+        with self.http_lock:
+            stats = dict(self.http_stats)
+            latencies = sorted(self.http_latencies)
+
+        calls = stats["calls"]
+        result = {
+            "calls": calls,
+            "errors": stats["errors"],
+            "avg_ms": stats["total_time"] / calls * 1000 if calls else 0.0,
+            "p50_ms": 0.0,
+            "p95_ms": 0.0,
+            "max_ms": stats["max_time"] * 1000
+        }
+        if latencies:
+            result["p50_ms"] = latencies[len(latencies) // 2] * 1000
+            result["p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        return result
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+
+
+class TelegramBackend(HttpBackend):
+    """Telegram Bot API üzerinden gönderim"""
+
+    name = "Telegram"
+    # Telegram aynı sohbete saniyede ~1 mesaj önerir
+    rate_limit = (1.0, 3)
+
+    def __init__(self, token, chat_id, pool_size=1, on_rate_limited=None):
+        """
+        Args:
+            token (str): Telegram bot token
+            chat_id (str): Telegram chat ID
+            pool_size (int): Açık tutulacak en fazla bağlantı
+            on_rate_limited (callable): HTTP 429'da çağrılır
+        """
+        super().__init__(pool_size, on_rate_limited)
+        self.token = token
+        self.chat_id = chat_id
+
+    def destination(self):
+        return str(self.chat_id)
+
+    def describe(self):
+        return f"💬 Chat ID: {self.chat_id}"
+
+    def telegram_request(self, method, **kwargs):
+        """Telegram Bot API isteği gönder (örn: method="sendMessage")"""
+        url = f"https://api.telegram.org/bot{self.token}/{method}"
+        return self.request(method, url, **kwargs)
+
+    def handle_429(self, response):
+        """Telegram beklenecek süreyi parameters.retry_after alanında bildirir"""
+        retry_after = DEFAULT_RETRY_AFTER
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after", retry_after)
+        except ValueError:
+            pass
+        self.rate_limited(retry_after)
+
+    def send_text(self, message):
+        try:
+            data = {
+                'chat_id': self.chat_id,
+                'text': message[:self.message_limit]
+            }
+            response = self.telegram_request("sendMessage", json=data)
+
+            if response.status_code == 200:
+                print("   ✅ Mesaj gönderildi!")
+                return True
+            elif response.status_code == 429:
+                self.handle_429(response)
+                return False
+            else:
+                print(f"   ✗ Mesaj gönderilemedi (HTTP {response.status_code})")
+                print(f"   Yanıt: {response.text}")
+                return False
+        except Exception as e:
+            print(f"   ✗ Telegram mesajı gönderilemedi: {e}")
+            return False
+
+    def send_image(self, message, image_path):
+        print(f"   📎 Görsel eki: {os.path.basename(image_path)}")
+        try:
+            with open(image_path, 'rb') as photo:
+                files = {'photo': photo}
+                data = {
+                    'chat_id': self.chat_id,
+                    'caption': message
+                }
+                response = self.telegram_request("sendPhoto", files=files, data=data)
+        except Exception as e:
+            print(f"   ✗ Telegram görseli gönderilemedi: {e}")
+            return False
+
+        if response.status_code == 200:
+            print("   ✅ Görsel ve mesaj gönderildi!")
+            return True
+        elif response.status_code == 429:
+            self.handle_429(response)
+            return False
+
+        print(f"   ⚠️ Görsel gönderilemedi (HTTP {response.status_code}), sadece metin gönderiliyor...")
+        return self.send_text(message)
+
+
+class WhatsAppCloudBackend(HttpBackend):
+    """
+    WhatsApp Business Cloud API (HTTP) üzerinden gönderim
+
+    Tarayıcı açmaz; her mesaj tek bir HTTPS isteğidir ve kalıcı oturum
+    sayesinde milisaniyeler içinde gider. Aynı API'yi konuşan başka bir ağ
+    geçidi veya test için yerel bir sunucu api_url ile verilebilir.
+    """
+
+    name = "WhatsApp"
+    batching = True
+    # Görsel açıklaması (caption) için sınır
+    caption_limit = 1024
+    # Cloud API aynı kullanıcıya kısa aralıklarla çok mesajı reddeder (pair rate limit);
+    # bu yüzden özetler toplu gönderilir
+    rate_limit = (1 / 6, 3)
+
+    def __init__(self, phone_number, api_token, phone_number_id, api_url=WHATSAPP_API_URL,
+                 pool_size=1, on_rate_limited=None):
+        """
+        Args:
+            phone_number (str): Bildirimlerin gideceği numara (örn: "+905378284599")
+            api_token (str): Cloud API erişim anahtarı (Bearer token)
+            phone_number_id (str): Gönderen işletme numarasının ID'si
+            api_url (str): API adresi (varsayılan Meta Graph API)
+            pool_size (int): Açık tutulacak en fazla bağlantı
+            on_rate_limited (callable): HTTP 429'da çağrılır
+        """
+        super().__init__(pool_size, on_rate_limited)
+        self.phone_number = phone_number
+        self.api_token = api_token
+        self.phone_number_id = phone_number_id
+        self.api_url = (api_url or WHATSAPP_API_URL).rstrip("/")
+
+    def destination(self):
+        return str(self.phone_number)
+
+    def describe(self):
+        return f"📞 Numara: {self.phone_number}"
+
+    def api_request(self, label, endpoint, **kwargs):
+        """Cloud API isteği gönder (örn: endpoint="messages")"""
+        url = f"{self.api_url}/{self.phone_number_id}/{endpoint}"
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+        return self.request(label, url, headers=headers, **kwargs)
+
+    def handle_error(self, response):
+        """Hata yanıtını yazdır; 429'da Retry-After kadar beklenir"""
+        if response.status_code == 429:
+            retry_after = DEFAULT_RETRY_AFTER
+            try:
+                retry_after = int(response.headers.get("Retry-After", retry_after))
+            except ValueError:
+                pass
+            self.rate_limited(retry_after)
+            return
+        print(f"   ✗ WhatsApp API hatası (HTTP {response.status_code})")
+        print(f"   Yanıt: {response.text[:300]}")
+
+    def send_message(self, payload):
+        """Mesaj nesnesini (text/image) gönder"""
+        data = {
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            # API numarayı + ve boşluk olmadan bekler
+            "to": re.sub(r"\D", "", str(self.phone_number))
+        }
+        data.update(payload)
+
+        try:
+            response = self.api_request("messages", "messages", json=data)
+        except Exception as e:
+            print(f"   ✗ WhatsApp mesajı gönderilemedi: {e}")
+            return False
+
+        if response.status_code == 200:
+            return True
+        self.handle_error(response)
+        return False
+
+    def send_text(self, message):
+        if self.send_message({"type": "text", "text": {"preview_url": False, "body": message[:self.message_limit]}}):
+            print("   ✅ Mesaj gönderildi!")
+            return True
+        return False
+
+    def upload_media(self, image_path):
+        """
+        Görseli yükle
+
+        Returns:
+            str: Medya ID'si (yüklenemezse None)
+        """
+        mime_type = mimetypes.guess_type(image_path)[0] or "image/jpeg"
+        try:
+            with open(image_path, "rb") as f:
+                files = {"file": (os.path.basename(image_path), f, mime_type)}
+                data = {"messaging_product": "whatsapp", "type": mime_type}
+                response = self.api_request("media", "media", files=files, data=data)
+        except Exception as e:
+            print(f"   ✗ Görsel yüklenemedi: {e}")
+            return None
+
+        if response.status_code != 200:
+            self.handle_error(response)
+            return None
+        try:
+            return response.json().get("id")
+        except ValueError:
+            return None
+
+    def send_image(self, message, image_path):
+        print(f"   📎 Görsel eki: {os.path.basename(image_path)}")
+        media_id = self.upload_media(image_path)
+        if media_id and self.send_message({
+            "type": "image",
+            "image": {"id": media_id, "caption": message[:self.caption_limit]}
+        }):
+            print("   ✅ Görsel ve mesaj gönderildi!")
+            return True
+
+        print("   ⚠️ Görsel gönderilemedi, sadece metin gönderiliyor...")
+        return self.send_text(message)
+
+    def send_batch(self, messages):
+        """Bildirimleri mesaj sınırına sığacak şekilde birleştirip az sayıda istekle gönder"""
+        packed = pack_messages(messages, self.message_limit)
+        if len(packed) < len(messages):
+            print(f"   📦 {len(messages)} bildirim {len(packed)} mesajda gönderiliyor")
+        return super().send_batch(packed)
+
+
+class PywhatkitBackend(NotifierBackend):
+    """
+    WhatsApp Web'i tarayıcıda açarak gönderim (eski yöntem)
+
+    Her mesaj için tarayıcı sekmesi açılır ve klavye/fare ile yazılır; bu
+    yüzden mesaj başına 15+ saniye sürer ve paralel gönderim yapılamaz.
+    Cloud API ayarlanmamışsa kullanılır.
+    """
+
+    name = "WhatsApp (pywhatkit)"
+    parallel = False
+    rate_limit = (1 / 15, 1)
+
+    def __init__(self, phone_number, on_rate_limited=None):
+        """
+        Args:
+            phone_number (str): Bildirimlerin gideceği numara (örn: "+905378284599")
+        """
+        super().__init__(on_rate_limited)
+        self.phone_number = phone_number
+        self.pwk = None
+
+    def destination(self):
+        return str(self.phone_number)
+
+    def describe(self):
+        return f"📞 Numara: {self.phone_number}"
+
+    def load(self):
+        # pywhatkit import edilirken ekran/tarayıcı ister, sadece gerekince yüklenir
+        if self.pwk is None:
+            import pywhatkit
+            self.pwk = pywhatkit
+        return self.pwk
+
+    def send_text(self, message):
+        try:
+            print("   ⏳ WhatsApp Web açılıyor ve mesaj gönderiliyor...")
+            self.load().sendwhatmsg_instantly(
+                self.phone_number,
+                message,
+                wait_time=10,  # send_message.py'deki çalışan değer
+                tab_close=True  # send_message.py'deki çalışan değer
+            )
+            print("   ✅ Mesaj gönderildi!")
+            return True
+        except Exception as e:
+            print(f"   ✗ Mesaj gönderilemedi: {e}")
+            return False
+
+    def send_image(self, message, image_path):
+        print(f"   📎 Görsel eki: {os.path.basename(image_path)}")
+        try:
+            self.load().sendwhats_image(
+                self.phone_number,
+                image_path,
+                message,
+                wait_time=10,  # send_message.py'deki çalışan değer
+                tab_close=True  # send_message.py'deki çalışan değer
+            )
+            print("   ✅ Görsel ve mesaj gönderildi!")
+            return True
+        except Exception as e:
+            print(f"   ⚠️ Görsel gönderilemedi ({e}), sadece metin gönderiliyor...")
+            return self.send_text(message)
+
+
+class WebhookBackend(HttpBackend):
+    """
+    Herhangi bir HTTP adresine JSON olarak gönderim (Slack, Discord, Mattermost,
+    kendi sunucunuz...)
+
+    Gövde: {"text": mesaj, "image": görsel dosya adı veya null}. 2xx yanıtlar
+    başarılı sayılır.
+    """
+
+    name = "Webhook"
+    rate_limit = (10.0, 10)
+
+    def __init__(self, url, headers=None, text_field="text", pool_size=1, on_rate_limited=None):
+        """
+        Args:
+            url (str): İsteğin gönderileceği adres
+            headers (dict): Ek HTTP başlıkları (örn: {"Authorization": "Bearer ..."})
+            text_field (str): Mesajın konulacağı JSON alanı (Slack/Mattermost "text",
+                Discord "content")
+        """
+        super().__init__(pool_size, on_rate_limited)
+        self.url = url
+        self.headers = headers or {}
+        self.text_field = text_field
+
+    def destination(self):
+        return self.url
+
+    def describe(self):
+        return f"🌐 Adres: {self.url}"
+
+    def post(self, payload):
+        try:
+            response = self.request("webhook", self.url, json=payload, headers=self.headers)
+        except Exception as e:
+            print(f"   ✗ Webhook isteği gönderilemedi: {e}")
+            return False
+
+        if 200 <= response.status_code < 300:
+            print("   ✅ Mesaj gönderildi!")
+            return True
+        if response.status_code == 429:
+            retry_after = DEFAULT_RETRY_AFTER
+            try:
+                retry_after = int(response.headers.get("Retry-After", retry_after))
+            except ValueError:
+                pass
+            self.rate_limited(retry_after)
+            return False
+        print(f"   ✗ Webhook hatası (HTTP {response.status_code})")
+        return False
+
+    def send_text(self, message):
+        return self.post({self.text_field: message[:self.message_limit], "image": None})
+
+    def send_image(self, message, image_path):
+        # Dosya gönderilmez, sadece adı iletilir (ek mail klasöründe saklanıyor)
+        return self.post({self.text_field: message[:self.message_limit], "image": os.path.basename(image_path)})
+
+
+class FileBackend(NotifierBackend):
+    """
+    Bildirimleri dosyaya ekler veya ekrana yazar (path "-" ise)
+
+    Sunucuda log toplamak, başka bir programa dosya üzerinden aktarmak veya
+    kurulum sırasında denemek için kullanılır.
+    """
+
+    name = "Dosya"
+    rate_limit = (1000.0, 1000)
+
+    def __init__(self, path="-", on_rate_limited=None):
+        """
+        Args:
+            path (str): Bildirimlerin ekleneceği dosya ("-" veya "stdout" ise ekran)
+        """
+        super().__init__(on_rate_limited)
+        self.path = path
+        self.lock = threading.Lock()
+        self.to_stdout = path in ("-", "stdout")
+        if not self.to_stdout:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def destination(self):
+        return "stdout" if self.to_stdout else self.path
+
+    def describe(self):
+        return "🖥️  Ekran" if self.to_stdout else f"📝 Dosya: {self.path}"
+
+    def send_text(self, message):
+        entry = f"===== {time.strftime('%Y-%m-%d %H:%M:%S')} =====\n{message}\n\n"
+        try:
+            with self.lock:
+                if self.to_stdout:
+                    print(entry, end="", flush=True)
+                else:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(entry)
+            return True
+        except OSError as e:
+            print(f"   ✗ Bildirim dosyaya yazılamadı: {e}")
+            return False
+
+    def send_image(self, message, image_path):
+        return self.send_text(f"{message}\n📎 {image_path}")
+
+
+# Kanal türü -> backend fabrikası: factory(ayarlar, pool_size, on_rate_limited)
+BACKENDS = {}
+
+
+def register_backend(name, factory):
+    """
+    Yeni bir bildirim kanalı türü ekle
+
+    Args:
+        name (str): Config'teki "type" değeri (örn: "slack")
+        factory (callable): factory(settings, pool_size, on_rate_limited) -> NotifierBackend
+    """
+    BACKENDS[name.lower()] = factory
+
+
+def _telegram_factory(settings, pool_size, on_rate_limited):
+    if not settings.get("bot_token") or not settings.get("chat_id"):
+        return None
+    return TelegramBackend(settings["bot_token"], settings["chat_id"], pool_size, on_rate_limited)
+
+
+def _whatsapp_factory(settings, pool_size, on_rate_limited):
+    if not settings.get("phone_number"):
+        return None
+    api = settings.get("api") or {}
+    if api.get("token") and api.get("phone_number_id"):
+        return WhatsAppCloudBackend(
+            settings["phone_number"],
+            api["token"],
+            api["phone_number_id"],
+            api_url=api.get("api_url", WHATSAPP_API_URL),
+            pool_size=pool_size,
+            on_rate_limited=on_rate_limited
+        )
+    return PywhatkitBackend(settings["phone_number"], on_rate_limited)
+
+
+def _webhook_factory(settings, pool_size, on_rate_limited):
+    if not settings.get("url"):
+        return None
+    return WebhookBackend(
+        settings["url"],
+        headers=settings.get("headers"),
+        text_field=settings.get("text_field", "text"),
+        pool_size=pool_size,
+        on_rate_limited=on_rate_limited
+    )
+
+
+def _file_factory(settings, pool_size, on_rate_limited):
+    return FileBackend(settings.get("path", "-"), on_rate_limited)
+
+
+register_backend("telegram", _telegram_factory)
+register_backend("whatsapp", _whatsapp_factory)
+register_backend("webhook", _webhook_factory)
+register_backend("file", _file_factory)
+
+
+def build_backend(settings, pool_size=1, on_rate_limited=None):
+    """
+    Kanal ayarlarından backend oluştur
+
+    Args:
+        settings (dict): {"type": "telegram"|"whatsapp"|"webhook"|"file", ...türe özel ayarlar}
+        pool_size (int): HTTP backend'leri için bağlantı sayısı
+        on_rate_limited (callable): HTTP 429'da çağrılır
+
+    Returns:
+        NotifierBackend: Backend (tür bilinmiyorsa veya ayarlar eksikse None)
+    """
+    factory = BACKENDS.get(str(settings.get("type", "")).lower())
+    if factory is None:
+        return None
+    return factory(settings, pool_size, on_rate_limited)
+
+
+def platform_settings(platform, phone_number=None, telegram_token=None, telegram_chat_id=None,
+                      whatsapp_api=None):
+    """Eski tek platform parametrelerini kanal ayarlarına çevir"""
+    return {
+        "type": platform.lower(),
+        "bot_token": telegram_token,
+        "chat_id": telegram_chat_id,
+        "phone_number": phone_number,
+        "api": whatsapp_api
+    }
@@ -0,0 +1,195 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+# Tekrar denemeler arası bekleme: 5 sn, 10 sn, 20 sn, ... en fazla 1 saat
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 3600
+
+# Bu kadar tamamlanmış kayıt birikince dosya sadece bekleyenlerle yeniden yazılır
+COMPACT_THRESHOLD = 500
+
+
+def backoff_delay(attempts, base=None, max_delay=None):
+    """
+    Jitter'lı üstel bekleme süresi
+
+    Süre her denemede ikiye katlanır; yarısı sabit, yarısı rastgeledir. Böylece
+    aynı anda başarısız olan bildirimler aynı anda tekrar denenmez.
+
+    Args:
+        attempts (int): Şimdiye kadarki başarısız deneme sayısı (1'den başlar)
+        base (float): İlk bekleme süresi (varsayılan RETRY_BASE_DELAY)
+        max_delay (float): En uzun bekleme süresi (varsayılan RETRY_MAX_DELAY)
+
+    Returns:
+        float: Bir sonraki denemeye kadar beklenecek süre (saniye)
+    """
+    base = RETRY_BASE_DELAY if base is None else base
+    max_delay = RETRY_MAX_DELAY if max_delay is None else max_delay
+    delay = min(max_delay, base * 2 ** max(0, attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    return str(value)
+
+
+class NotificationOutbox:
+    """
+    Gönderilmemiş bildirimleri diskte saklayan kalıcı giden kutusu
+
+    Her bildirim gönderilmeden önce dosyaya eklenir, başarıyla gönderilince
+    silindi olarak işaretlenir. Dosya sadece sonuna ekleme yapılan JSON satırlarından
+    oluşur: {"op": "add"|"retry"|"done", "id": ...}. Program yeniden başladığında
+    kayıtlar okunur ve tamamlanmamış bildirimler tekrar denenir.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Giden kutusu dosyası (örn: tracked_replies/.notification_outbox.jsonl)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = {}       # {id: kayıt}
+        self.in_flight = set()  # Şu an kuyrukta, özette veya gönderilmekte olan kayıtlar
+        self.done_count = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.load()
+
+    def load(self):
+        """Dosyadaki kayıtları okuyup bekleyen bildirimleri çıkar"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Yazılırken kesilmiş son satır
+                    continue
+
+                op = record.get("op")
+                entry_id = record.get("id")
+                if op == "add":
+                    self.pending[entry_id] = record
+                elif op == "retry" and entry_id in self.pending:
+                    self.pending[entry_id]["attempts"] = record["attempts"]
+                    self.pending[entry_id]["next_attempt"] = record["next_attempt"]
+                elif op == "done":
+                    self.pending.pop(entry_id, None)
+                    self.done_count += 1
+
+    def _append(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, mail_data, source, attachment_paths=None):
+        """
+        Bildirimi gönderilmeden önce kaydet
+
+        Returns:
+            str: Kayıt ID'si (gönderim sonucunu bildirmek için)
+        """
+        record = {
+            "op": "add",
+            "id": uuid.uuid4().hex,
+            "created": time.time(),
+            "attempts": 0,
+            "next_attempt": 0,
+            "mail_data": mail_data,
+            "source": source,
+            "attachment_paths": attachment_paths
+        }
+        with self.lock:
+            self._append(record)
+            self.pending[record["id"]] = record
+            self.in_flight.add(record["id"])
+        return record["id"]
+
+    def done(self, entry_id):
+        """Bildirim gönderildi (veya bilerek atlandı): kaydı kapat"""
+        if entry_id is None:
+            return
+        with self.lock:
+            self.in_flight.discard(entry_id)
+            if self.pending.pop(entry_id, None) is None:
+                return
+            self._append({"op": "done", "id": entry_id})
+            self.done_count += 1
+            if self.done_count >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def retry_later(self, entry_id):
+        """
+        Gönderim başarısız: bir sonraki denemeyi üstel beklemeyle planla
+
+        Returns:
+            float: Bir sonraki denemeye kadar beklenecek süre (saniye)
+        """
+        with self.lock:
+            self.in_flight.discard(entry_id)
+            record = self.pending.get(entry_id)
+            if record is None:
+                return 0
+            record["attempts"] += 1
+            delay = backoff_delay(record["attempts"])
+            record["next_attempt"] = time.time() + delay
+            self._append({
+                "op": "retry",
+                "id": entry_id,
+                "attempts": record["attempts"],
+                "next_attempt": record["next_attempt"]
+            })
+            return delay
+
+    def release(self, entry_id):
+        """Kayıt işlenemeden bırakıldı (örn: kuyruk dolu), tekrar deneyici alsın"""
+        with self.lock:
+            self.in_flight.discard(entry_id)
+
+    def take_due(self, limit=50):
+        """
+        Zamanı gelmiş ve işlenmekte olmayan kayıtları al
+
+        Returns:
+            list: Kayıtlar (alınanlar işleniyor olarak işaretlenir)
+        """
+        now = time.time()
+        due = []
+        with self.lock:
+            for entry_id, record in self.pending.items():
+                if entry_id in self.in_flight or record["next_attempt"] > now:
+                    continue
+                self.in_flight.add(entry_id)
+                due.append(record)
+                if len(due) >= limit:
+                    break
+        return due
+
+    def count(self):
+        """Bekleyen bildirim sayısı"""
+        with self.lock:
+            return len(self.pending)
+
+    def _compact(self):
+        """Dosyayı sadece bekleyen kayıtlarla yeniden yaz (kilit tutulurken çağrılır)"""
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            for record in self.pending.values():
+                f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+        self.done_count = 0
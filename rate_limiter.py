@@ -0,0 +1,116 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket: saniyede rate kadar token dolar, en fazla capacity kadar birikir
+
+    Her gönderim bir token harcar. Boştayken biriken token'lar kısa bir
+    patlamaya (burst) izin verir, uzun vadede hız rate ile sınırlı kalır.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Args:
+            rate (float): Saniyede eklenen token (None veya 0 ise sınırsız)
+            capacity (int): Biriktirilebilecek en fazla token
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Bir token alınabilmesi için beklenmesi gereken süre (saniye)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        if not self.rate or self.tokens >= 1:
+            return blocked
+        return max(blocked, (1 - self.tokens) / self.rate)
+
+    def consume(self, now=None):
+        """Bir token harca (önce wait_time ile kontrol edilmeli)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.rate:
+            self.tokens -= 1
+
+    def block(self, seconds):
+        """Sunucu istediği için (örn: HTTP 429) belirli süre hiç gönderme"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """
+    Anahtar bazında token bucket'ları tutar
+
+    Bir gönderim için birden fazla bucket (örn: hedef sohbet ve kaynak)
+    birlikte kontrol edilir; token sadece hepsi uygunsa harcanır.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def bucket(self, key, rate, capacity=1):
+        """
+        Anahtarın bucket'ını döndür (yoksa oluştur)
+
+        Args:
+            key (tuple): Örn: ("telegram", chat_id) veya ("telegram", chat_id, kaynak)
+            rate (float): Saniyede eklenen token
+            capacity (int): En fazla token (burst)
+        """
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, capacity)
+                self.buckets[key] = bucket
+            return bucket
+
+    def acquire(self, buckets):
+        """
+        Tüm bucket'lardan birer token almayı dene
+
+        Returns:
+            float: 0 ise token alındı; değilse beklenmesi gereken süre (saniye),
+                   bu durumda hiçbir bucket'tan token harcanmaz
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait = max(bucket.wait_time(now) for bucket in buckets)
+            if wait > 0:
+                return wait
+            for bucket in buckets:
+                bucket.consume(now)
+            return 0
+
+    def wait_time(self, buckets):
+        """Token harcamadan beklenmesi gereken süreyi döndür"""
+        with self.lock:
+            now = time.monotonic()
+            return max(bucket.wait_time(now) for bucket in buckets)
+
+    def blocked_time(self, buckets):
+        """Sunucu isteğiyle (HTTP 429) kapatılan bucket'lar için kalan süre"""
+        now = time.monotonic()
+        return max(max(0.0, bucket.blocked_until - now) for bucket in buckets)
+
+    def block(self, key, seconds):
+        """Anahtarın bucket'ını belirli süre kapat (bucket yoksa etkisiz)"""
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket:
+                bucket.block(seconds)
+
+
+# Tüm bildirim yöneticileri aynı hedef sohbet için aynı limiti paylaşır
+shared_limiter = RateLimiter()
@@ -1,12 +1,15 @@
 import imaplib
-import email
 from email.header import decode_header
-import time
 import os
 import json
 from datetime import datetime
 from pathlib import Path
-from notification_manager import MailNotificationManager
+from notification_manager import create_notification_manager
+from keyword_matcher import KeywordMatcher
+from uid_state import UidState, UidCheckpoint, get_uidvalidity, get_max_uid, search_new_uids
+from imap_idle import supports_idle, wait_for_new_mail
+from imap_fetch import fetch_messages, DEFAULT_FETCH_BATCH_SIZE
+from mail_parser import LazyMail, get_attachment_names, save_attachment, save_raw_email
 
 class MailReceiver:
     """Mail alıcı sınıfı - IMAP protokolü ile mail sunucusuna bağlanır"""
@@ -14,7 +17,14 @@ class MailReceiver:
     def __init__(self, imap_server, email_address, password, check_interval=60, 
                  trigger_keywords=None, save_folder="saved_emails", 
                  platform="telegram", telegram_token=None, telegram_chat_id=None, 
-                 whatsapp_phone=None, throttle_seconds=300):
+                 whatsapp_phone=None, throttle_seconds=300, use_idle=True,
+                 fetch_batch_size=DEFAULT_FETCH_BATCH_SIZE,
+                 async_notifications=True, notification_queue_size=100,
+                 notification_digest=True, notification_rate_limit=None,
+                 notification_outbox=True, whatsapp_api=None,
+                 notification_channels=None, notification_manager=None,
+                 archive=None, json_files=True, attachment_store=None,
+                 segment_writer=None, raw_spool=None):
         """
         Args:
             imap_server (str): IMAP sunucu adresi (örn: imap.gmail.com)
@@ -28,36 +38,70 @@ class MailReceiver:
             telegram_chat_id (str): Telegram chat ID
             whatsapp_phone (str): WhatsApp bildirim telefon numarası (örn: "+905378284599")
             throttle_seconds (int): Bildirimler arası minimum bekleme süresi
+            use_idle (bool): Sunucu destekliyorsa IMAP IDLE ile anlık bildirim bekle
+            fetch_batch_size (int): Tek FETCH komutunda çekilecek en fazla mail sayısı
+            async_notifications (bool): Bildirimleri arka plan kuyruğundan gönder (mail akışı beklemez)
+            notification_queue_size (int): Gönderim bekleyen en fazla bildirim sayısı
+            notification_digest (bool): Throttle süresinde gelen bildirimleri özet olarak gönder
+            notification_rate_limit (dict): Hedef/kaynak bazlı hız limiti ayarları
+            notification_outbox (bool): Gönderilemeyen bildirimleri diskte sakla ve tekrar dene
+            whatsapp_api (dict): WhatsApp Cloud API ayarları (token, phone_number_id, api_url);
+                verilmezse WhatsApp mesajları pywhatkit ile gönderilir
+            notification_channels (list): Bildirimlerin aynı anda gönderileceği kanallar
+                (telegram, whatsapp, webhook, file); verilirse platform ayarlarının yerine geçer
+            notification_manager: Hazır bildirim yöneticisi (birden fazla hesap aynı
+                yöneticiyi paylaşır); verilirse yukarıdaki bildirim ayarları kullanılmaz
+            archive (MailArchive): Tetiklenen maillerin de yazılacağı SQLite arşivi
+            json_files (bool): Her mail için ayrıca JSON dosyası yaz (arşiv varken kapatılabilir)
+            attachment_store (AttachmentStore): Verilirse ekler kayıt klasörü yerine
+                içerik özetiyle adlandırılan ortak depoya bir kez yazılır
+            segment_writer (SegmentWriter): Verilirse JSON kayıtları ayrı dosyalar yerine
+                gün gün dönen JSONL segmentlerine eklenir
+            raw_spool (MaildirSpool): Verilirse ham mail kayıt klasörüne .eml olarak değil,
+                tüm takip sistemlerinin paylaştığı Maildir'e bir kez yazılır
         """
         self.imap_server = imap_server
         self.email_address = email_address
         self.password = password
         self.check_interval = check_interval
+        self.use_idle = use_idle
+        self.fetch_batch_size = fetch_batch_size
         self.mail = None
-        self.processed_email_ids = set()  # İşlenmiş mail ID'lerini tut
-        self.trigger_keywords = [kw.lower() for kw in trigger_keywords] if trigger_keywords else []
         self.save_folder = save_folder
+        self.archive = archive
+        self.json_files = json_files or archive is None
+        self.attachment_store = attachment_store
+        self.segment_writer = segment_writer
+        self.raw_spool = raw_spool
+        
+        # Anahtar kelime otomatı bir kez kurulur (büyük/küçük harf ve İ/ı duyarsız)
+        self.keyword_matcher = KeywordMatcher()
+        self.set_trigger_keywords(trigger_keywords or [])
+        
+        # UID takibi - sadece son görülen UID'den sonra gelen mailler sorgulanır
+        self.folder = "INBOX"
+        self.uid_state = UidState(os.path.join(self.save_folder, ".uid_state.json"))
         
         # Klasörü oluştur
         if self.trigger_keywords:
             Path(self.save_folder).mkdir(parents=True, exist_ok=True)
         
-        # Bildirim yöneticisi (Telegram veya WhatsApp)
-        self.notification_manager = None
-        if platform == "telegram" and telegram_token and telegram_chat_id:
-            self.notification_manager = MailNotificationManager(
-                platform="telegram",
+        # Bildirim yöneticisi (Telegram, WhatsApp veya config'teki tüm kanallar)
+        self.notification_manager = notification_manager
+        if self.notification_manager is None:
+            self.notification_manager = create_notification_manager(
+                platform=platform,
                 telegram_token=telegram_token,
                 telegram_chat_id=telegram_chat_id,
+                whatsapp_phone=whatsapp_phone,
+                whatsapp_api=whatsapp_api,
+                channels=notification_channels,
                 throttle_seconds=throttle_seconds,
-                enabled=True
-            )
-        elif platform == "whatsapp" and whatsapp_phone:
-            self.notification_manager = MailNotificationManager(
-                platform="whatsapp",
-                phone_number=whatsapp_phone,
-                throttle_seconds=throttle_seconds,
-                enabled=True
+                async_send=async_notifications,
+                queue_size=notification_queue_size,
+                digest=notification_digest,
+                rate_limit=notification_rate_limit,
+                outbox_folder=self.save_folder if notification_outbox else None
             )
     
     def connect(self):
@@ -102,6 +146,10 @@ class MailReceiver:
     
     def get_email_body(self, msg):
         """Email içeriğini al"""
+        # Ortak akıştan gelen mail gövdesini kendisi (veya worker süreç) çıkarır
+        if isinstance(msg, LazyMail):
+            return msg.body
+        
         body = ""
         
         if msg.is_multipart():
@@ -122,20 +170,38 @@ class MailReceiver:
         
         return body
     
+    def set_trigger_keywords(self, keywords):
+        """
+        Tetikleyici kelimeleri ayarla veya yeniden yükle
+        
+        Args:
+            keywords (list): Tetiklenecek anahtar kelimeler
+        """
+        self.trigger_keywords = list(keywords)
+        self.keyword_matcher.set_keywords(self.trigger_keywords)
+    
+    def find_triggered_keywords(self, subject, body, from_address):
+        """
+        Mailde hangi trigger kelimelerin nerede geçtiğini bul
+        
+        Returns:
+            dict: {anahtar kelime: [(alan, konum), ...]} - alan: subject, body, from
+        """
+        matches = {}
+        fields = (("subject", subject), ("body", body), ("from", from_address))
+        for field, text in fields:
+            for keyword, position in self.keyword_matcher.iter_matches(text or ""):
+                matches.setdefault(keyword, []).append((field, position))
+        return matches
+    
     def check_trigger(self, subject, body, from_address):
         """Mailde trigger kelimeleri kontrol et"""
         if not self.trigger_keywords:
             return False
         
-        # Kontrol edilecek tüm metni birleştir ve küçük harfe çevir
-        full_text = f"{subject} {body} {from_address}".lower()
-        
-        # Herhangi bir trigger kelime geçiyor mu?
-        for keyword in self.trigger_keywords:
-            if keyword in full_text:
-                return True
-        
-        return False
+        # Tek geçişte herhangi bir trigger kelime geçiyor mu?
+        full_text = f"{subject} {body} {from_address}"
+        return self.keyword_matcher.contains_any(full_text)
     
     def save_email_to_file(self, email_data, msg):
         """Maili dosyaya kaydet"""
@@ -148,6 +214,14 @@ class MailReceiver:
             json_filename = f"{timestamp}_email_{email_id_str}.json"
             json_path = os.path.join(self.save_folder, json_filename)
             
+            # Ham mail: ortak Maildir'e bir kez (başka kurala da takıldıysa aynı dosya) veya .eml
+            if self.raw_spool:
+                eml_path = self.raw_spool.store(msg)
+            else:
+                eml_filename = f"{timestamp}_email_{email_id_str}.eml"
+                eml_path = os.path.join(self.save_folder, eml_filename)
+                save_raw_email(msg, eml_path)
+            
             # Ek dosya bilgilerini topla
             attachments = []
             if msg.is_multipart():
@@ -155,11 +229,14 @@ class MailReceiver:
                     if part.get_content_disposition() == "attachment":
                         filename = part.get_filename()
                         if filename:
-                            # Ek dosyayı kaydet
-                            attachment_path = os.path.join(self.save_folder, f"{timestamp}_{filename}")
                             try:
-                                with open(attachment_path, "wb") as f:
-                                    f.write(part.get_payload(decode=True))
+                                if self.attachment_store:
+                                    # Ek deposunda mail .eml yoluyla ekin sahibi olarak kaydedilir
+                                    attachments.append(self.attachment_store.put(part, eml_path, filename))
+                                    continue
+                                # Ek dosyayı kaydet
+                                attachment_path = os.path.join(self.save_folder, f"{timestamp}_{filename}")
+                                save_attachment(part, attachment_path)
                                 attachments.append({
                                     "filename": filename,
                                     "saved_as": attachment_path
@@ -177,19 +254,35 @@ class MailReceiver:
                 "from": email_data["from"],
                 "date": email_data["date"],
                 "body": email_data["body"],
+                "matched_keywords": email_data.get("matched_keywords", []),
                 "attachments": attachments,
+                "eml_path": eml_path,
                 "saved_at": datetime.now().isoformat()
             }
             
-            # JSON dosyasını kaydet
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(email_json, f, ensure_ascii=False, indent=2)
+            # JSON kaydı: segmente ekle veya ayrı dosyaya yaz
+            if self.segment_writer:
+                self.segment_writer.append(email_json, key=os.path.splitext(json_filename)[0])
+                json_path = None
+            elif self.json_files:
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(email_json, f, ensure_ascii=False, indent=2)
+            else:
+                json_path = None
             
-            # .eml formatında da kaydet (orijinal mail)
-            eml_filename = f"{timestamp}_email_{email_id_str}.eml"
-            eml_path = os.path.join(self.save_folder, eml_filename)
-            with open(eml_path, "wb") as f:
-                f.write(msg.as_bytes())
+            email_data["attachments"] = attachments
+            
+            # Arşive ekle (kontrol turu sonunda toplu yazılır)
+            if self.archive:
+                self.archive.add(
+                    "keyword", email_json,
+                    rule=", ".join(email_json["matched_keywords"]),
+                    account=self.email_address,
+                    message_id=msg.get("Message-ID"),
+                    eml_path=eml_path,
+                    json_path=json_path,
+                    attachments=attachments
+                )
             
             return json_path, eml_path
             
@@ -197,6 +290,13 @@ class MailReceiver:
             print(f"✗ Mail kaydetme hatası: {e}")
             return None, None
     
+    def flush_storage(self):
+        """Turda biriken arşiv ve segment kayıtlarını yaz"""
+        if self.archive:
+            self.archive.flush()
+        if self.segment_writer:
+            self.segment_writer.flush()
+    
     def process_email(self, email_id, msg):
         """Gelen maili işle"""
         # Email bilgilerini al
@@ -205,12 +305,16 @@ class MailReceiver:
         date = msg.get("Date")
         body = self.get_email_body(msg)
         
-        # Trigger kontrolü
-        is_triggered = self.check_trigger(subject, body, from_address)
+        # Trigger kontrolü - hangi kelimeler nerede geçiyor?
+        matched_keywords = self.find_triggered_keywords(subject, body, from_address)
+        is_triggered = bool(matched_keywords)
         
         print("\n" + "="*50)
         if is_triggered:
             print(f"🚨 TETİKLENDİ! YENİ MAİL GELDİ!")
+            for keyword, locations in matched_keywords.items():
+                fields = sorted({field for field, _ in locations})
+                print(f"🔑 '{keyword}' ({', '.join(fields)})")
         else:
             print(f"📧 YENİ MAİL GELDİ!")
         print("="*50)
@@ -221,47 +325,41 @@ class MailReceiver:
         print("="*50 + "\n")
         
         # Ekleri kontrol et
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_disposition() == "attachment":
-                    filename = part.get_filename()
-                    if filename:
-                        print(f"📎 Ek dosya: {filename}")
+        for filename in get_attachment_names(msg):
+            print(f"📎 Ek dosya: {filename}")
         
         email_data = {
             "id": email_id,
             "subject": subject,
             "from": from_address,
             "date": date,
-            "body": body
+            "body": body,
+            "matched_keywords": list(matched_keywords)
         }
         
         # Eğer tetiklendiyse maili kaydet
         if is_triggered:
             print(f"💾 Mail kaydediliyor...")
             json_path, eml_path = self.save_email_to_file(email_data, msg)
-            if json_path:
+            if eml_path:
                 print(f"✅ Mail kaydedildi:")
-                print(f"   📄 JSON: {json_path}")
+                if json_path:
+                    print(f"   📄 JSON: {json_path}")
+                if self.segment_writer:
+                    print(f"   🗃️ Segment: {self.segment_writer.folder}/")
+                if self.archive:
+                    print(f"   🗄️ Arşiv: {self.archive.path}")
                 print(f"   📧 EML: {eml_path}")
             
             # WhatsApp bildirimi gönder
             if self.notification_manager:
-                # Ek dosya yollarını topla
-                attachment_paths = []
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        if part.get_content_disposition() == "attachment":
-                            filename = part.get_filename()
-                            if filename:
-                                attachment_path = os.path.join(self.save_folder, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}")
-                                if os.path.exists(attachment_path):
-                                    attachment_paths.append(attachment_path)
+                # Kaydedilen eklerin yolları
+                attachment_paths = [a["saved_as"] for a in email_data.get("attachments", []) if "saved_as" in a]
                 
                 # Bildirim kaynağı belirle
                 source = "Anahtar Kelime Takip"
-                if self.trigger_keywords:
-                    source = f"Anahtar Kelime Takip ({', '.join(self.trigger_keywords[:2])})"
+                if matched_keywords:
+                    source = f"Anahtar Kelime Takip ({', '.join(list(matched_keywords)[:2])})"
                 
                 self.notification_manager.send_notification(
                     mail_data=email_data,
@@ -277,50 +375,51 @@ class MailReceiver:
         """Yeni mailleri kontrol et"""
         try:
             # INBOX'ı seç
-            self.mail.select("INBOX")
-            
-            # Okunmamış mailleri ara
-            status, messages = self.mail.search(None, 'UNSEEN')
+            self.mail.select(self.folder)
+            uidvalidity = get_uidvalidity(self.mail)
+            checkpoint = UidCheckpoint(self.uid_state, self.email_address, self.folder,
+                                       uidvalidity, self.fetch_batch_size)
+            last_uid = checkpoint.last_uid
             
-            if status != "OK":
-                print("Mail arama hatası")
+            if skip_existing:
+                if last_uid:
+                    # Daha önce kaydedilmiş UID varsa kaldığı yerden devam et
+                    print(f"ℹ️  UID {last_uid} sonrasından devam ediliyor.")
+                    return []
+                
+                # İlk çalıştırmada mevcut tüm mailleri işlenmiş olarak işaretle
+                max_uid = get_max_uid(self.mail)
+                self.uid_state.set_last_uid(self.email_address, self.folder, uidvalidity, max_uid)
+                print(f"ℹ️  UID {max_uid} ve öncesi mevcut mailler atlandı. Sadece yeni gelenler gösterilecek.")
                 return []
             
-            email_ids = messages[0].split()
+            # Sadece son görülen UID'den sonra gelen okunmamış mailleri al
+            new_uids = search_new_uids(self.mail, last_uid, "UNSEEN")
             
-            if skip_existing:
-                # İlk çalıştırmada mevcut tüm okunmamış mailleri işlenmiş olarak işaretle
-                for email_id in email_ids:
-                    self.processed_email_ids.add(email_id)
-                print(f"ℹ️  {len(email_ids)} mevcut okunmamış mail atlandı. Sadece yeni gelenler gösterilecek.")
+            if new_uids is None:
+                print("Mail arama hatası")
                 return []
             
-            # Sadece daha önce işlenmemiş mailleri al
-            new_email_ids = [eid for eid in email_ids if eid not in self.processed_email_ids]
-            
-            if not new_email_ids:
+            new_uids = checkpoint.filter_new(new_uids)
+            if not new_uids:
                 return []
             
-            print(f"🔔 {len(new_email_ids)} yeni mail bulundu!")
+            print(f"🔔 {len(new_uids)} yeni mail bulundu!")
             
             new_emails = []
             
-            for email_id in new_email_ids:
-                # Mail içeriğini al
-                status, msg_data = self.mail.fetch(email_id, "(RFC822)")
-                
-                if status != "OK":
-                    continue
-                
-                # Email mesajını parse et
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        email_data = self.process_email(email_id, msg)
-                        new_emails.append(email_data)
-                        
-                        # Bu mail ID'sini işlenmiş olarak işaretle
-                        self.processed_email_ids.add(email_id)
+            try:
+                # Mail içeriklerini toplu FETCH ile al
+                for uid, raw_email in fetch_messages(self.mail, new_uids, "(RFC822)", self.fetch_batch_size):
+                    # Email mesajını parse et
+                    msg = LazyMail(raw_email)
+                    email_data = self.process_email(uid, msg)
+                    new_emails.append(email_data)
+                    
+                    # Bu UID'yi işlenmiş olarak işaretle (her batch sonunda diske yazılır)
+                    checkpoint.mark(uid)
+            finally:
+                checkpoint.commit()
             
             return new_emails
             
@@ -331,12 +430,16 @@ class MailReceiver:
     def start_listening(self):
         """Mail dinlemeyi başlat - sürekli yeni mailleri kontrol et"""
         print(f"📬 Mail dinleme başlatıldı...")
-        print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
-        print(f"🔄 Ctrl+C ile durdurun\n")
         
         if not self.connect():
             return
         
+        if self.use_idle and supports_idle(self.mail):
+            print(f"⚡ IMAP IDLE aktif: yeni mailler anında yakalanacak")
+        else:
+            print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
+        print(f"🔄 Ctrl+C ile durdurun\n")
+        
         try:
             # İlk çalıştırmada mevcut okunmamış mailleri atla
             print("🔍 Mevcut okunmamış mailler kontrol ediliyor...")
@@ -348,16 +451,21 @@ class MailReceiver:
                 print(f"[{timestamp}] Mail kontrol ediliyor...")
                 
                 new_emails = self.check_new_emails()
+                self.flush_storage()
                 
                 if not new_emails:
                     print("📭 Yeni mail yok")
                 
-                time.sleep(self.check_interval)
+                wait_for_new_mail(self.mail, self.check_interval, self.use_idle)
                 
         except KeyboardInterrupt:
             print("\n\n⏹ Mail dinleme durduruldu")
         finally:
             self.disconnect()
+            self.flush_storage()
+            # Kuyrukta bekleyen bildirimleri gönder
+            if self.notification_manager:
+                self.notification_manager.close()
 
 
 def main():
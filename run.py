@@ -1,3 +1,6 @@
+import asyncio
+import hashlib
+import re
 import threading
 import time
 import json
@@ -5,6 +8,28 @@ import os
 from receieveit import MailReceiver
 from track_replies import ReplyTracker
 from track_senders import SenderTracker
+from mail_fetcher import MailFetcher
+from async_engine import AsyncMailFetcher, AsyncTrackingEngine
+from account_pool import AccountWorkerPool
+from mail_parser import MailParserPool
+from mail_archive import MailArchive
+from attachment_store import AttachmentStore
+from mail_segments import SegmentWriter
+from maildir_spool import MaildirSpool
+from notification_manager import create_notification_manager
+
+
+# Çoklu hesapta UID durumları ve ortak giden kutuları bu klasörde tutulur
+ACCOUNT_STATE_FOLDER = "account_state"
+
+# Hesap tanımında ezilebilen config bölümleri
+ACCOUNT_SECTIONS = ("email_settings", "notification_settings", "keyword_tracking",
+                    "sender_tracking", "reply_tracking")
+
+
+def account_slug(name):
+    """Hesap adını dosya adında kullanılabilir hale getir"""
+    return re.sub(r"[^\w.@-]+", "_", name or "").strip("._") or "hesap"
 
 
 class ConfigManager:
@@ -46,11 +71,25 @@ class ConfigManager:
                 "imap_server": "imap.gmail.com",
                 "email_address": "",
                 "password": "",
-                "check_interval": 30
+                "check_interval": 30,
+                "use_idle": True,
+                "fetch_batch_size": 100,
+                "server_search": True,
+                "engine": "threads",
+                "parser_workers": 0
             },
             "notification_settings": {
                 "platform": "telegram",
                 "throttle_seconds": 300,
+                "async": True,
+                "queue_size": 100,
+                "digest": True,
+                "outbox": True,
+                "rate_limit": {
+                    "source_burst": 1,
+                    "destination_rate": 1.0,
+                    "destination_burst": 3
+                },
                 "telegram": {
                     "bot_token": "",
                     "chat_id": "",
@@ -58,8 +97,14 @@ class ConfigManager:
                 },
                 "whatsapp": {
                     "phone_number": "",
-                    "enabled": False
-                }
+                    "enabled": False,
+                    "api": {
+                        "token": "",
+                        "phone_number_id": "",
+                        "api_url": "https://graph.facebook.com/v19.0"
+                    }
+                },
+                "channels": []
             },
             "keyword_tracking": {
                 "enabled": False,
@@ -75,6 +120,30 @@ class ConfigManager:
                 "enabled": False,
                 "tracked_message_ids": {},
                 "save_folder": "tracked_replies"
+            },
+            "accounts": [],
+            "account_pool": {
+                "workers": 4,
+                "max_messages_per_turn": 50,
+                "metrics_interval": 300
+            },
+            "archive": {
+                "enabled": False,
+                "path": "mail_archive.db",
+                "json_files": True
+            },
+            "attachment_store": {
+                "enabled": False,
+                "path": "attachments"
+            },
+            "segments": {
+                "enabled": False,
+                "compression": "gzip",
+                "max_segment_mb": 64
+            },
+            "raw_spool": {
+                "enabled": False,
+                "path": "maildir"
             }
         }
     
@@ -124,252 +193,512 @@ class UnifiedMailTracker:
         self.config = config_manager.config
         self.threads = []
         self.running = False
+        self.notification_managers = {}  # {bildirim ayarları (JSON): ortak yönetici}
+        self.parser_pool = None
+        self.archive = None
+        self.attachment_store = None
+        self.raw_spool = None
+    
+    def get_account_configs(self):
+        """
+        Config'teki hesapları hazırla
+        
+        "accounts" listesi boşsa üst düzey ayarlar tek hesap olarak kullanılır.
+        Her hesap üst düzey bölümleri miras alır; hesapta verilen bölümlerin
+        anahtarları üst düzeydekileri tek tek ezer.
+        
+        Returns:
+            list: [(hesap adı, hesap config'i, UID durum dosyası)]
+        """
+        accounts = self.config.get('accounts') or []
+        if not accounts:
+            email_address = self.config.get('email_settings', {}).get('email_address')
+            return [(email_address, self.config, ".uid_state.json")]
+        
+        result = []
+        for account in accounts:
+            if not account.get('enabled', True):
+                continue
+            config = {
+                section: {**self.config.get(section, {}), **account.get(section, {})}
+                for section in ACCOUNT_SECTIONS
+            }
+            name = account.get('name') or config['email_settings'].get('email_address')
+            state_file = os.path.join(ACCOUNT_STATE_FOLDER, f"uid_state.{account_slug(name)}.json")
+            result.append((name, config, state_file))
+        return result
+    
+    def get_shared_notification_manager(self, config):
+        """
+        Aynı bildirim ayarlarını kullanan hesaplar için tek bildirim yöneticisi
+        
+        Yüzlerce hesapta her takip sistemi için ayrı kuyruk/worker açılmaz;
+        hız limitleri ve özetler de hedef başına ortak işler.
+        """
+        settings = config.get('notification_settings', {})
+        key = json.dumps(settings, sort_keys=True)
+        if key not in self.notification_managers:
+            params = self.get_notification_params(config)
+            outbox_folder = os.path.join(
+                ACCOUNT_STATE_FOLDER, f"notifications_{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+            )
+            self.notification_managers[key] = create_notification_manager(
+                platform=params["platform"],
+                telegram_token=params["telegram_token"],
+                telegram_chat_id=params["telegram_chat_id"],
+                whatsapp_phone=params["whatsapp_phone"],
+                whatsapp_api=params["whatsapp_api"],
+                channels=params["notification_channels"],
+                throttle_seconds=params["throttle_seconds"],
+                async_send=params["async_notifications"],
+                queue_size=params["notification_queue_size"],
+                digest=params["notification_digest"],
+                rate_limit=params["notification_rate_limit"],
+                outbox_folder=outbox_folder if params["notification_outbox"] else None
+            )
+        return self.notification_managers[key]
+    
+    def get_notification_params(self, config=None):
+        """Platform seçimine göre bildirim parametrelerini hazırla"""
+        config = config or self.config
+        notification_settings = config.get('notification_settings', {})
+        platform = notification_settings.get('platform', 'telegram')
+        telegram_settings = notification_settings.get('telegram', {})
+        whatsapp_settings = notification_settings.get('whatsapp', {})
+        
+        return {
+            "platform": platform,
+            "telegram_token": telegram_settings.get('bot_token') if platform == 'telegram' and telegram_settings.get('enabled') else None,
+            "telegram_chat_id": telegram_settings.get('chat_id') if platform == 'telegram' and telegram_settings.get('enabled') else None,
+            "whatsapp_phone": whatsapp_settings.get('phone_number') if platform == 'whatsapp' and whatsapp_settings.get('enabled') else None,
+            "throttle_seconds": notification_settings.get('throttle_seconds', 300),
+            "async_notifications": notification_settings.get('async', True),
+            "notification_queue_size": notification_settings.get('queue_size', 100),
+            "notification_digest": notification_settings.get('digest', True),
+            "notification_rate_limit": notification_settings.get('rate_limit'),
+            "notification_outbox": notification_settings.get('outbox', True),
+            "whatsapp_api": whatsapp_settings.get('api'),
+            "notification_channels": notification_settings.get('channels')
+        }
+    
+    def build_keyword_tracker(self, config=None, notification_manager=None):
+        """Anahtar kelime takip sistemini oluştur (receieveit.py)"""
+        print("\n🔑 Anahtar Kelime Takip Sistemi hazırlanıyor...")
+        
+        config = config or self.config
+        keyword_config = config.get('keyword_tracking', {})
+        email_settings = config.get('email_settings', {})
+        
+        keywords = keyword_config.get('keywords', [])
+        if not keywords:
+            print("   ⚠️  Anahtar kelime tanımlanmamış, atlanıyor...")
+            return None
+        
+        save_folder = keyword_config.get('save_folder', 'tracked_keyword_mails')
+        receiver = MailReceiver(
+            imap_server=email_settings.get('imap_server'),
+            email_address=email_settings.get('email_address'),
+            password=email_settings.get('password'),
+            check_interval=email_settings.get('check_interval', 30),
+            trigger_keywords=keywords,
+            save_folder=save_folder,
+            use_idle=email_settings.get('use_idle', True),
+            fetch_batch_size=email_settings.get('fetch_batch_size', 100),
+            notification_manager=notification_manager,
+            attachment_store=self.get_attachment_store(),
+            segment_writer=self.create_segment_writer(save_folder, config),
+            **self.get_storage_params(),
+            **self.get_notification_params(config)
+        )
+        
+        print(f"   ✓ {len(keywords)} anahtar kelime takip ediliyor")
+        return receiver
+    
+    def build_reply_tracker(self, config=None, notification_manager=None):
+        """Yanıt takip sistemini oluştur (config'ten)"""
+        print("\n💬 Yanıt Takip Sistemi hazırlanıyor...")
+        
+        config = config or self.config
+        reply_config = config.get('reply_tracking', {})
+        email_settings = config.get('email_settings', {})
+        
+        tracked_message_ids = reply_config.get('tracked_message_ids', {})
+        if not tracked_message_ids:
+            print("   ⚠️  Takip edilen mail bulunamadı, atlanıyor...")
+            print("   💡 Config dosyasına mail ekleyin veya interaktif mod kullanın:")
+            print("      python track_replies.py")
+            return None
+        
+        tracker = ReplyTracker(
+            imap_server=email_settings.get('imap_server'),
+            email_address=email_settings.get('email_address'),
+            password=email_settings.get('password'),
+            check_interval=email_settings.get('check_interval', 30),
+            use_idle=email_settings.get('use_idle', True),
+            fetch_batch_size=email_settings.get('fetch_batch_size', 100),
+            server_search=email_settings.get('server_search', True),
+            notification_manager=notification_manager,
+            **self.get_storage_params(),
+            **self.get_notification_params(config)
+        )
+        
+        # Config'ten tracked emails'leri yükle
+        tracker.set_tracked_emails(tracked_message_ids)
+        tracker.segment_writer = self.create_segment_writer(tracker.replies_folder, config)
+        
+        print(f"   ✓ {len(tracked_message_ids)} mail takip ediliyor:")
+        for msg_id, data in tracked_message_ids.items():
+            print(f"     • {data.get('subject', 'No subject')}")
+        
+        return tracker
+    
+    def build_sender_tracker(self, config=None, notification_manager=None):
+        """Gönderici takip sistemini oluştur (config'ten)"""
+        print("\n👤 Gönderici Takip Sistemi hazırlanıyor...")
+        
+        config = config or self.config
+        sender_config = config.get('sender_tracking', {})
+        email_settings = config.get('email_settings', {})
+        
+        tracked_senders = sender_config.get('tracked_senders', {})
+        if not tracked_senders:
+            print("   ⚠️  Takip edilen gönderici bulunamadı, atlanıyor...")
+            print("   💡 Config dosyasına gönderici ekleyin veya interaktif mod kullanın:")
+            print("      python track_senders.py")
+            return None
+        
+        tracker = SenderTracker(
+            imap_server=email_settings.get('imap_server'),
+            email_address=email_settings.get('email_address'),
+            password=email_settings.get('password'),
+            check_interval=email_settings.get('check_interval', 30),
+            use_idle=email_settings.get('use_idle', True),
+            fetch_batch_size=email_settings.get('fetch_batch_size', 100),
+            server_search=email_settings.get('server_search', True),
+            notification_manager=notification_manager,
+            attachment_store=self.get_attachment_store(),
+            **self.get_storage_params(),
+            **self.get_notification_params(config)
+        )
+        
+        # Config'ten tracked senders'ları yükle
+        tracker.tracked_senders = tracked_senders
+        tracker.segment_writer = self.create_segment_writer(tracker.save_folder, config)
+        
+        print(f"   ✓ {len(tracked_senders)} gönderici takip ediliyor:")
+        for email, data in tracked_senders.items():
+            print(f"     • {data.get('name', email)}")
+        
+        return tracker
+    
+    def get_parser_pool(self):
+        """
+        parser_workers > 0 ise tüm hesapların paylaştığı MIME parse süreç havuzu
+        
+        Returns:
+            MailParserPool: Havuz, kapalıysa None
+        """
+        workers = self.config.get('email_settings', {}).get('parser_workers', 0)
+        if workers and self.parser_pool is None:
+            self.parser_pool = MailParserPool(workers)
+            print(f"🧩 Mail parse havuzu: {workers} süreç")
+        return self.parser_pool
+    
+    def close_parser_pool(self):
+        """Parse havuzunun süreçlerini kapat"""
+        if self.parser_pool:
+            self.parser_pool.close()
+            self.parser_pool = None
+    
+    def get_archive(self):
+        """
+        archive.enabled ise tüm hesapların ve takip sistemlerinin paylaştığı SQLite arşivi
+        
+        Returns:
+            MailArchive: Arşiv, kapalıysa None
+        """
+        archive_settings = self.config.get('archive', {})
+        if archive_settings.get('enabled') and self.archive is None:
+            self.archive = MailArchive(archive_settings.get('path', 'mail_archive.db'))
+            print(f"🗄️ Mail arşivi: {self.archive.path}")
+        return self.archive
+    
+    def get_raw_spool(self):
+        """
+        raw_spool.enabled ise ham maillerin bir kez yazıldığı ortak Maildir
+        
+        Returns:
+            MaildirSpool: Spool, kapalıysa None
+        """
+        spool_settings = self.config.get('raw_spool', {})
+        if spool_settings.get('enabled') and self.raw_spool is None:
+            self.raw_spool = MaildirSpool(spool_settings.get('path', 'maildir'))
+            print(f"📧 Ham mail Maildir'i: {self.raw_spool.root}/")
+        return self.raw_spool
+    
+    def get_storage_params(self):
+        """Tüm takip sistemlerine verilecek ortak kayıt parametreleri (arşiv, Maildir)"""
+        return {
+            "archive": self.get_archive(),
+            "json_files": self.config.get('archive', {}).get('json_files', True),
+            "raw_spool": self.get_raw_spool()
+        }
+    
+    def close_archive(self):
+        """Bekleyen arşiv kayıtlarını yaz ve veritabanını kapat"""
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+    
+    def get_attachment_store(self):
+        """
+        attachment_store.enabled ise tüm hesapların paylaştığı, içerik özetiyle adlandırılan ek deposu
+        
+        Returns:
+            AttachmentStore: Depo, kapalıysa None
+        """
+        store_settings = self.config.get('attachment_store', {})
+        if store_settings.get('enabled') and self.attachment_store is None:
+            self.attachment_store = AttachmentStore(store_settings.get('path', 'attachments'))
+            print(f"📎 Ek deposu: {self.attachment_store.root}/")
+        return self.attachment_store
+    
+    def create_segment_writer(self, save_folder, config=None):
+        """
+        segments.enabled ise takip sisteminin JSON kayıtları için segment yazıcısı
+        
+        Segmentler kayıt klasörünün altındaki segments/ klasörüne, hesap
+        adresiyle başlayan dosyalara yazılır (hesaplar aynı klasörü paylaşabilir).
+        
+        Returns:
+            SegmentWriter: Yazıcı, kapalıysa None
+        """
+        segment_settings = self.config.get('segments', {})
+        if not segment_settings.get('enabled'):
+            return None
+        return SegmentWriter(
+            os.path.join(save_folder, "segments"),
+            prefix=(config or self.config).get('email_settings', {}).get('email_address'),
+            compression=segment_settings.get('compression', 'gzip'),
+            max_segment_bytes=segment_settings.get('max_segment_mb', 64) * 1024 * 1024
+        )
+    
+    def close_attachment_store(self):
+        """Ek deposunun veritabanını kapat"""
+        if self.attachment_store:
+            self.attachment_store.close()
+            self.attachment_store = None
     
-    def start_keyword_tracker(self):
-        """Anahtar kelime takip sistemini başlat (receieveit.py)"""
+    def create_fetcher(self, fetcher_class, keyword_tracker, reply_tracker, sender_tracker,
+                       config=None, state_file=".uid_state.json"):
+        """Email ayarlarıyla fetcher oluştur ve etkin takip sistemlerini işleyici olarak ekle"""
+        email_settings = (config or self.config).get('email_settings', {})
+        
+        fetcher = fetcher_class(
+            imap_server=email_settings.get('imap_server'),
+            email_address=email_settings.get('email_address'),
+            password=email_settings.get('password'),
+            check_interval=email_settings.get('check_interval', 30),
+            use_idle=email_settings.get('use_idle', True),
+            fetch_batch_size=email_settings.get('fetch_batch_size', 100),
+            server_search=email_settings.get('server_search', True),
+            state_file=state_file,
+            parser_pool=self.get_parser_pool()
+        )
+        
+        if keyword_tracker:
+            fetcher.add_handler("Anahtar Kelime Takip", keyword_tracker.process_email)
+        if sender_tracker:
+            fetcher.add_handler("Gönderici Takip", sender_tracker.process_email,
+                                header_filter=sender_tracker.get_tracked_sender,
+                                search_terms=sender_tracker.get_search_terms)
+        if reply_tracker:
+            fetcher.add_handler("Yanıt Takip", reply_tracker.process_email,
+                                header_filter=reply_tracker.find_replied_message_id,
+                                search_terms=reply_tracker.get_search_terms)
+        
+        # Turda yakalanan mailler arşive ve segmentlere tur sonunda toplu yazılır
+        for tracker in (keyword_tracker, sender_tracker, reply_tracker):
+            if tracker:
+                fetcher.add_poll_hook(tracker.flush_storage)
+        return fetcher
+    
+    def shutdown(self, *trackers):
+        """Bekleyen kayıtları yaz, ortak kaynakları ve bildirim yöneticilerini kapat"""
+        for tracker in trackers:
+            if tracker:
+                tracker.flush_storage()
+        self.close_parser_pool()
+        self.close_archive()
+        self.close_attachment_store()
+        self.close_notifications(*trackers)
+    
+    def close_notifications(self, *trackers):
+        """Kuyrukta bekleyen bildirimleri gönder ve bildirim yöneticilerini kapat"""
+        # Hesaplar arasında paylaşılan yönetici bir kez kapatılır
+        managers = {}
+        for tracker in trackers:
+            if tracker and tracker.notification_manager:
+                managers[id(tracker.notification_manager)] = tracker.notification_manager
+        for manager in managers.values():
+            manager.close()
+    
+    def run_pipeline(self, keyword_tracker, reply_tracker, sender_tracker):
+        """
+        Tek IMAP oturumu ile mailleri çek ve etkin takip sistemlerine dağıt
+        
+        Her yeni mail sunucudan bir kez indirilir, bir kez parse edilir ve
+        sırasıyla anahtar kelime, gönderici ve yanıt eşleştiricilerine verilir.
+        """
         try:
-            print("\n🔑 Anahtar Kelime Takip Sistemi başlatılıyor...")
+            fetcher = self.create_fetcher(MailFetcher, keyword_tracker, reply_tracker, sender_tracker)
             
-            keyword_config = self.config.get('keyword_tracking', {})
-            email_settings = self.config.get('email_settings', {})
-            notification_settings = self.config.get('notification_settings', {})
-            
-            keywords = keyword_config.get('keywords', [])
-            if not keywords:
-                print("   ⚠️  Anahtar kelime tanımlanmamış, atlanıyor...")
+            if not fetcher.connect():
                 return
             
-            # Platform seçimine göre parametreleri hazırla
-            platform = notification_settings.get('platform', 'telegram')
-            telegram_settings = notification_settings.get('telegram', {})
-            whatsapp_settings = notification_settings.get('whatsapp', {})
+            # İlk çalıştırmada daha önce gelmiş yanıtları da bul (ortak oturum üzerinden)
+            if reply_tracker and not fetcher.has_saved_state():
+                print("\n   Mevcut yanıtlar kontrol ediliyor...")
+                reply_tracker.mail = fetcher.mail
+                reply_tracker.check_for_replies()
+                reply_tracker.flush_storage()
             
-            receiver = MailReceiver(
-                imap_server=email_settings.get('imap_server'),
-                email_address=email_settings.get('email_address'),
-                password=email_settings.get('password'),
-                check_interval=email_settings.get('check_interval', 30),
-                trigger_keywords=keywords,
-                save_folder=keyword_config.get('save_folder', 'tracked_keyword_mails'),
-                platform=platform,
-                telegram_token=telegram_settings.get('bot_token') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                telegram_chat_id=telegram_settings.get('chat_id') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                whatsapp_phone=whatsapp_settings.get('phone_number') if platform == 'whatsapp' and whatsapp_settings.get('enabled') else None,
-                throttle_seconds=notification_settings.get('throttle_seconds', 300)
-            )
+            # Mevcut mailleri atla
+            print("\n   Mevcut mailler kontrol ediliyor...")
+            fetcher.skip_existing()
+            print("   ✅ Hazır! Yeni mailler tüm takip sistemlerine dağıtılacak.")
             
-            receiver.start_listening()
+            fetcher.run(stop_check=lambda: not self.running)
+            
+            fetcher.disconnect()
             
-        except KeyboardInterrupt:
-            print("\n   ⚠️ Anahtar Kelime Takip durduruldu (Ctrl+C)")
-            self.running = False
-            raise  # Ana loop'a fırlat
-        except SystemExit:
-            print("\n   ⚠️ Thread sonlandı (WhatsApp gönderimi sonrası normal)")
-            # Bu normal - tab_close=True kullandığımızda olabilir
-            # Thread'i yeniden başlat
-            print("   🔄 Sistem yeniden başlatılıyor...")
-            time.sleep(2)
-            if self.running:
-                self.start_keyword_tracker()  # Kendini yeniden başlat
         except Exception as e:
-            print(f"✗ Anahtar Kelime Takip hatası: {e}")
-            print("   ℹ️  Diğer sistemler çalışmaya devam edecek...")
+            print(f"✗ Mail akışı hatası: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            self.shutdown(keyword_tracker, reply_tracker, sender_tracker)
     
-    def start_reply_tracker_auto(self):
-        """Yanıt takip sistemini otomatik başlat (config'ten)"""
+    def run_account_pool(self, accounts):
+        """
+        Birden fazla hesabı sınırlı sayıda worker thread ile izle
+        
+        Args:
+            accounts (list): build_accounts() sonucu
+        """
+        pool_settings = self.config.get('account_pool', {})
+        pool = AccountWorkerPool(
+            workers=pool_settings.get('workers', 4),
+            max_messages_per_turn=pool_settings.get('max_messages_per_turn', 50),
+            metrics_interval=pool_settings.get('metrics_interval', 300)
+        )
+        for account in accounts:
+            fetcher = self.create_fetcher(MailFetcher, *account["trackers"],
+                                          config=account["config"], state_file=account["state_file"])
+            pool.add_account(account["name"], fetcher, self.get_initial_scan(account["trackers"][1]))
+        
+        print("\n✅ Sistemler çalışıyor...")
+        print("🔄 Durdurmak için Ctrl+C basın\n")
         try:
-            print("\n💬 Yanıt Takip Sistemi başlatılıyor...")
-            
-            reply_config = self.config.get('reply_tracking', {})
-            email_settings = self.config.get('email_settings', {})
-            notification_settings = self.config.get('notification_settings', {})
-            
-            tracked_message_ids = reply_config.get('tracked_message_ids', {})
-            if not tracked_message_ids:
-                print("   ⚠️  Takip edilen mail bulunamadı, atlanıyor...")
-                print("   💡 Config dosyasına mail ekleyin veya interaktif mod kullanın:")
-                print("      python track_replies.py")
-                return
-            
-            # Platform seçimine göre parametreleri hazırla
-            platform = notification_settings.get('platform', 'telegram')
-            telegram_settings = notification_settings.get('telegram', {})
-            whatsapp_settings = notification_settings.get('whatsapp', {})
-            
-            tracker = ReplyTracker(
-                imap_server=email_settings.get('imap_server'),
-                email_address=email_settings.get('email_address'),
-                password=email_settings.get('password'),
-                check_interval=email_settings.get('check_interval', 30),
-                platform=platform,
-                telegram_token=telegram_settings.get('bot_token') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                telegram_chat_id=telegram_settings.get('chat_id') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                whatsapp_phone=whatsapp_settings.get('phone_number') if platform == 'whatsapp' and whatsapp_settings.get('enabled') else None,
-                throttle_seconds=notification_settings.get('throttle_seconds', 300)
-            )
-            
-            # Config'ten tracked emails'leri yükle
-            tracker.tracked_emails = tracked_message_ids
-            
-            # Bağlan
-            if not tracker.connect():
-                return
-            
-            print(f"   ✓ {len(tracked_message_ids)} mail takip ediliyor:")
-            for msg_id, data in tracked_message_ids.items():
-                print(f"     • {data.get('subject', 'No subject')}")
-            
-            # Yanıt kontrolü loop'u
-            while self.running:
-                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                print(f"\n[{timestamp}] Yanıtlar kontrol ediliyor...")
-                
-                replies = tracker.check_for_replies()
-                
-                if replies:
-                    for reply in replies:
-                        tracker.display_reply(reply)
-                        
-                        # Yanıtı kaydet
-                        print("💾 Yanıt kaydediliyor...")
-                        json_path, eml_path = tracker.save_reply(reply)
-                        if json_path:
-                            print(f"✅ Yanıt kaydedildi:")
-                            print(f"   📄 JSON: {json_path}")
-                            print(f"   📧 EML: {eml_path}\n")
-                        
-                        # WhatsApp bildirimi
-                        if tracker.notification_manager:
-                            mail_data = {
-                                "subject": reply['subject'],
-                                "from": reply['from'],
-                                "body": reply['body'],
-                                "date": reply['date']
-                            }
-                            source = f"Yanıt Takip - {reply['replied_to_subject'][:30]}..."
-                            tracker.notification_manager.send_notification(
-                                mail_data=mail_data,
-                                source=source,
-                                attachment_paths=[eml_path] if eml_path and os.path.exists(eml_path) else None
-                            )
-                else:
-                    print("📭 Yeni yanıt yok")
-                
-                time.sleep(email_settings.get('check_interval', 30))
-            
-            tracker.disconnect()
-            
-        except Exception as e:
-            print(f"✗ Yanıt Takip hatası: {e}")
+            pool.run(stop_check=lambda: not self.running)
+        except KeyboardInterrupt:
+            print("\n\n⏹ Tüm sistemler durduruluyor...")
+        finally:
+            self.running = False
+            self.shutdown(*[tracker for account in accounts for tracker in account["trackers"]])
     
-    def start_sender_tracker_auto(self):
-        """Gönderici takip sistemini otomatik başlat (config'ten)"""
+    def run_async_pipeline(self, accounts):
+        """
+        run_pipeline'ın asyncio sürümü (email_settings.engine = "asyncio")
+        
+        IMAP bağlantıları thread yerine event loop'ta bekler; Ctrl+C görevleri
+        iptal eder, yarım kalan UID durumu kaydedilir ve oturumlar kapatılır.
+        
+        Args:
+            accounts (list): build_accounts() sonucu
+        """
+        pool_settings = self.config.get('account_pool', {})
+        multiple = len(accounts) > 1
+        engine = AsyncTrackingEngine(
+            max_concurrent_polls=pool_settings.get('workers') if multiple else None,
+            max_messages_per_turn=pool_settings.get('max_messages_per_turn') if multiple else None,
+            metrics_interval=pool_settings.get('metrics_interval', 300) if multiple else 0
+        )
+        for account in accounts:
+            fetcher = self.create_fetcher(AsyncMailFetcher, *account["trackers"],
+                                          config=account["config"], state_file=account["state_file"])
+            fetcher.initial_scan = self.get_initial_scan(account["trackers"][1])
+            engine.add_fetcher(fetcher, account["name"])
+        
+        print("\n✅ Sistemler çalışıyor (asyncio)...")
+        print("🔄 Durdurmak için Ctrl+C basın\n")
         try:
-            print("\n👤 Gönderici Takip Sistemi başlatılıyor...")
-            
-            sender_config = self.config.get('sender_tracking', {})
-            email_settings = self.config.get('email_settings', {})
-            notification_settings = self.config.get('notification_settings', {})
-            
-            tracked_senders = sender_config.get('tracked_senders', {})
-            if not tracked_senders:
-                print("   ⚠️  Takip edilen gönderici bulunamadı, atlanıyor...")
-                print("   💡 Config dosyasına gönderici ekleyin veya interaktif mod kullanın:")
-                print("      python track_senders.py")
-                return
-            
-            # Platform seçimine göre parametreleri hazırla
-            platform = notification_settings.get('platform', 'telegram')
-            telegram_settings = notification_settings.get('telegram', {})
-            whatsapp_settings = notification_settings.get('whatsapp', {})
-            
-            tracker = SenderTracker(
-                imap_server=email_settings.get('imap_server'),
-                email_address=email_settings.get('email_address'),
-                password=email_settings.get('password'),
-                check_interval=email_settings.get('check_interval', 30),
-                platform=platform,
-                telegram_token=telegram_settings.get('bot_token') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                telegram_chat_id=telegram_settings.get('chat_id') if platform == 'telegram' and telegram_settings.get('enabled') else None,
-                whatsapp_phone=whatsapp_settings.get('phone_number') if platform == 'whatsapp' and whatsapp_settings.get('enabled') else None,
-                throttle_seconds=notification_settings.get('throttle_seconds', 300)
-            )
-            
-            # Config'ten tracked senders'ları yükle
-            tracker.tracked_senders = tracked_senders
+            asyncio.run(engine.run())
+        except KeyboardInterrupt:
+            print("\n\n⏹ Tüm sistemler durduruluyor...")
+        finally:
+            self.running = False
+            self.shutdown(*[tracker for account in accounts for tracker in account["trackers"]])
+    
+    def get_initial_scan(self, reply_tracker):
+        """İlk çalıştırmada daha önce gelmiş yanıtlar ayrı bir oturumla bulunur"""
+        if not reply_tracker:
+            return None
+        return lambda: self.scan_existing_replies(reply_tracker)
+    
+    def scan_existing_replies(self, reply_tracker):
+        """Takip edilen maillere daha önce gelmiş yanıtları bul (ayrı IMAP oturumu)"""
+        print("\n   Mevcut yanıtlar kontrol ediliyor...")
+        if not reply_tracker.connect():
+            return
+        try:
+            reply_tracker.check_for_replies()
+            reply_tracker.flush_storage()
+        finally:
+            reply_tracker.disconnect()
+    
+    def build_accounts(self):
+        """
+        Her hesap için etkin takip sistemlerini oluştur
+        
+        Returns:
+            list: [{"name", "config", "state_file", "trackers": (anahtar kelime, yanıt, gönderici)}]
+        """
+        account_configs = self.get_account_configs()
+        multiple = bool(self.config.get('accounts'))
+        accounts = []
+        
+        for name, config, state_file in account_configs:
+            if multiple:
+                print(f"\n📬 Hesap: {name}")
+            manager = self.get_shared_notification_manager(config) if multiple else None
             
-            # Bağlan
-            if not tracker.connect():
-                return
+            keyword_tracker = None
+            reply_tracker = None
+            sender_tracker = None
             
-            print(f"   ✓ {len(tracked_senders)} gönderici takip ediliyor:")
-            for email, data in tracked_senders.items():
-                print(f"     • {data.get('name', email)}")
+            if config.get('keyword_tracking', {}).get('enabled'):
+                keyword_tracker = self.build_keyword_tracker(config, manager)
             
-            # İlk çalıştırmada mevcut mailleri atla
-            print("\n   Mevcut mailler kontrol ediliyor...")
-            tracker.check_new_emails(skip_existing=True)
-            print("   ✅ Hazır! Takip edilen göndericilerden gelecek yeni mailler yakalanacak.")
+            if config.get('reply_tracking', {}).get('enabled'):
+                reply_tracker = self.build_reply_tracker(config, manager)
             
-            # Mail kontrolü loop'u
-            while self.running:
-                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                print(f"\n[{timestamp}] Mail kontrol ediliyor...")
-                
-                triggered = tracker.check_new_emails()
-                
-                if triggered:
-                    for trigger_info in triggered:
-                        tracker.display_triggered_email(trigger_info)
-                        
-                        # Maili kaydet
-                        print("💾 Mail kaydediliyor...")
-                        json_path, eml_path = tracker.save_email_to_file(
-                            trigger_info['email_data'],
-                            trigger_info['msg'],
-                            trigger_info['sender_email']
-                        )
-                        if json_path:
-                            print(f"✅ Mail kaydedildi:")
-                            print(f"   📄 JSON: {json_path}")
-                            print(f"   📧 EML: {eml_path}\n")
-                        
-                        # WhatsApp bildirimi
-                        if tracker.notification_manager:
-                            sender_email = trigger_info['sender_email']
-                            sender_name = tracker.tracked_senders.get(sender_email, {}).get('name', sender_email)
-                            
-                            # Ek dosya yolları
-                            attachment_paths = []
-                            msg = trigger_info['msg']
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    if part.get_content_disposition() == "attachment":
-                                        filename = part.get_filename()
-                                        if filename:
-                                            from datetime import datetime
-                                            attachment_path = os.path.join(tracker.save_folder, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}")
-                                            if os.path.exists(attachment_path):
-                                                attachment_paths.append(attachment_path)
-                            
-                            source = f"Gönderici Takip - {sender_name[:40]}"
-                            tracker.notification_manager.send_notification(
-                                mail_data=trigger_info['email_data'],
-                                source=source,
-                                attachment_paths=attachment_paths if attachment_paths else None
-                            )
-                else:
-                    print("📭 Yeni mail yok")
-                
-                time.sleep(email_settings.get('check_interval', 30))
+            if config.get('sender_tracking', {}).get('enabled'):
+                sender_tracker = self.build_sender_tracker(config, manager)
             
-            tracker.disconnect()
+            if not (keyword_tracker or reply_tracker or sender_tracker):
+                if multiple:
+                    print("   ⚠️  Etkin takip sistemi yok, hesap atlanıyor...")
+                continue
             
-        except Exception as e:
-            print(f"✗ Gönderici Takip hatası: {e}")
+            accounts.append({
+                "name": name,
+                "config": config,
+                "state_file": state_file,
+                "trackers": (keyword_tracker, reply_tracker, sender_tracker)
+            })
+        
+        return accounts
     
     def start_all(self):
         """Tüm etkin takip sistemlerini başlat"""
@@ -378,12 +707,20 @@ class UnifiedMailTracker:
         print("="*70)
         print("🚀 BİRLEŞİK MAİL TAKİP SİSTEMİ")
         print("="*70)
-        print(f"📧 Email: {self.config['email_settings'].get('email_address')}")
+        accounts_config = [a for a in self.config.get('accounts') or [] if a.get('enabled', True)]
+        if accounts_config:
+            print(f"📧 Hesaplar: {len(accounts_config)} "
+                  f"({self.config.get('account_pool', {}).get('workers', 4)} worker)")
+        else:
+            print(f"📧 Email: {self.config['email_settings'].get('email_address')}")
         
         # Bildirim platformu bilgisi
         notification_settings = self.config.get('notification_settings', {})
         platform = notification_settings.get('platform', 'telegram')
-        if platform == 'telegram':
+        channels = [c for c in notification_settings.get('channels') or [] if c.get('enabled', True)]
+        if channels:
+            print(f"📱 Bildirim: {', '.join(c.get('name') or c.get('type', '?') for c in channels)} (aynı anda)")
+        elif platform == 'telegram':
             telegram = notification_settings.get('telegram', {})
             print(f"📱 Bildirim: Telegram (Chat ID: {telegram.get('chat_id', 'Yok')}) {'✓' if telegram.get('enabled') else '✗'}")
         elif platform == 'whatsapp':
@@ -395,38 +732,33 @@ class UnifiedMailTracker:
         print(f"⏰ Kontrol aralığı: {self.config['email_settings'].get('check_interval', 30)} saniye")
         print("="*70 + "\n")
         
-        # Anahtar kelime takibi
-        if self.config.get('keyword_tracking', {}).get('enabled'):
-            thread = threading.Thread(
-                target=self.start_keyword_tracker,
-                daemon=True,
-                name="KeywordTracker"
-            )
-            thread.start()
-            self.threads.append(thread)
-            time.sleep(2)
-        
-        # Yanıt takibi (otomatik)
-        if self.config.get('reply_tracking', {}).get('enabled'):
-            thread = threading.Thread(
-                target=self.start_reply_tracker_auto,
-                daemon=True,
-                name="ReplyTracker"
-            )
-            thread.start()
-            self.threads.append(thread)
-            time.sleep(2)
-        
-        # Gönderici takibi (otomatik)
-        if self.config.get('sender_tracking', {}).get('enabled'):
-            thread = threading.Thread(
-                target=self.start_sender_tracker_auto,
-                daemon=True,
-                name="SenderTracker"
-            )
-            thread.start()
-            self.threads.append(thread)
-            time.sleep(2)
+        # Etkin takip sistemlerini oluştur
+        accounts = self.build_accounts()
+        if not accounts:
+            print("\n⚠️  Etkin takip sistemi yok, çıkılıyor...")
+            return
+        
+        if self.config['email_settings'].get('engine') == 'asyncio':
+            self.run_async_pipeline(accounts)
+            print("✓ Tüm sistemler durduruldu")
+            return
+        
+        if accounts_config:
+            self.run_account_pool(accounts)
+            print("✓ Tüm sistemler durduruldu")
+            return
+        
+        keyword_tracker, reply_tracker, sender_tracker = accounts[0]["trackers"]
+        
+        # Tüm takip sistemleri tek IMAP oturumunu paylaşır
+        thread = threading.Thread(
+            target=self.run_pipeline,
+            args=(keyword_tracker, reply_tracker, sender_tracker),
+            daemon=True,
+            name="MailFetcher"
+        )
+        thread.start()
+        self.threads.append(thread)
         
         # Ana thread'i canlı tut
         try:
@@ -440,10 +772,10 @@ class UnifiedMailTracker:
             print("\n\n⏹ Tüm sistemler durduruluyor...")
             self.running = False
         
-        # Thread'lerin bitmesini bekle
+        # Thread'lerin bitmesini bekle (kuyruktaki bildirimler gönderilirken)
         for thread in self.threads:
             if thread.is_alive():
-                thread.join(timeout=5)
+                thread.join(timeout=35)
         
         print("✓ Tüm sistemler durduruldu")
 
@@ -0,0 +1,319 @@
+"""
+Kaydedilen maillerde arama
+tracked_keyword_mails, tracked_sender_mails ve tracked_replies klasörlerindeki
+JSON kayıtlarını ve segmentleri SQLite FTS5 indeksine ekler ve sorgular.
+İndeks her çalıştırmada sadece yeni kayıtlarla güncellenir.
+
+Kullanım:
+    python search.py fatura                              # terim (birden fazla terim: hepsi)
+    python search.py --phrase "son ödeme tarihi"         # ifade
+    python search.py fatur*                              # önek
+    python search.py --from info@yapikredi.com.tr --since 2025-11-01 --until 2025-12-01
+    python search.py kargo --source sender --rank        # en alakalıdan başla
+    python search.py --query 'sipariş NOT iptal'         # ham FTS5 sorgusu
+    python search.py --reindex                           # indeksi baştan kur
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from mail_archive import MailArchive
+from mail_segments import list_segments, iter_indexed_records
+from run import ConfigManager, ACCOUNT_SECTIONS
+
+
+DEFAULT_INDEX_PATH = "mail_search.db"
+
+# Bu kadar kayıtta bir indeks diske yazılır
+INDEX_BATCH_SIZE = 1000
+
+# Kayıt dosyası adlarının başındaki zaman damgası (YYYYMMDD_HHMMSS)
+TIMESTAMP_LENGTH = 15
+
+# (kaynak, config bölümü, varsayılan kayıt klasörü)
+SOURCES = (
+    ("keyword", "keyword_tracking", "tracked_keyword_mails"),
+    ("sender", "sender_tracking", "tracked_sender_mails"),
+    ("reply", "reply_tracking", "tracked_replies"),
+)
+
+# Takip sistemlerinin yazdığı kayıt dosyaları (aynı klasördeki ekler
+# <zaman damgası>_<dosya adı> olarak kaydedilir, indekslenmez)
+RECORD_NAMES = {
+    "keyword": re.compile(r"^\d{8}_\d{6}_email_\d+\.json$"),
+    "sender": re.compile(r"^\d{8}_\d{6}_.+_\d+\.json$"),
+    "reply": re.compile(r"^\d{8}_\d{6}_reply_\d+\.json$"),
+}
+
+# Her kayıtta bulunan alanlar
+RECORD_FIELDS = ("id", "saved_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_files (path TEXT PRIMARY KEY, position INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS indexed_folders (folder TEXT PRIMARY KEY, last_name TEXT NOT NULL);
+"""
+
+
+def get_source_folders(config):
+    """
+    Config'teki (hesaplar dahil) kayıt klasörleri
+
+    Returns:
+        list: [(kaynak, klasör)]
+    """
+    configs = [config] + [
+        {section: {**config.get(section, {}), **account.get(section, {})} for section in ACCOUNT_SECTIONS}
+        for account in config.get('accounts') or []
+    ]
+    folders = []
+    for source, section, default in SOURCES:
+        for item in configs:
+            folder = item.get(section, {}).get('save_folder', default)
+            if (source, folder) not in folders:
+                folders.append((source, folder))
+    return folders
+
+
+def get_rule(source, record):
+    """Kaydın eşleştiği kural (anahtar kelimeler, gönderici, yanıtlanan Message-ID)"""
+    if source == "keyword":
+        return ", ".join(record.get("matched_keywords") or []) or None
+    if source == "sender":
+        return record.get("sender_email")
+    return record.get("replied_to_message_id")
+
+
+def is_record(record):
+    """Takip sistemlerinin yazdığı bir mail kaydı mı?"""
+    return isinstance(record, dict) and all(field in record for field in RECORD_FIELDS)
+
+
+def build_match_query(terms=None, phrase=None):
+    """
+    Terimleri FTS5 sorgusuna çevir (tire, nokta gibi karakterler sözdizimi hatası vermez)
+
+    Args:
+        terms (list): Hepsi geçmeli; "fatur*" önek araması
+        phrase (str): Bu sırayla geçmeli
+
+    Returns:
+        str: FTS5 MATCH ifadesi
+    """
+    parts = []
+    for term in terms or []:
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            parts.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if phrase:
+        parts.append('"' + phrase.replace('"', '""') + '"')
+    return " ".join(parts)
+
+
+class MailSearchIndex:
+    """
+    Kaydedilen maillerin artımlı tam metin indeksi
+
+    Arşivle aynı şemayı kullanır (MailArchive): gönderici, tarih ve takip
+    sistemi indeksli, konu/gövde/gönderici FTS5 ile aranabilir. Hangi JSON
+    dosyalarının ve segmentlerin hangi konuma kadar indekslendiği aynı
+    veritabanında, kayıtlarla aynı transaction'da tutulur. JSON dosya adları
+    zaman damgasıyla başladığı için her klasörde sadece son indekslenen
+    dosyayla aynı saniyede veya sonra yazılmış dosyalar kontrol edilir.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        """
+        Args:
+            path (str): İndeks veritabanı (arşiv açıksa arşiv dosyası da verilebilir)
+        """
+        self.path = path
+        self.archive = MailArchive(path, batch_size=0)
+        self.connection = self.archive.connection
+        self.connection.executescript(_SCHEMA)
+        self.files = []    # [(yol, konum)] - bir sonraki flush ile yazılır
+        self.folders = []  # [(klasör, son dosya adı)]
+        self.pending = 0
+
+    def add(self, source, record, json_path):
+        self.archive.add(
+            source, record,
+            rule=get_rule(source, record),
+            eml_path=record.get("eml_path"),
+            json_path=json_path,
+            attachments=record.get("attachments")
+        )
+        self.pending += 1
+        if self.pending >= INDEX_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Kayıtları ve indeksleme konumlarını tek transaction ile yaz"""
+        self.archive.flush(statements=[
+            ("INSERT OR REPLACE INTO indexed_files (path, position) VALUES (?, ?)", self.files),
+            ("INSERT OR REPLACE INTO indexed_folders (folder, last_name) VALUES (?, ?)", self.folders),
+        ])
+        self.files = []
+        self.folders = []
+        self.pending = 0
+
+    def index_json_files(self, source, folder):
+        """Klasördeki yeni JSON kayıtlarını ekle (ekler ve diğer JSON dosyaları atlanır)"""
+        row = self.connection.execute(
+            "SELECT last_name FROM indexed_folders WHERE folder = ?", (folder,)).fetchone()
+        cutoff = row[0][:TIMESTAMP_LENGTH] if row else ""
+
+        with os.scandir(folder) as entries:
+            names = sorted(
+                entry.name for entry in entries
+                if RECORD_NAMES[source].match(entry.name)
+                and entry.name[:TIMESTAMP_LENGTH] >= cutoff
+            )
+
+        added = 0
+        for name in names:
+            path = os.path.join(folder, name)
+            # Son indekslenen saniyede yazılmış dosyalar tek tek kontrol edilir
+            if name[:TIMESTAMP_LENGTH] == cutoff and self.connection.execute(
+                    "SELECT 1 FROM indexed_files WHERE path = ?", (path,)).fetchone():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Okunamadı: {path} ({e})")
+                continue
+            # Atlanan dosyalar da görüldü sayılır, sonraki çalıştırmada tekrar okunmaz
+            self.files.append((path, 1))
+            self.folders.append((folder, name))
+            if not is_record(record):
+                print(f"⚠️  Mail kaydı değil, atlandı: {path}")
+                continue
+            self.add(source, record, path)
+            added += 1
+        return added
+
+    def index_segments(self, source, folder):
+        """Segmentlere son indekslemeden sonra eklenen kayıtları ekle"""
+        added = 0
+        for segment in list_segments(folder):
+            row = self.connection.execute(
+                "SELECT position FROM indexed_files WHERE path = ?", (segment,)).fetchone()
+            position = row[0] if row else 0
+            if position >= os.path.getsize(segment):
+                continue
+
+            for key, record, end in iter_indexed_records(segment, position):
+                self.files.append((segment, end))
+                if not is_record(record):
+                    print(f"⚠️  Mail kaydı değil, atlandı: {segment}#{key}")
+                    continue
+                self.add(source, record, f"{segment}#{key}")
+                added += 1
+        return added
+
+    def update(self, folders):
+        """
+        Klasörlerdeki yeni kayıtları indekse ekle
+
+        Args:
+            folders (list): get_source_folders() sonucu
+
+        Returns:
+            int: Eklenen kayıt sayısı
+        """
+        added = 0
+        for source, folder in folders:
+            if not os.path.isdir(folder):
+                continue
+            added += self.index_json_files(source, folder)
+            segments = os.path.join(folder, "segments")
+            if os.path.isdir(segments):
+                added += self.index_segments(source, segments)
+        self.flush()
+        return added
+
+    def close(self):
+        self.archive.close()
+
+
+def remove_index(path):
+    """İndeks veritabanını (WAL dosyalarıyla) sil"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def print_results(results):
+    """Sonuçları yazdır"""
+    labels = {"keyword": "🔑", "sender": "👤", "reply": "💬"}
+    for result in results:
+        date = (result.get("date") or "")[:16].replace("T", " ")
+        print(f"\n{labels.get(result['source'], '📧')} {date}  {result.get('sender') or '-'}")
+        print(f"   📩 {result.get('subject') or '(konu yok)'}")
+        if result.get("snippet"):
+            print(f"   💬 {' '.join(result['snippet'].split())}")
+        if result.get("rule"):
+            print(f"   🎯 {result['rule']}")
+        print(f"   📄 {result.get('json_path') or result.get('eml_path') or '-'}")
+
+
+def main():
+    """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description="Kaydedilen maillerde arama")
+    parser.add_argument("terms", nargs="*", help="Aranacak terimler (hepsi geçmeli, önek için fatur*)")
+    parser.add_argument("--phrase", help="Bu sırayla geçmesi gereken ifade")
+    parser.add_argument("--query", help="Ham FTS5 sorgusu (AND/OR/NOT, NEAR, subject:...)")
+    parser.add_argument("--from", dest="sender", help="Gönderici email adresi")
+    parser.add_argument("--since", help="Bu tarihten itibaren (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Bu tarihten önce (YYYY-MM-DD)")
+    parser.add_argument("--source", choices=[source for source, _, _ in SOURCES], help="Takip sistemi")
+    parser.add_argument("--limit", type=int, default=20, help="En fazla sonuç")
+    parser.add_argument("--rank", action="store_true", help="En yeni yerine en alakalıdan başla")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH,
+                        help="İndeks veritabanı (arşiv açıksa mail_archive.db --no-update ile arşivde aranır)")
+    parser.add_argument("--config", default="mail_tracking_config.json", help="Config dosyası")
+    parser.add_argument("--no-update", action="store_true", help="İndeksi güncellemeden ara")
+    parser.add_argument("--reindex", action="store_true", help="İndeksi silip baştan kur")
+    args = parser.parse_args()
+
+    if args.reindex:
+        remove_index(args.db)
+
+    index = MailSearchIndex(args.db)
+    try:
+        if not args.no_update:
+            folders = get_source_folders(ConfigManager(args.config).config)
+            start = time.perf_counter()
+            added = index.update(folders)
+            if added:
+                print(f"🗂️  {added} yeni kayıt indekslendi ({time.perf_counter() - start:.1f} sn)")
+
+        query = args.query or build_match_query(args.terms, args.phrase)
+        if not query and not (args.sender or args.since or args.until or args.source):
+            if args.reindex:
+                return
+            parser.error("arama terimi veya filtre (--from, --since, --until, --source) gerekli")
+
+        filters = {"sender": args.sender, "source": args.source, "since": args.since, "until": args.until}
+        start = time.perf_counter()
+        try:
+            if query:
+                results = index.archive.search(query, args.limit, rank=args.rank, **filters)
+            else:
+                results = index.archive.find(limit=args.limit, **filters)
+        except sqlite3.OperationalError as e:
+            print(f"✗ Sorgu hatası: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+
+        print_results(results)
+        print(f"\n🔎 {len(results)} sonuç ({elapsed:.1f} ms, {index.archive.count()} kayıt içinde)")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,59 @@
 import imaplib
 import email
 from email.header import decode_header
-import time
 import os
+import re
 import json
 from datetime import datetime
 from pathlib import Path
-from notification_manager import MailNotificationManager
+from notification_manager import create_notification_manager
+from imap_idle import supports_idle, wait_for_new_mail
+from imap_fetch import fetch_messages, fetch_with_header_prefilter, DEFAULT_FETCH_BATCH_SIZE
+from imap_search import search_matching_uids, supports_gmail_search, quote_imap_string
+from uid_state import UidState, UidCheckpoint, get_uidvalidity, get_max_uid, search_new_uids
+from mail_parser import LazyMail, save_raw_email
+
+
+_MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+
+
+def normalize_message_id(message_id):
+    """Message-ID'yi karşılaştırma için tek biçime getir (örn: 'abc@x' -> '<abc@x>')"""
+    message_id = str(message_id).strip()
+    if message_id and not message_id.startswith("<"):
+        message_id = f"<{message_id}>"
+    return message_id
+
+
+def extract_message_ids(value):
+    """
+    In-Reply-To/References başlığındaki Message-ID'leri ayrı ayrı çıkar
+
+    Köşeli parantezsiz yazan istemciler için boşlukla ayrılmış değerlere dönülür.
+
+    Returns:
+        list: Normalize edilmiş Message-ID'ler (başlıktaki sırayla)
+    """
+    if not value:
+        return []
+    value = str(value)
+    message_ids = _MESSAGE_ID_RE.findall(value)
+    if not message_ids:
+        message_ids = [normalize_message_id(part) for part in value.split()]
+    return message_ids
 
 class ReplyTracker:
     """Gönderilen mailleri izler ve yanıtları yakalar"""
     
     def __init__(self, imap_server, email_address, password, check_interval=30, 
                  platform="telegram", telegram_token=None, telegram_chat_id=None, 
-                 whatsapp_phone=None, throttle_seconds=300):
+                 whatsapp_phone=None, throttle_seconds=300, use_idle=True,
+                 fetch_batch_size=DEFAULT_FETCH_BATCH_SIZE, server_search=True,
+                 async_notifications=True, notification_queue_size=100,
+                 notification_digest=True, notification_rate_limit=None,
+                 notification_outbox=True, whatsapp_api=None,
+                 notification_channels=None, notification_manager=None,
+                 archive=None, json_files=True, segment_writer=None, raw_spool=None):
         """
         Args:
             imap_server (str): IMAP sunucu adresi
@@ -25,16 +65,43 @@ class ReplyTracker:
             telegram_chat_id (str): Telegram chat ID
             whatsapp_phone (str): WhatsApp bildirim telefon numarası
             throttle_seconds (int): Bildirimler arası minimum bekleme süresi
+            use_idle (bool): Sunucu destekliyorsa IMAP IDLE ile anlık bildirim bekle
+            fetch_batch_size (int): Tek FETCH komutunda çekilecek en fazla mail sayısı
+            server_search (bool): Eşleştirmeyi IMAP SEARCH ile sunucuda yapmayı dene
+            async_notifications (bool): Bildirimleri arka plan kuyruğundan gönder (mail akışı beklemez)
+            notification_queue_size (int): Gönderim bekleyen en fazla bildirim sayısı
+            notification_digest (bool): Throttle süresinde gelen bildirimleri özet olarak gönder
+            notification_rate_limit (dict): Hedef/kaynak bazlı hız limiti ayarları
+            notification_outbox (bool): Gönderilemeyen bildirimleri diskte sakla ve tekrar dene
+            whatsapp_api (dict): WhatsApp Cloud API ayarları (token, phone_number_id, api_url);
+                verilmezse WhatsApp mesajları pywhatkit ile gönderilir
+            notification_channels (list): Bildirimlerin aynı anda gönderileceği kanallar
+                (telegram, whatsapp, webhook, file); verilirse platform ayarlarının yerine geçer
+            notification_manager: Hazır bildirim yöneticisi (birden fazla hesap aynı
+                yöneticiyi paylaşır); verilirse yukarıdaki bildirim ayarları kullanılmaz
+            archive (MailArchive): Yakalanan yanıtların da yazılacağı SQLite arşivi
+            json_files (bool): Her yanıt için ayrıca JSON dosyası yaz (arşiv varken kapatılabilir)
+            segment_writer (SegmentWriter): Verilirse JSON kayıtları ayrı dosyalar yerine
+                gün gün dönen JSONL segmentlerine eklenir
+            raw_spool (MaildirSpool): Verilirse ham mail kayıt klasörüne .eml olarak değil,
+                tüm takip sistemlerinin paylaştığı Maildir'e bir kez yazılır
         """
         self.imap_server = imap_server
         self.email_address = email_address
         self.password = password
         self.check_interval = check_interval
+        self.use_idle = use_idle
+        self.fetch_batch_size = fetch_batch_size
+        self.server_search = server_search
         self.mail = None
+        self.archive = archive
+        self.json_files = json_files or archive is None
+        self.segment_writer = segment_writer
+        self.raw_spool = raw_spool
         
         # Takip edilen mail'lerin Message-ID'leri ve konuları
         self.tracked_emails = {}  # {message_id: {"subject": "...", "to": "...", "date": "..."}}
-        self.found_replies = set()  # Bulunan yanıtların ID'leri
+        self.tracked_index = {}   # {normalize edilmiş message_id: tracked_emails anahtarı}
         
         # Klasörler
         self.sent_folder = "[Gmail]/Sent Mail"  # Gmail için
@@ -44,22 +111,25 @@ class ReplyTracker:
         self.replies_folder = "tracked_replies"
         Path(self.replies_folder).mkdir(parents=True, exist_ok=True)
         
-        # Bildirim yöneticisi (Telegram veya WhatsApp)
-        self.notification_manager = None
-        if platform == "telegram" and telegram_token and telegram_chat_id:
-            self.notification_manager = MailNotificationManager(
-                platform="telegram",
+        # UID takibi - ilk kontrolde tüm INBOX taranır, sonra sadece yeni gelenler
+        self.uid_state = UidState(os.path.join(self.replies_folder, ".uid_state.json"))
+        
+        # Bildirim yöneticisi (Telegram, WhatsApp veya config'teki tüm kanallar)
+        self.notification_manager = notification_manager
+        if self.notification_manager is None:
+            self.notification_manager = create_notification_manager(
+                platform=platform,
                 telegram_token=telegram_token,
                 telegram_chat_id=telegram_chat_id,
+                whatsapp_phone=whatsapp_phone,
+                whatsapp_api=whatsapp_api,
+                channels=notification_channels,
                 throttle_seconds=throttle_seconds,
-                enabled=True
-            )
-        elif platform == "whatsapp" and whatsapp_phone:
-            self.notification_manager = MailNotificationManager(
-                platform="whatsapp",
-                phone_number=whatsapp_phone,
-                throttle_seconds=throttle_seconds,
-                enabled=True
+                async_send=async_notifications,
+                queue_size=notification_queue_size,
+                digest=notification_digest,
+                rate_limit=notification_rate_limit,
+                outbox_folder=self.replies_folder if notification_outbox else None
             )
     
     def connect(self):
@@ -104,6 +174,10 @@ class ReplyTracker:
     
     def get_email_body(self, msg):
         """Email içeriğini al"""
+        # Ortak akıştan gelen mail gövdesini kendisi (veya worker süreç) çıkarır
+        if isinstance(msg, LazyMail):
+            return msg.body
+        
         body = ""
         
         if msg.is_multipart():
@@ -246,29 +320,28 @@ class ReplyTracker:
             
             sent_emails = []
             
+            # Tüm mailleri tek FETCH ile al, sonra en yeni önce sırala
+            fetched = dict(fetch_messages(self.mail, email_ids, "(RFC822)", self.fetch_batch_size, use_uid=False))
+            
             for idx, email_id in enumerate(email_ids, 1):
-                status, msg_data = self.mail.fetch(email_id, "(RFC822)")
-                
-                if status != "OK":
+                if email_id not in fetched:
                     continue
                 
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        message_id = msg.get("Message-ID", "")
-                        subject = self.decode_header_value(msg["Subject"])
-                        to_address = msg.get("To", "")
-                        date = msg.get("Date", "")
-                        
-                        sent_emails.append({
-                            "index": idx,
-                            "message_id": message_id,
-                            "subject": subject,
-                            "to": to_address,
-                            "date": date,
-                            "email_id": email_id
-                        })
+                msg = email.message_from_bytes(fetched[email_id])
+                
+                message_id = msg.get("Message-ID", "")
+                subject = self.decode_header_value(msg["Subject"])
+                to_address = msg.get("To", "")
+                date = msg.get("Date", "")
+                
+                sent_emails.append({
+                    "index": idx,
+                    "message_id": message_id,
+                    "subject": subject,
+                    "to": to_address,
+                    "date": date,
+                    "email_id": email_id
+                })
             
             return sent_emails
             
@@ -314,12 +387,11 @@ class ReplyTracker:
         # Seçilen mailleri tracked_emails'e ekle
         for email_data in sent_emails:
             if email_data['index'] in selected_indices:
-                message_id = email_data['message_id']
-                self.tracked_emails[message_id] = {
+                self.add_tracked_email(email_data['message_id'], {
                     "subject": email_data['subject'],
                     "to": email_data['to'],
                     "date": email_data['date']
-                }
+                })
         
         print(f"\n✅ {len(selected_indices)} mail takibe alındı!")
         print("\nTakip edilen mailler:")
@@ -328,71 +400,176 @@ class ReplyTracker:
         
         return True
     
+    def add_tracked_email(self, message_id, data):
+        """
+        Maili takibe al
+        
+        Args:
+            message_id (str): Gönderilen mailin Message-ID'si
+            data (dict): {"subject": "...", "to": "...", "date": "..."}
+        """
+        self.tracked_emails[message_id] = data
+        self.tracked_index[normalize_message_id(message_id)] = message_id
+    
+    def set_tracked_emails(self, tracked_emails):
+        """
+        Takip edilen mailleri toptan ayarla (örn: config'ten)
+        
+        Args:
+            tracked_emails (dict): {message_id: {"subject": "...", "to": "...", "date": "..."}}
+        """
+        self.tracked_emails = {}
+        self.tracked_index = {}
+        for message_id, data in tracked_emails.items():
+            self.add_tracked_email(message_id, data)
+    
+    def find_replied_message_id(self, headers):
+        """
+        Mail takip edilen maillerden birine yanıt mı?
+        
+        Sadece In-Reply-To/References başlıklarına bakar, böylece mailin
+        tamamını indirmeden eşleştirme yapılabilir. Başlıktaki her Message-ID
+        takip indeksinde aranır; maliyet takip edilen mail sayısından bağımsızdır.
+        
+        Args:
+            headers (email.message.Message): Mail veya sadece başlıkları
+        
+        Returns:
+            str: Yanıtlanan takip edilen Message-ID, değilse None
+        """
+        if not self.tracked_index:
+            return None
+        
+        # Önce doğrudan yanıtlanan mail, sonra zincirde en yeniden eskiye
+        candidates = extract_message_ids(headers.get("In-Reply-To", ""))
+        candidates += reversed(extract_message_ids(headers.get("References", "")))
+        
+        for message_id in candidates:
+            tracked_msg_id = self.tracked_index.get(message_id)
+            if tracked_msg_id is not None:
+                return tracked_msg_id
+        
+        return None
+    
+    def get_search_terms(self, mail):
+        """
+        Takip edilen Message-ID'lere yanıtlar için sunucu tarafı arama terimleri
+        
+        Gmail IMAP, In-Reply-To/References başlıklarında aramayı desteklemez;
+        bu durumda None döner ve başlık ön filtresi kullanılır.
+        
+        Args:
+            mail (imaplib.IMAP4): Aramanın yapılacağı IMAP bağlantısı
+        
+        Returns:
+            list: OR ile birleştirilecek IMAP arama terimleri veya None
+        """
+        if supports_gmail_search(mail):
+            return None
+        
+        terms = []
+        for message_id in self.tracked_emails.keys():
+            quoted = quote_imap_string(message_id)
+            terms.append(f"HEADER In-Reply-To {quoted}")
+            terms.append(f"HEADER References {quoted}")
+        return terms
+    
+    def match_reply(self, email_id, msg):
+        """
+        Mail takip edilen maillerden birine yanıt mı?
+        
+        Args:
+            email_id (bytes): Mailin UID'si
+            msg (email.message.Message): Parse edilmiş mail
+        
+        Returns:
+            dict: Yanıt ise yanıt bilgileri, değilse None
+        """
+        # Bu mail, takip ettiğimiz maillerden birine yanıt mı?
+        replied_to = self.find_replied_message_id(msg)
+        
+        if replied_to is None:
+            return None
+        
+        # Yanıt bulundu!
+        subject = self.decode_header_value(msg["Subject"])
+        from_address = msg.get("From", "")
+        date = msg.get("Date", "")
+        body = self.get_email_body(msg)
+        
+        return {
+            "email_id": email_id,
+            "replied_to_message_id": replied_to,
+            "replied_to_subject": self.tracked_emails[replied_to]['subject'],
+            "subject": subject,
+            "from": from_address,
+            "date": date,
+            "body": body,
+            "msg": msg
+        }
+    
     def check_for_replies(self):
-        """Takip edilen maillere gelen yanıtları kontrol et"""
+        """
+        Takip edilen maillere gelen yanıtları kontrol et
+        
+        Her yanıt UID'si işlenmiş olarak işaretlenmeden önce kaydedilir ve
+        bildirilir; tur yarıda kesilirse işlenmemiş yanıtlar tekrar denenir.
+        
+        Returns:
+            list: İşlenen yanıtlar
+        """
         try:
             # INBOX'ı seç
             if not self.select_folder(self.inbox_folder):
                 print(f"✗ INBOX seçilemedi")
                 return []
             
-            # Tüm mailleri al
-            status, messages = self.mail.search(None, 'ALL')
-            
-            if status != "OK":
-                return []
+            uidvalidity = get_uidvalidity(self.mail)
+            checkpoint = UidCheckpoint(self.uid_state, self.email_address, self.inbox_folder,
+                                       uidvalidity, self.fetch_batch_size)
+            last_uid = checkpoint.last_uid
             
-            email_ids = messages[0].split()
             new_replies = []
             
-            for email_id in email_ids:
-                # Bu mail ID'sini daha önce işledik mi?
-                if email_id in self.found_replies:
-                    continue
-                
-                status, msg_data = self.mail.fetch(email_id, "(RFC822)")
+            # Önce filtrelemeyi sunucuda yapmayı dene: sadece yanıtların UID'leri döner
+            if self.server_search:
+                max_uid = get_max_uid(self.mail)
+                matched_uids = search_matching_uids(self.mail, last_uid + 1, max_uid, self.get_search_terms(self.mail))
                 
-                if status != "OK":
-                    continue
-                
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        # In-Reply-To header'ını kontrol et
-                        in_reply_to = msg.get("In-Reply-To", "")
-                        references = msg.get("References", "")
-                        
-                        # Bu mail, takip ettiğimiz maillerden birine yanıt mı?
-                        is_reply = False
-                        replied_to = None
-                        
-                        for tracked_msg_id in self.tracked_emails.keys():
-                            if tracked_msg_id in in_reply_to or tracked_msg_id in references:
-                                is_reply = True
-                                replied_to = tracked_msg_id
-                                break
-                        
-                        if is_reply:
-                            # Yanıt bulundu!
-                            subject = self.decode_header_value(msg["Subject"])
-                            from_address = msg.get("From", "")
-                            date = msg.get("Date", "")
-                            body = self.get_email_body(msg)
-                            
-                            reply_data = {
-                                "email_id": email_id,
-                                "replied_to_message_id": replied_to,
-                                "replied_to_subject": self.tracked_emails[replied_to]['subject'],
-                                "subject": subject,
-                                "from": from_address,
-                                "date": date,
-                                "body": body,
-                                "msg": msg
-                            }
-                            
+                if matched_uids is not None:
+                    matched_uids = checkpoint.filter_new(matched_uids)
+                    try:
+                        for uid, raw_email in fetch_messages(self.mail, matched_uids, "(RFC822)", self.fetch_batch_size):
+                            reply_data = self.process_email(uid, LazyMail(raw_email))
+                            if reply_data:
+                                new_replies.append(reply_data)
+                            checkpoint.mark(uid, advance=False)
+                    except BaseException:
+                        checkpoint.commit()
+                        raise
+                    
+                    checkpoint.commit(max_uid)
+                    return new_replies
+            
+            # Sadece son görülen UID'den sonra gelen mailleri al
+            new_uids = checkpoint.filter_new(search_new_uids(self.mail, last_uid) or [])
+            
+            if not new_uids:
+                return []
+            
+            try:
+                # Önce sadece başlıkları çek, mailin tamamını sadece yanıtlar için indir
+                for uid, raw_email, _ in fetch_with_header_prefilter(
+                        self.mail, new_uids, self.find_replied_message_id, self.fetch_batch_size):
+                    if raw_email:
+                        reply_data = self.process_email(uid, LazyMail(raw_email))
+                        if reply_data:
                             new_replies.append(reply_data)
-                            self.found_replies.add(email_id)
+                    
+                    # Bu UID'yi işlenmiş olarak işaretle (her batch sonunda diske yazılır)
+                    checkpoint.mark(uid)
+            finally:
+                checkpoint.commit()
             
             return new_replies
             
@@ -410,6 +587,14 @@ class ReplyTracker:
             json_filename = f"{timestamp}_reply_{email_id_str}.json"
             json_path = os.path.join(self.replies_folder, json_filename)
             
+            # Ham mail: ortak Maildir'e bir kez (başka kurala da takıldıysa aynı dosya) veya .eml
+            if self.raw_spool:
+                eml_path = self.raw_spool.store(reply_data['msg'])
+            else:
+                eml_filename = f"{timestamp}_reply_{email_id_str}.eml"
+                eml_path = os.path.join(self.replies_folder, eml_filename)
+                save_raw_email(reply_data['msg'], eml_path)
+            
             email_json = {
                 "id": email_id_str,
                 "replied_to_message_id": reply_data['replied_to_message_id'],
@@ -418,17 +603,30 @@ class ReplyTracker:
                 "from": reply_data['from'],
                 "date": reply_data['date'],
                 "body": reply_data['body'],
+                "eml_path": eml_path,
                 "saved_at": datetime.now().isoformat()
             }
             
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(email_json, f, ensure_ascii=False, indent=2)
+            # JSON kaydı: segmente ekle veya ayrı dosyaya yaz
+            if self.segment_writer:
+                self.segment_writer.append(email_json, key=os.path.splitext(json_filename)[0])
+                json_path = None
+            elif self.json_files:
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(email_json, f, ensure_ascii=False, indent=2)
+            else:
+                json_path = None
             
-            # .eml formatında da kaydet
-            eml_filename = f"{timestamp}_reply_{email_id_str}.eml"
-            eml_path = os.path.join(self.replies_folder, eml_filename)
-            with open(eml_path, "wb") as f:
-                f.write(reply_data['msg'].as_bytes())
+            # Arşive ekle (kontrol turu sonunda toplu yazılır)
+            if self.archive:
+                self.archive.add(
+                    "reply", email_json,
+                    rule=reply_data['replied_to_message_id'],
+                    account=self.email_address,
+                    message_id=reply_data['msg'].get("Message-ID"),
+                    eml_path=eml_path,
+                    json_path=json_path
+                )
             
             return json_path, eml_path
             
@@ -436,6 +634,13 @@ class ReplyTracker:
             print(f"✗ Yanıt kaydetme hatası: {e}")
             return None, None
     
+    def flush_storage(self):
+        """Turda biriken arşiv ve segment kayıtlarını yaz"""
+        if self.archive:
+            self.archive.flush()
+        if self.segment_writer:
+            self.segment_writer.flush()
+    
     def display_reply(self, reply_data):
         """Yanıtı ekrana yazdır"""
         print("\n" + "🎉"*35)
@@ -449,6 +654,59 @@ class ReplyTracker:
         print(f"\n💬 İçerik:\n{reply_data['body'][:300]}...")
         print("\n" + "="*70 + "\n")
     
+    def handle_reply(self, reply_data):
+        """Yanıtı göster, kaydet ve bildirim gönder"""
+        self.display_reply(reply_data)
+        
+        # Yanıtı kaydet
+        print("💾 Yanıt kaydediliyor...")
+        json_path, eml_path = self.save_reply(reply_data)
+        if eml_path:
+            print(f"✅ Yanıt kaydedildi:")
+            if json_path:
+                print(f"   📄 JSON: {json_path}")
+            if self.segment_writer:
+                print(f"   🗃️ Segment: {self.segment_writer.folder}/")
+            if self.archive:
+                print(f"   🗄️ Arşiv: {self.archive.path}")
+            print(f"   📧 EML: {eml_path}\n")
+        
+        # WhatsApp bildirimi gönder
+        if self.notification_manager:
+            mail_data = {
+                "subject": reply_data['subject'],
+                "from": reply_data['from'],
+                "body": reply_data['body'],
+                "date": reply_data['date']
+            }
+            
+            source = f"Yanıt Takip - {reply_data['replied_to_subject'][:30]}..."
+            
+            # EML dosyasını attachment olarak ekle
+            attachment_paths = [eml_path] if eml_path and os.path.exists(eml_path) else None
+            
+            self.notification_manager.send_notification(
+                mail_data=mail_data,
+                source=source,
+                attachment_paths=attachment_paths
+            )
+    
+    def process_email(self, email_id, msg):
+        """
+        Ortak mail akışından gelen tek bir maili işle
+        
+        Args:
+            email_id (bytes): Mailin UID'si
+            msg (email.message.Message): Parse edilmiş mail
+        
+        Returns:
+            dict: Yanıt ise yanıt bilgileri, değilse None
+        """
+        reply_data = self.match_reply(email_id, msg)
+        if reply_data:
+            self.handle_reply(reply_data)
+        return reply_data
+    
     def start_tracking(self):
         """Mail takibini başlat"""
         print("\n" + "="*70)
@@ -476,7 +734,10 @@ class ReplyTracker:
             
             # Şimdi sürekli yanıt kontrolü yap
             print(f"\n🔍 Yanıt kontrolü başlatıldı...")
-            print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
+            if self.use_idle and supports_idle(self.mail):
+                print(f"⚡ IMAP IDLE aktif: yeni mailler anında yakalanacak")
+            else:
+                print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
             print(f"📂 Yanıtlar kaydedilecek: {self.replies_folder}/")
             print(f"🔄 Durdurmak için Ctrl+C\n")
             
@@ -487,45 +748,20 @@ class ReplyTracker:
                 replies = self.check_for_replies()
                 
                 if replies:
-                    for reply in replies:
-                        self.display_reply(reply)
-                        
-                        # Yanıtı kaydet
-                        print("💾 Yanıt kaydediliyor...")
-                        json_path, eml_path = self.save_reply(reply)
-                        if json_path:
-                            print(f"✅ Yanıt kaydedildi:")
-                            print(f"   📄 JSON: {json_path}")
-                            print(f"   📧 EML: {eml_path}\n")
-                        
-                        # WhatsApp bildirimi gönder
-                        if self.notification_manager:
-                            mail_data = {
-                                "subject": reply['subject'],
-                                "from": reply['from'],
-                                "body": reply['body'],
-                                "date": reply['date']
-                            }
-                            
-                            source = f"Yanıt Takip - {reply['replied_to_subject'][:30]}..."
-                            
-                            # EML dosyasını attachment olarak ekle
-                            attachment_paths = [eml_path] if eml_path and os.path.exists(eml_path) else None
-                            
-                            self.notification_manager.send_notification(
-                                mail_data=mail_data,
-                                source=source,
-                                attachment_paths=attachment_paths
-                            )
+                    self.flush_storage()
                 else:
                     print("📭 Yeni yanıt yok")
                 
-                time.sleep(self.check_interval)
+                wait_for_new_mail(self.mail, self.check_interval, self.use_idle)
                 
         except KeyboardInterrupt:
             print("\n\n⏹ Takip durduruldu")
         finally:
             self.disconnect()
+            self.flush_storage()
+            # Kuyrukta bekleyen bildirimleri gönder
+            if self.notification_manager:
+                self.notification_manager.close()
 
 
 def main():
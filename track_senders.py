@@ -1,19 +1,30 @@
 import imaplib
 import email
 from email.header import decode_header
-import time
 import os
 import json
 from datetime import datetime
 from pathlib import Path
-from notification_manager import MailNotificationManager
+from notification_manager import create_notification_manager
+from imap_idle import supports_idle, wait_for_new_mail
+from imap_fetch import fetch_messages, fetch_with_header_prefilter, DEFAULT_FETCH_BATCH_SIZE
+from imap_search import search_matching_uids, supports_gmail_search, quote_imap_string
+from uid_state import UidState, UidCheckpoint, get_uidvalidity, get_max_uid, search_new_uids
+from mail_parser import LazyMail, save_attachment, save_raw_email
 
 class SenderTracker:
     """Belirli göndericilerden gelen mailleri yakalar"""
     
     def __init__(self, imap_server, email_address, password, check_interval=30, 
                  platform="telegram", telegram_token=None, telegram_chat_id=None, 
-                 whatsapp_phone=None, throttle_seconds=300):
+                 whatsapp_phone=None, throttle_seconds=300, use_idle=True,
+                 fetch_batch_size=DEFAULT_FETCH_BATCH_SIZE, server_search=True,
+                 async_notifications=True, notification_queue_size=100,
+                 notification_digest=True, notification_rate_limit=None,
+                 notification_outbox=True, whatsapp_api=None,
+                 notification_channels=None, notification_manager=None,
+                 archive=None, json_files=True, attachment_store=None,
+                 segment_writer=None, raw_spool=None):
         """
         Args:
             imap_server (str): IMAP sunucu adresi
@@ -25,40 +36,73 @@ class SenderTracker:
             telegram_chat_id (str): Telegram chat ID
             whatsapp_phone (str): WhatsApp bildirim telefon numarası
             throttle_seconds (int): Bildirimler arası minimum bekleme süresi
+            use_idle (bool): Sunucu destekliyorsa IMAP IDLE ile anlık bildirim bekle
+            fetch_batch_size (int): Tek FETCH komutunda çekilecek en fazla mail sayısı
+            server_search (bool): Eşleştirmeyi IMAP SEARCH ile sunucuda yapmayı dene
+            async_notifications (bool): Bildirimleri arka plan kuyruğundan gönder (mail akışı beklemez)
+            notification_queue_size (int): Gönderim bekleyen en fazla bildirim sayısı
+            notification_digest (bool): Throttle süresinde gelen bildirimleri özet olarak gönder
+            notification_rate_limit (dict): Hedef/kaynak bazlı hız limiti ayarları
+            notification_outbox (bool): Gönderilemeyen bildirimleri diskte sakla ve tekrar dene
+            whatsapp_api (dict): WhatsApp Cloud API ayarları (token, phone_number_id, api_url);
+                verilmezse WhatsApp mesajları pywhatkit ile gönderilir
+            notification_channels (list): Bildirimlerin aynı anda gönderileceği kanallar
+                (telegram, whatsapp, webhook, file); verilirse platform ayarlarının yerine geçer
+            notification_manager: Hazır bildirim yöneticisi (birden fazla hesap aynı
+                yöneticiyi paylaşır); verilirse yukarıdaki bildirim ayarları kullanılmaz
+            archive (MailArchive): Yakalanan maillerin de yazılacağı SQLite arşivi
+            json_files (bool): Her mail için ayrıca JSON dosyası yaz (arşiv varken kapatılabilir)
+            attachment_store (AttachmentStore): Verilirse ekler kayıt klasörü yerine
+                içerik özetiyle adlandırılan ortak depoya bir kez yazılır
+            segment_writer (SegmentWriter): Verilirse JSON kayıtları ayrı dosyalar yerine
+                gün gün dönen JSONL segmentlerine eklenir
+            raw_spool (MaildirSpool): Verilirse ham mail kayıt klasörüne .eml olarak değil,
+                tüm takip sistemlerinin paylaştığı Maildir'e bir kez yazılır
         """
         self.imap_server = imap_server
         self.email_address = email_address
         self.password = password
         self.check_interval = check_interval
+        self.use_idle = use_idle
+        self.fetch_batch_size = fetch_batch_size
+        self.server_search = server_search
         self.mail = None
+        self.archive = archive
+        self.json_files = json_files or archive is None
+        self.attachment_store = attachment_store
+        self.segment_writer = segment_writer
+        self.raw_spool = raw_spool
         
         # Takip edilen göndericiler
         self.tracked_senders = {}  # {email: {"name": "...", "added_at": "..."}}
-        self.processed_email_ids = set()  # İşlenmiş mail ID'leri
         
         # Kayıt klasörü
         self.save_folder = "tracked_sender_mails"
         Path(self.save_folder).mkdir(parents=True, exist_ok=True)
         
+        # UID takibi - sadece son görülen UID'den sonra gelen mailler sorgulanır
+        self.folder = "INBOX"
+        self.uid_state = UidState(os.path.join(self.save_folder, ".uid_state.json"))
+        
         # Takip listesini yükle
         self.load_tracked_senders()
         
-        # Bildirim yöneticisi (Telegram veya WhatsApp)
-        self.notification_manager = None
-        if platform == "telegram" and telegram_token and telegram_chat_id:
-            self.notification_manager = MailNotificationManager(
-                platform="telegram",
+        # Bildirim yöneticisi (Telegram, WhatsApp veya config'teki tüm kanallar)
+        self.notification_manager = notification_manager
+        if self.notification_manager is None:
+            self.notification_manager = create_notification_manager(
+                platform=platform,
                 telegram_token=telegram_token,
                 telegram_chat_id=telegram_chat_id,
+                whatsapp_phone=whatsapp_phone,
+                whatsapp_api=whatsapp_api,
+                channels=notification_channels,
                 throttle_seconds=throttle_seconds,
-                enabled=True
-            )
-        elif platform == "whatsapp" and whatsapp_phone:
-            self.notification_manager = MailNotificationManager(
-                platform="whatsapp",
-                phone_number=whatsapp_phone,
-                throttle_seconds=throttle_seconds,
-                enabled=True
+                async_send=async_notifications,
+                queue_size=notification_queue_size,
+                digest=notification_digest,
+                rate_limit=notification_rate_limit,
+                outbox_folder=self.save_folder if notification_outbox else None
             )
     
     def load_tracked_senders(self):
@@ -130,6 +174,10 @@ class SenderTracker:
     
     def get_email_body(self, msg):
         """Email içeriğini al"""
+        # Ortak akıştan gelen mail gövdesini kendisi (veya worker süreç) çıkarır
+        if isinstance(msg, LazyMail):
+            return msg.body
+        
         body = ""
         
         if msg.is_multipart():
@@ -167,28 +215,27 @@ class SenderTracker:
             
             inbox_emails = []
             
+            # Tüm mailleri tek FETCH ile al, sonra en yeni önce sırala
+            fetched = dict(fetch_messages(self.mail, email_ids, "(RFC822)", self.fetch_batch_size, use_uid=False))
+            
             for idx, email_id in enumerate(email_ids, 1):
-                status, msg_data = self.mail.fetch(email_id, "(RFC822)")
-                
-                if status != "OK":
+                if email_id not in fetched:
                     continue
                 
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        subject = self.decode_header_value(msg["Subject"])
-                        from_field = msg.get("From", "")
-                        date = msg.get("Date", "")
-                        
-                        inbox_emails.append({
-                            "index": idx,
-                            "subject": subject,
-                            "from": from_field,
-                            "from_email": self.extract_email_address(from_field),
-                            "date": date,
-                            "email_id": email_id
-                        })
+                msg = email.message_from_bytes(fetched[email_id])
+                
+                subject = self.decode_header_value(msg["Subject"])
+                from_field = msg.get("From", "")
+                date = msg.get("Date", "")
+                
+                inbox_emails.append({
+                    "index": idx,
+                    "subject": subject,
+                    "from": from_field,
+                    "from_email": self.extract_email_address(from_field),
+                    "date": date,
+                    "email_id": email_id
+                })
             
             return inbox_emails
             
@@ -289,6 +336,14 @@ class SenderTracker:
             json_filename = f"{timestamp}_{safe_sender}_{email_id_str}.json"
             json_path = os.path.join(self.save_folder, json_filename)
             
+            # Ham mail: ortak Maildir'e bir kez (başka kurala da takıldıysa aynı dosya) veya .eml
+            if self.raw_spool:
+                eml_path = self.raw_spool.store(msg)
+            else:
+                eml_filename = f"{timestamp}_{safe_sender}_{email_id_str}.eml"
+                eml_path = os.path.join(self.save_folder, eml_filename)
+                save_raw_email(msg, eml_path)
+            
             # Ek dosya bilgilerini topla
             attachments = []
             if msg.is_multipart():
@@ -296,10 +351,13 @@ class SenderTracker:
                     if part.get_content_disposition() == "attachment":
                         filename = part.get_filename()
                         if filename:
-                            attachment_path = os.path.join(self.save_folder, f"{timestamp}_{filename}")
                             try:
-                                with open(attachment_path, "wb") as f:
-                                    f.write(part.get_payload(decode=True))
+                                if self.attachment_store:
+                                    # Ek deposunda mail .eml yoluyla ekin sahibi olarak kaydedilir
+                                    attachments.append(self.attachment_store.put(part, eml_path, filename))
+                                    continue
+                                attachment_path = os.path.join(self.save_folder, f"{timestamp}_{filename}")
+                                save_attachment(part, attachment_path)
                                 attachments.append({
                                     "filename": filename,
                                     "saved_as": attachment_path
@@ -320,17 +378,33 @@ class SenderTracker:
                 "date": email_data["date"],
                 "body": email_data["body"],
                 "attachments": attachments,
+                "eml_path": eml_path,
                 "saved_at": datetime.now().isoformat()
             }
             
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(email_json, f, ensure_ascii=False, indent=2)
+            # JSON kaydı: segmente ekle veya ayrı dosyaya yaz
+            if self.segment_writer:
+                self.segment_writer.append(email_json, key=os.path.splitext(json_filename)[0])
+                json_path = None
+            elif self.json_files:
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(email_json, f, ensure_ascii=False, indent=2)
+            else:
+                json_path = None
+            
+            email_data["attachments"] = attachments
             
-            # .eml formatında da kaydet
-            eml_filename = f"{timestamp}_{safe_sender}_{email_id_str}.eml"
-            eml_path = os.path.join(self.save_folder, eml_filename)
-            with open(eml_path, "wb") as f:
-                f.write(msg.as_bytes())
+            # Arşive ekle (kontrol turu sonunda toplu yazılır)
+            if self.archive:
+                self.archive.add(
+                    "sender", email_json,
+                    rule=sender_email,
+                    account=self.email_address,
+                    message_id=msg.get("Message-ID"),
+                    eml_path=eml_path,
+                    json_path=json_path,
+                    attachments=attachments
+                )
             
             return json_path, eml_path
             
@@ -338,69 +412,162 @@ class SenderTracker:
             print(f"✗ Mail kaydetme hatası: {e}")
             return None, None
     
+    def flush_storage(self):
+        """Turda biriken arşiv ve segment kayıtlarını yaz"""
+        if self.archive:
+            self.archive.flush()
+        if self.segment_writer:
+            self.segment_writer.flush()
+    
+    def get_tracked_sender(self, headers):
+        """
+        From başlığı takip edilen bir göndericiye mi ait?
+        
+        Sadece başlıklarla çalışır, böylece mailin tamamını indirmeden
+        eşleştirme yapılabilir.
+        
+        Args:
+            headers (email.message.Message): Mail veya sadece başlıkları
+        
+        Returns:
+            str: Takip edilen gönderici email adresi, değilse None
+        """
+        sender_email = self.extract_email_address(headers.get("From", ""))
+        if sender_email in self.tracked_senders:
+            return sender_email
+        return None
+    
+    def get_search_terms(self, mail):
+        """
+        Takip edilen göndericiler için sunucu tarafı arama terimleri
+        
+        Gmail'de X-GM-RAW ile tek terim birden çok göndericiyi kapsar, diğer
+        sunucularda her gönderici için bir FROM terimi kullanılır.
+        
+        Args:
+            mail (imaplib.IMAP4): Aramanın yapılacağı IMAP bağlantısı
+        
+        Returns:
+            list: OR ile birleştirilecek IMAP arama terimleri
+        """
+        senders = list(self.tracked_senders.keys())
+        
+        if supports_gmail_search(mail):
+            terms = []
+            for start in range(0, len(senders), 20):
+                group = " OR ".join(senders[start:start + 20])
+                terms.append(f"X-GM-RAW {quote_imap_string(f'from:({group})')}")
+            return terms
+        
+        return [f"FROM {quote_imap_string(sender)}" for sender in senders]
+    
+    def match_email(self, email_id, msg):
+        """
+        Mail takip edilen bir göndericiden mi geldi?
+        
+        Args:
+            email_id (bytes): Mailin UID'si
+            msg (email.message.Message): Parse edilmiş mail
+        
+        Returns:
+            dict: Eşleşme varsa {"email_data", "msg", "sender_email"}, yoksa None
+        """
+        from_field = msg.get("From", "")
+        
+        # Bu gönderici takip ediliyor mu?
+        sender_email = self.get_tracked_sender(msg)
+        if not sender_email:
+            return None
+        
+        subject = self.decode_header_value(msg["Subject"])
+        date = msg.get("Date", "")
+        body = self.get_email_body(msg)
+        
+        email_data = {
+            "id": email_id,
+            "subject": subject,
+            "from": from_field,
+            "date": date,
+            "body": body
+        }
+        
+        return {
+            "email_data": email_data,
+            "msg": msg,
+            "sender_email": sender_email
+        }
+    
     def check_new_emails(self, skip_existing=False):
-        """Takip edilen göndericilerden gelen yeni mailleri kontrol et"""
+        """
+        Takip edilen göndericilerden gelen yeni mailleri kontrol et
+        
+        Eşleşen her mail UID'si işlenmiş olarak işaretlenmeden önce kaydedilir
+        ve bildirilir; tur yarıda kesilirse işlenmemiş mailler tekrar denenir.
+        
+        Returns:
+            list: İşlenen eşleşmeler
+        """
         try:
-            self.mail.select("INBOX")
-            
-            # Tüm mailleri al
-            status, messages = self.mail.search(None, 'ALL')
-            
-            if status != "OK":
-                return []
-            
-            email_ids = messages[0].split()
+            self.mail.select(self.folder)
+            uidvalidity = get_uidvalidity(self.mail)
+            checkpoint = UidCheckpoint(self.uid_state, self.email_address, self.folder,
+                                       uidvalidity, self.fetch_batch_size)
+            last_uid = checkpoint.last_uid
             
             if skip_existing:
+                if last_uid:
+                    # Daha önce kaydedilmiş UID varsa kaldığı yerden devam et
+                    print(f"ℹ️  UID {last_uid} sonrasından devam ediliyor.")
+                    return []
+                
                 # İlk çalıştırmada tüm mevcut mailleri işlenmiş olarak işaretle
-                for email_id in email_ids:
-                    self.processed_email_ids.add(email_id)
-                print(f"ℹ️  {len(email_ids)} mevcut mail atlandı. Sadece yeni gelenler gösterilecek.")
-                return []
-            
-            # Sadece daha önce işlenmemiş mailleri kontrol et
-            new_email_ids = [eid for eid in email_ids if eid not in self.processed_email_ids]
-            
-            if not new_email_ids:
+                max_uid = get_max_uid(self.mail)
+                self.uid_state.set_last_uid(self.email_address, self.folder, uidvalidity, max_uid)
+                print(f"ℹ️  UID {max_uid} ve öncesi mevcut mailler atlandı. Sadece yeni gelenler gösterilecek.")
                 return []
             
             triggered_emails = []
             
-            for email_id in new_email_ids:
-                status, msg_data = self.mail.fetch(email_id, "(RFC822)")
+            # Önce filtrelemeyi sunucuda yapmayı dene: sadece takip edilen göndericilerin UID'leri döner
+            if self.server_search:
+                max_uid = get_max_uid(self.mail)
+                matched_uids = search_matching_uids(self.mail, last_uid + 1, max_uid, self.get_search_terms(self.mail))
                 
-                if status != "OK":
-                    continue
-                
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        from_field = msg.get("From", "")
-                        sender_email = self.extract_email_address(from_field)
-                        
-                        # Bu gönderici takip ediliyor mu?
-                        if sender_email in self.tracked_senders:
-                            subject = self.decode_header_value(msg["Subject"])
-                            date = msg.get("Date", "")
-                            body = self.get_email_body(msg)
-                            
-                            email_data = {
-                                "id": email_id,
-                                "subject": subject,
-                                "from": from_field,
-                                "date": date,
-                                "body": body
-                            }
-                            
-                            triggered_emails.append({
-                                "email_data": email_data,
-                                "msg": msg,
-                                "sender_email": sender_email
-                            })
-                
-                # Bu mail ID'sini işlenmiş olarak işaretle
-                self.processed_email_ids.add(email_id)
+                if matched_uids is not None:
+                    matched_uids = checkpoint.filter_new(matched_uids)
+                    # Sunucu FROM araması alt dize eşleşmesidir, sonucu bellekte doğrula
+                    try:
+                        for uid, raw_email in fetch_messages(self.mail, matched_uids, "(RFC822)", self.fetch_batch_size):
+                            trigger_info = self.process_email(uid, LazyMail(raw_email))
+                            if trigger_info:
+                                triggered_emails.append(trigger_info)
+                            checkpoint.mark(uid, advance=False)
+                    except BaseException:
+                        checkpoint.commit()
+                        raise
+                    
+                    checkpoint.commit(max_uid)
+                    return triggered_emails
+            
+            # Sadece son görülen UID'den sonra gelen mailleri al
+            new_uids = checkpoint.filter_new(search_new_uids(self.mail, last_uid) or [])
+            
+            if not new_uids:
+                return []
+            
+            try:
+                # Önce sadece başlıkları çek, mailin tamamını sadece takip edilen göndericiler için indir
+                for uid, raw_email, _ in fetch_with_header_prefilter(
+                        self.mail, new_uids, self.get_tracked_sender, self.fetch_batch_size):
+                    if raw_email:
+                        trigger_info = self.process_email(uid, LazyMail(raw_email))
+                        if trigger_info:
+                            triggered_emails.append(trigger_info)
+                    
+                    # Bu UID'yi işlenmiş olarak işaretle (her batch sonunda diske yazılır)
+                    checkpoint.mark(uid)
+            finally:
+                checkpoint.commit()
             
             return triggered_emails
             
@@ -425,6 +592,60 @@ class SenderTracker:
         print(f"\n💬 İçerik:\n{email_data['body'][:300]}...")
         print("\n" + "="*70 + "\n")
     
+    def handle_triggered_email(self, trigger_info):
+        """Tetiklenen maili göster, kaydet ve bildirim gönder"""
+        self.display_triggered_email(trigger_info)
+        
+        # Maili kaydet
+        print("💾 Mail kaydediliyor...")
+        json_path, eml_path = self.save_email_to_file(
+            trigger_info['email_data'],
+            trigger_info['msg'],
+            trigger_info['sender_email']
+        )
+        if eml_path:
+            print(f"✅ Mail kaydedildi:")
+            if json_path:
+                print(f"   📄 JSON: {json_path}")
+            if self.segment_writer:
+                print(f"   🗃️ Segment: {self.segment_writer.folder}/")
+            if self.archive:
+                print(f"   🗄️ Arşiv: {self.archive.path}")
+            print(f"   📧 EML: {eml_path}\n")
+        
+        # WhatsApp bildirimi gönder
+        if self.notification_manager:
+            sender_email = trigger_info['sender_email']
+            sender_name = self.tracked_senders.get(sender_email, {}).get('name', sender_email)
+            
+            # Kaydedilen eklerin yolları
+            email_data = trigger_info['email_data']
+            attachment_paths = [a["saved_as"] for a in email_data.get("attachments", []) if "saved_as" in a]
+            
+            source = f"Gönderici Takip - {sender_name[:40]}"
+            
+            self.notification_manager.send_notification(
+                mail_data=trigger_info['email_data'],
+                source=source,
+                attachment_paths=attachment_paths if attachment_paths else None
+            )
+    
+    def process_email(self, email_id, msg):
+        """
+        Ortak mail akışından gelen tek bir maili işle
+        
+        Args:
+            email_id (bytes): Mailin UID'si
+            msg (email.message.Message): Parse edilmiş mail
+        
+        Returns:
+            dict: Eşleşme varsa trigger bilgisi, yoksa None
+        """
+        trigger_info = self.match_email(email_id, msg)
+        if trigger_info:
+            self.handle_triggered_email(trigger_info)
+        return trigger_info
+    
     def start_tracking(self):
         """Gönderici takibini başlat"""
         print("\n" + "="*70)
@@ -475,7 +696,10 @@ class SenderTracker:
             
             # Şimdi dinlemeye başla
             print(f"\n🔍 Mail dinleme başlatıldı...")
-            print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
+            if self.use_idle and supports_idle(self.mail):
+                print(f"⚡ IMAP IDLE aktif: yeni mailler anında yakalanacak")
+            else:
+                print(f"⏰ Kontrol aralığı: {self.check_interval} saniye")
             print(f"📂 Mailler kaydedilecek: {self.save_folder}/")
             print(f"🔄 Durdurmak için Ctrl+C\n")
             
@@ -491,54 +715,20 @@ class SenderTracker:
                 triggered = self.check_new_emails()
                 
                 if triggered:
-                    for trigger_info in triggered:
-                        self.display_triggered_email(trigger_info)
-                        
-                        # Maili kaydet
-                        print("💾 Mail kaydediliyor...")
-                        json_path, eml_path = self.save_email_to_file(
-                            trigger_info['email_data'],
-                            trigger_info['msg'],
-                            trigger_info['sender_email']
-                        )
-                        if json_path:
-                            print(f"✅ Mail kaydedildi:")
-                            print(f"   📄 JSON: {json_path}")
-                            print(f"   📧 EML: {eml_path}\n")
-                        
-                        # WhatsApp bildirimi gönder
-                        if self.notification_manager:
-                            sender_email = trigger_info['sender_email']
-                            sender_name = self.tracked_senders.get(sender_email, {}).get('name', sender_email)
-                            
-                            # Ek dosya yollarını topla
-                            attachment_paths = []
-                            msg = trigger_info['msg']
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    if part.get_content_disposition() == "attachment":
-                                        filename = part.get_filename()
-                                        if filename:
-                                            attachment_path = os.path.join(self.save_folder, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}")
-                                            if os.path.exists(attachment_path):
-                                                attachment_paths.append(attachment_path)
-                            
-                            source = f"Gönderici Takip - {sender_name[:40]}"
-                            
-                            self.notification_manager.send_notification(
-                                mail_data=trigger_info['email_data'],
-                                source=source,
-                                attachment_paths=attachment_paths if attachment_paths else None
-                            )
+                    self.flush_storage()
                 else:
                     print("📭 Yeni mail yok")
                 
-                time.sleep(self.check_interval)
+                wait_for_new_mail(self.mail, self.check_interval, self.use_idle)
                 
         except KeyboardInterrupt:
             print("\n\n⏹ Takip durduruldu")
         finally:
             self.disconnect()
+            self.flush_storage()
+            # Kuyrukta bekleyen bildirimleri gönder
+            if self.notification_manager:
+                self.notification_manager.close()
 
 
 def main():
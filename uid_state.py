@@ -0,0 +1,229 @@
+import json
+import os
+from pathlib import Path
+
+
+def get_uidvalidity(mail):
+    """
+    Son SELECT komutunun döndürdüğü UIDVALIDITY değerini al
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+
+    Returns:
+        int: UIDVALIDITY değeri (sunucu göndermediyse None)
+    """
+    typ, data = mail.response('UIDVALIDITY')
+    if data and data[0]:
+        try:
+            return int(data[0])
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def get_max_uid(mail):
+    """Seçili klasördeki en büyük UID'yi döndür (klasör boşsa 0)"""
+    status, data = mail.uid('SEARCH', None, '*')
+    if status != "OK" or not data or not data[0]:
+        return 0
+    return max(int(uid) for uid in data[0].split())
+
+
+def search_new_uids(mail, last_uid, criteria=None):
+    """
+    last_uid'den sonra gelen mailleri UID SEARCH ile bul
+
+    Args:
+        mail (imaplib.IMAP4): Klasörü seçilmiş IMAP bağlantısı
+        last_uid (int): En son işlenen UID
+        criteria (str): Ek arama kriteri (örn: "UNSEEN")
+
+    Returns:
+        list: Yeni UID'ler (bytes, artan sırada), hata durumunda None
+    """
+    query = f"UID {last_uid + 1}:*"
+    if criteria:
+        query += f" {criteria}"
+
+    status, data = mail.uid('SEARCH', None, query)
+    if status != "OK":
+        return None
+
+    # "n:*" aralığı, yeni mail yoksa bile son maili döndürür; onu ele
+    uids = [uid for uid in data[0].split() if int(uid) > last_uid]
+    uids.sort(key=int)
+    return uids
+
+
+class UidState:
+    """
+    Hesap/klasör bazında UIDVALIDITY, son görülen UID ve ondan sonra
+    işlenmiş UID'leri diskte saklar
+    """
+
+    def __init__(self, state_file):
+        """
+        Args:
+            state_file (str): Durumun saklanacağı JSON dosyası
+        """
+        self.state_file = state_file
+        self.state = {}  # {"hesap|klasör": {"uidvalidity": 123, "last_uid": 456, "processed": [460]}}
+        self.load()
+
+    def _key(self, account, folder):
+        return f"{account}|{folder}"
+
+    def load(self):
+        """Durum dosyasını yükle"""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"⚠️  UID durumu okunamadı ({e}), sıfırdan başlanıyor")
+                self.state = {}
+
+    def save(self):
+        """
+        Durum dosyasını kaydet
+
+        Önce geçici dosyaya yazılır, sonra tek adımda yerine konur; yazma
+        sırasında program kapanırsa eski durum bozulmadan kalır.
+        """
+        temp_file = f"{self.state_file}.tmp"
+        try:
+            Path(self.state_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.state_file)
+        except Exception as e:
+            print(f"✗ UID durumu kaydedilemedi: {e}")
+
+    def get_last_uid(self, account, folder, uidvalidity):
+        """
+        Klasör için son görülen UID'yi döndür
+
+        UIDVALIDITY değiştiyse sunucu UID'leri yeniden numaralandırmış demektir,
+        bu durumda kayıt geçersizdir ve 0 döner.
+
+        Returns:
+            int: Son görülen UID (kayıt yoksa veya geçersizse 0)
+        """
+        entry = self.state.get(self._key(account, folder))
+        if not entry:
+            return 0
+        if uidvalidity is not None and entry.get("uidvalidity") != uidvalidity:
+            print(f"⚠️  {folder} için UIDVALIDITY değişmiş, UID kaydı sıfırlandı")
+            return 0
+        return entry.get("last_uid", 0)
+
+    def get_processed(self, account, folder, uidvalidity):
+        """
+        Son görülen UID'den sonra işlenmiş UID'leri döndür
+
+        Sunucu tarafı aramada sadece eşleşen mailler işlenir ve son UID
+        poll sonunda ilerler; arada kapanılırsa bu UID'ler tekrar işlenmez.
+
+        Returns:
+            set: İşlenmiş UID'ler (int)
+        """
+        entry = self.state.get(self._key(account, folder))
+        if not entry:
+            return set()
+        if uidvalidity is not None and entry.get("uidvalidity") != uidvalidity:
+            return set()
+        return set(entry.get("processed", []))
+
+    def set_last_uid(self, account, folder, uidvalidity, last_uid, save=True, processed=None):
+        """
+        Klasör için son görülen UID'yi güncelle
+
+        Args:
+            processed (iterable): last_uid'den sonra işlenmiş UID'ler
+        """
+        last_uid = int(last_uid)
+        entry = {
+            "uidvalidity": uidvalidity,
+            "last_uid": last_uid
+        }
+        processed = sorted(int(uid) for uid in processed or [] if int(uid) > last_uid)
+        if processed:
+            entry["processed"] = processed
+        self.state[self._key(account, folder)] = entry
+        if save:
+            self.save()
+
+
+class UidCheckpoint:
+    """
+    Bir kontrol turu boyunca işlenen UID'leri toplar ve her batch sonunda
+    diske yazar
+
+    Yarıda kesilen bir turdan sonra en fazla son batch tekrar işlenir;
+    önceki batch'ler kayıtlı olduğu için yeniden başlatmada atlanır.
+    """
+
+    def __init__(self, uid_state, account, folder, uidvalidity, batch_size=100):
+        """
+        Args:
+            uid_state (UidState): Durumun saklandığı nesne
+            account (str): Email adresi
+            folder (str): Klasör adı
+            uidvalidity (int): Seçili klasörün UIDVALIDITY değeri
+            batch_size (int): Kaç mailde bir diske yazılacağı
+        """
+        self.uid_state = uid_state
+        self.account = account
+        self.folder = folder
+        self.uidvalidity = uidvalidity
+        self.batch_size = max(1, int(batch_size))
+        self.last_uid = uid_state.get_last_uid(account, folder, uidvalidity)
+        self.processed = uid_state.get_processed(account, folder, uidvalidity)
+        self.pending = 0
+
+    def is_processed(self, uid):
+        """UID daha önce işlendi mi?"""
+        uid = int(uid)
+        return uid <= self.last_uid or uid in self.processed
+
+    def filter_new(self, uids):
+        """Listeden daha önce işlenmiş UID'leri çıkar"""
+        return [uid for uid in uids if not self.is_processed(uid)]
+
+    def mark(self, uid, advance=True):
+        """
+        UID'yi işlenmiş olarak işaretle, batch dolduysa diske yaz
+
+        Args:
+            uid (bytes/int): İşlenen UID
+            advance (bool): True ise son UID buraya ilerler (aradaki tüm UID'ler
+                görüldüyse); False ise sadece işlenmiş kümesine eklenir
+        """
+        uid = int(uid)
+        if advance:
+            self.last_uid = max(self.last_uid, uid)
+            self.processed = {u for u in self.processed if u > self.last_uid}
+        elif uid > self.last_uid:
+            self.processed.add(uid)
+
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self, last_uid=None):
+        """
+        Durumu diske yaz
+
+        Args:
+            last_uid (int): Verilirse son UID buraya ilerletilir (örn: sunucu
+                tarafı arama tamamlandığında aralığın sonu)
+        """
+        if last_uid is not None:
+            self.last_uid = max(self.last_uid, int(last_uid))
+        self.processed = {u for u in self.processed if u > self.last_uid}
+        self.uid_state.set_last_uid(self.account, self.folder, self.uidvalidity,
+                                    self.last_uid, processed=self.processed)
+        self.pending = 0